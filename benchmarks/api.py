@@ -0,0 +1,208 @@
+"""
+Suíte de benchmark da API de contratos.
+
+Popula um banco SQLite temporário com dados sintéticos determinísticos e executa cada
+cenário (listagem, filtros, detalhe, resumo, criação, atualização e criação em lote)
+pelo cliente de testes do Django, sem servidor nem serviços externos. Para cada cenário
+registra a latência (p50/p95/p99) e o número de consultas SQL por requisição.
+
+O resultado em JSON tem chaves ordenadas e pode ser comparado entre commits:
+
+    python benchmarks/api.py --contratos 20000 --saida base.json
+    git checkout outra-branch
+    python benchmarks/api.py --contratos 20000 --comparar base.json
+
+Com --comparar, o script termina com código 1 se algum cenário ficar mais lento que a
+tolerância (--tolerancia, padrão 20% no p50) ou passar a executar mais consultas.
+"""
+import argparse
+import contextlib
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from dados import Contrato, configurar_banco, ler_pesos_estados, popular
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connections
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework.test import APIClient
+from gerenciamento_credito_app.app.views import ContratoViewSet
+
+
+def contrato_novo(numero_documento, parcelas):
+    return {
+        'data_emissao': '2025-01-18',
+        'data_nascimento_tomador': '1992-02-20',
+        'valor_desembolsado': '1500.00',
+        'numero_documento': numero_documento,
+        'endereco_tomador': {'estado': 'RJ', 'cidade': 'Rio de Janeiro', 'pais': 'Brasil'},
+        'telefone_tomador': '2123456789',
+        'taxa_contrato': '2.00',
+        'parcelas': [
+            {'numero_parcela': numero, 'valor_parcela': '150.00', 'data_vencimento': '2025-03-01'}
+            for numero in range(1, parcelas + 1)
+        ],
+    }
+
+
+def cenarios(amostra, parcelas):
+    """
+    Retorna os cenários como {nome: (método, url, corpo)}. Os corpos de escrita são
+    funções da repetição, para gerar dados distintos a cada chamada.
+    """
+    cpf = amostra.numero_documento
+    data = amostra.data_emissao.isoformat()
+    estado = amostra.estado
+    return {
+        'listar_paginado': ('get', '/api/contratos/?page_size=100', None),
+        'listar_campos_paginado': ('get', '/api/contratos/?page_size=100&fields=numero_documento,valor_desembolsado',
+                                   None),
+        'listar_parcelas_summary_paginado': ('get', '/api/contratos/?page_size=100&exclude=parcelas'
+                                                    '&include=parcelas_summary', None),
+        'listar_cpf': ('get', f'/api/contratos/?cpf={cpf}', None),
+        'listar_data_emissao': ('get', f'/api/contratos/?data_emissao={data}', None),
+        'listar_estado_paginado': ('get', f'/api/contratos/?estado={estado}&page_size=100', None),
+        'listar_estado_data_emissao': ('get', f'/api/contratos/?estado={estado}&data_emissao={data}', None),
+        'listar_busca_cpf': ('get', f'/api/contratos/?q={cpf[2:8]}', None),
+        'detalhe': ('get', f'/api/contratos/{amostra.id}/', None),
+        'resumo': ('get', '/api/contratos/resumo/', None),
+        'resumo_estado': ('get', f'/api/contratos/resumo/?estado={estado}', None),
+        'resumo_group_by_mes': ('get', '/api/contratos/resumo/?group_by=mes', None),
+        'criar': ('post', '/api/contratos/', lambda i: contrato_novo(f'9{i:010d}', parcelas)),
+        'atualizar': ('put', f'/api/contratos/{amostra.id}/?modo_parcelas=substituir',
+                      lambda i: contrato_novo(cpf, parcelas)),
+        'bulk_100': ('post', '/api/contratos/bulk/',
+                     lambda i: [contrato_novo(f'8{i:05d}{j:05d}', parcelas) for j in range(100)]),
+    }
+
+
+def percentil(valores, fracao):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(round(fracao * (len(valores) - 1))))]
+
+
+def executar_cenario(cliente, metodo, url, corpo, repeticoes, aquecimento, com_cache):
+    tempos = []
+    consultas = []
+    status_http = set()
+    for repeticao in range(-aquecimento, repeticoes):
+        if not com_cache:
+            caches['respostas'].clear()
+        dados = corpo(repeticao) if callable(corpo) else corpo
+        # As leituras vão pela conexão 'leitura' (roteamento.usar_leitura): captura em todos os aliases
+        with contextlib.ExitStack() as pilha:
+            capturadas = [pilha.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+            inicio = time.perf_counter()
+            resposta = getattr(cliente, metodo)(url, dados, format='json')
+            if resposta.streaming:
+                b''.join(resposta.streaming_content)
+            duracao = (time.perf_counter() - inicio) * 1000
+        if repeticao < 0:
+            continue
+        tempos.append(duracao)
+        consultas.append(sum(len(captura) for captura in capturadas))
+        status_http.add(resposta.status_code)
+    return {
+        'p50_ms': round(statistics.median(tempos), 3),
+        'p95_ms': round(percentil(tempos, 0.95), 3),
+        'p99_ms': round(percentil(tempos, 0.99), 3),
+        'media_ms': round(statistics.fmean(tempos), 3),
+        'consultas': int(statistics.median(consultas)),
+        'status': sorted(status_http),
+    }
+
+
+def comparar(base, atual, tolerancia):
+    """
+    Compara dois resultados e retorna a lista de regressões encontradas.
+    """
+    regressoes = []
+    for nome, metricas in sorted(atual['cenarios'].items()):
+        anterior = base['cenarios'].get(nome)
+        if anterior is None:
+            print(f'{nome:<28} (novo)')
+            continue
+        variacao = (metricas['p50_ms'] - anterior['p50_ms']) / anterior['p50_ms'] if anterior['p50_ms'] else 0
+        print(f"{nome:<28} p50 {anterior['p50_ms']:>9.3f} -> {metricas['p50_ms']:>9.3f} ms ({variacao:+.0%}) "
+              f"consultas {anterior['consultas']} -> {metricas['consultas']}")
+        if variacao > tolerancia:
+            regressoes.append(f'{nome}: p50 {variacao:+.0%}')
+        if metricas['consultas'] > anterior['consultas']:
+            regressoes.append(f"{nome}: consultas {anterior['consultas']} -> {metricas['consultas']}")
+    return regressoes
+
+
+def commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contratos', type=int, default=10000)
+    parser.add_argument('--parcelas', type=int, default=12, help='Parcelas por contrato.')
+    parser.add_argument('--estados', default='', help="Distribuição dos estados, ex: 'SP=4,RJ=2,MG=1'.")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--repeticoes', type=int, default=30)
+    parser.add_argument('--aquecimento', type=int, default=3)
+    parser.add_argument('--cenarios', nargs='+', help='Executa apenas os cenários informados.')
+    parser.add_argument('--com-cache', action='store_true', help='Mantém o cache de respostas entre as repetições.')
+    parser.add_argument('--saida', help='Arquivo JSON com os resultados.')
+    parser.add_argument('--comparar', help='Resultado JSON anterior para detectar regressões.')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Aumento máximo aceito no p50 (0.2 = 20%%).')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    # O rate limiting limitaria o benchmark a 50 requisições por minuto
+    ContratoViewSet.throttle_classes = []
+
+    resultado = {
+        'commit': commit_atual(),
+        'parametros': {
+            'contratos': args.contratos, 'parcelas': args.parcelas, 'estados': args.estados,
+            'semente': args.semente, 'repeticoes': args.repeticoes, 'com_cache': args.com_cache,
+        },
+        'cenarios': {},
+    }
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_banco(Path(diretorio) / 'benchmark.sqlite3')
+        print(f'Populando {args.contratos} contratos com {args.parcelas} parcelas...')
+        popular(args.contratos, args.parcelas, args.semente, ler_pesos_estados(args.estados))
+
+        cliente = APIClient()
+        cliente.force_authenticate(user=User.objects.create_user(username='benchmark'))
+        amostra = Contrato.objects.get(id=args.contratos // 2 + 1)
+
+        for nome, (metodo, url, corpo) in cenarios(amostra, args.parcelas).items():
+            if args.cenarios and nome not in args.cenarios:
+                continue
+            metricas = executar_cenario(cliente, metodo, url, corpo, args.repeticoes, args.aquecimento,
+                                        args.com_cache)
+            resultado['cenarios'][nome] = metricas
+            print(f"{nome:<28} p50={metricas['p50_ms']:>9.3f} ms p95={metricas['p95_ms']:>9.3f} ms "
+                  f"p99={metricas['p99_ms']:>9.3f} ms consultas={metricas['consultas']:>3} "
+                  f"status={metricas['status']}")
+        connections.close_all()
+
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resultado, indent=2, sort_keys=True) + '\n')
+
+    if args.comparar:
+        regressoes = comparar(json.loads(Path(args.comparar).read_text()), resultado, args.tolerancia)
+        if regressoes:
+            print('Regressões encontradas:\n  ' + '\n  '.join(regressoes))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark do arquivamento de contratos quitados.
+
+Popula --contratos contratos (emitidos entre 2022 e 2024, com --parcelas parcelas
+mensais), mede as principais leituras, arquiva os contratos cuja última parcela
+venceu há mais de --horizonte-dias dias e mede as mesmas leituras de novo, com e
+sem include_archived. Também mede o tempo do arquivamento e da restauração.
+
+    python benchmarks/arquivamento.py --contratos 100000 --parcelas 12
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from dados import configurar_banco, popular
+
+from gerenciamento_credito_app.app import arquivamento
+from gerenciamento_credito_app.app.agregacoes import calcular_resumo_com_arquivados, calcular_resumo_consolidado
+from gerenciamento_credito_app.app.analise_carteira import calcular_analise_carteira
+from gerenciamento_credito_app.app.models import Contrato, ContratoArquivado, ContratoCompleto
+from gerenciamento_credito_app.app.serializacao_rapida import linhas_contratos
+
+
+def cenarios(modelo, resumo):
+    opcoes = {
+        'lista estado=SP': lambda: linhas_contratos(modelo.objects.filter(estado='SP').order_by('id')),
+        'pagina estado=SP': lambda: linhas_contratos(
+            modelo.objects.filter(estado='SP', id__gt=50000).order_by('id')[:100]),
+        'resumo por estado': lambda: resumo({}, 'estado'),
+    }
+    # A análise da carteira considera apenas os contratos ativos
+    if modelo is Contrato:
+        opcoes['carteira'] = lambda: calcular_analise_carteira(Contrato.objects.all())
+    return opcoes
+
+
+def cronometrar(funcao, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor * 1000
+
+
+def medir(titulo, modelo, resumo, repeticoes):
+    print(f'\n{titulo}')
+    for nome, funcao in cenarios(modelo, resumo).items():
+        print(f'  {nome:<20} {cronometrar(funcao, repeticoes):>10.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contratos', type=int, default=100000)
+    parser.add_argument('--parcelas', type=int, default=12)
+    parser.add_argument('--horizonte-dias', type=int, default=arquivamento.CONFIGURACAO_PADRAO['HORIZONTE_DIAS'])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_banco(Path(diretorio) / 'arquivamento.sqlite3')
+        print(f'Populando {args.contratos} contratos com {args.parcelas} parcelas...')
+        popular(args.contratos, args.parcelas)
+        medir('Antes do arquivamento', Contrato, calcular_resumo_consolidado, args.repeticoes)
+
+        inicio = time.perf_counter()
+        arquivados = arquivamento.arquivar(arquivamento.contratos_quitados(args.horizonte_dias))
+        print(f"\nArquivados {arquivados['contratos']} contratos e {arquivados['parcelas']} parcelas "
+              f"em {time.perf_counter() - inicio:.1f} s; {Contrato.objects.count()} contratos ativos")
+
+        medir('Depois, apenas ativos', Contrato, calcular_resumo_consolidado, args.repeticoes)
+        medir('Depois, include_archived=true', ContratoCompleto, calcular_resumo_com_arquivados, args.repeticoes)
+
+        inicio = time.perf_counter()
+        restaurados = arquivamento.restaurar(ContratoArquivado.objects.all())
+        print(f"\nRestaurados {restaurados['contratos']} contratos em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
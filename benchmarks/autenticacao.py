@@ -0,0 +1,90 @@
+"""
+Benchmark da autenticação JWT: custo por requisição de autenticar o mesmo token.
+
+Compara:
+- jwt: JWTAuthentication do simplejwt (verifica a assinatura e consulta o usuário
+  em toda requisição).
+- cache: JWTAuthenticationComCache com o token já em cache (caminho rápido).
+- cache_falha: JWTAuthenticationComCache com o cache limpo antes de cada requisição
+  (primeira requisição de cada token: verificação completa e consulta de revogação).
+
+A autenticação é chamada diretamente, sem servidor, com os tokens distribuídos entre
+--usuarios usuários em um banco SQLite temporário.
+
+    python benchmarks/autenticacao.py --requisicoes 20000 --usuarios 100
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from dados import configurar_banco
+
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+from gerenciamento_credito_app.app import autenticacao
+
+CENARIOS = ('jwt', 'cache', 'cache_falha')
+
+
+def medir(cenario, requisicoes):
+    classe = JWTAuthentication if cenario == 'jwt' else autenticacao.JWTAuthenticationComCache
+    autenticacao.limpar_cache()
+    for request in requisicoes:
+        classe().authenticate(request)
+
+    tempos = []
+    consultas = []
+
+    def contar(execute, sql, params, many, context):
+        consultas.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(contar):
+        for request in requisicoes:
+            if cenario == 'cache_falha':
+                autenticacao.limpar_cache()
+            inicio = time.perf_counter()
+            classe().authenticate(request)
+            tempos.append((time.perf_counter() - inicio) * 1e6)
+    tempos.sort()
+    return {
+        'p50_us': statistics.median(tempos),
+        'p99_us': tempos[int(0.99 * (len(tempos) - 1))],
+        'media_us': statistics.fmean(tempos),
+        'consultas': len(consultas) / len(requisicoes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requisicoes', type=int, default=20000)
+    parser.add_argument('--usuarios', type=int, default=100)
+    parser.add_argument('--cenarios', nargs='+', choices=CENARIOS, default=list(CENARIOS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_banco(Path(diretorio) / 'autenticacao.sqlite3')
+        tokens = [str(AccessToken.for_user(User.objects.create_user(username=f'usuario{i}')))
+                  for i in range(args.usuarios)]
+        fabrica = APIRequestFactory()
+        requisicoes = [
+            Request(fabrica.get('/api/contratos/', HTTP_AUTHORIZATION=f'Bearer {tokens[i % len(tokens)]}'))
+            for i in range(args.requisicoes)
+        ]
+
+        print(f'{args.requisicoes} requisições, {args.usuarios} tokens')
+        print(f"{'cenario':<12} {'p50 us':>8} {'p99 us':>8} {'media us':>9} {'consultas':>10}")
+        for cenario in args.cenarios:
+            resultado = medir(cenario, requisicoes)
+            print(f"{cenario:<12} {resultado['p50_us']:>8.1f} {resultado['p99_us']:>8.1f} "
+                  f"{resultado['media_us']:>9.1f} {resultado['consultas']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
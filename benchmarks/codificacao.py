@@ -0,0 +1,91 @@
+"""
+Benchmark das codificações e da compressão das respostas da listagem de contratos.
+
+Para cada codificação (JSON com orjson, MessagePack) e cada compressão (nenhuma,
+gzip em vários níveis e brotli, quando instalado) mede os bytes enviados e o tempo
+de CPU para codificar e comprimir a listagem completa de --contratos contratos,
+montada pelo caminho rápido (linhas_contratos), como a resposta da API.
+Também mede a compressão em streaming (stream=ndjson), em blocos de TAMANHO_BLOCO.
+
+    python benchmarks/codificacao.py --contratos 20000 --parcelas 12
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from dados import configurar_banco, popular
+
+from gerenciamento_credito_app.app import codificacao_msgpack, compressao
+from gerenciamento_credito_app.app.models import Contrato
+from gerenciamento_credito_app.app.serializacao_rapida import linhas_contratos, renderizar_json
+from gerenciamento_credito_app.app.streaming import stream_contratos
+
+CODIFICACOES = {
+    'json': renderizar_json,
+    'msgpack': codificacao_msgpack.codificar,
+}
+
+
+def compressoes():
+    opcoes = {'nenhuma': None}
+    for nivel in (1, 6, 9):
+        opcoes[f'gzip-{nivel}'] = lambda nivel=nivel: compressao.CompressorGzip({'NIVEL_GZIP': nivel})
+    if compressao.brotli is not None:
+        for qualidade in (4, 11):
+            opcoes[f'br-{qualidade}'] = lambda qualidade=qualidade: compressao.CompressorBrotli(
+                {'QUALIDADE_BROTLI': qualidade})
+    return opcoes
+
+
+def cronometrar(funcao, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return resultado, melhor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contratos', type=int, default=20000)
+    parser.add_argument('--parcelas', type=int, default=12)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_banco(Path(diretorio) / 'codificacao.sqlite3')
+        print(f'Populando {args.contratos} contratos com {args.parcelas} parcelas...')
+        popular(args.contratos, args.parcelas)
+        dados = linhas_contratos(Contrato.objects.order_by('id'))
+
+        print(f"{'codificacao':<10} {'compressao':<10} {'MB':>8} {'razao':>6} {'codificar ms':>13} "
+              f"{'comprimir ms':>13}")
+        referencia = None
+        for nome, codificar in CODIFICACOES.items():
+            conteudo, tempo_codificacao = cronometrar(lambda: codificar(dados), args.repeticoes)
+            referencia = referencia or len(conteudo)
+            for nome_compressao, fabrica in compressoes().items():
+                comprimido, tempo_compressao = conteudo, 0.0
+                if fabrica is not None:
+                    def comprimir():
+                        compressor = fabrica()
+                        return compressor.comprimir(conteudo) + compressor.finalizar()
+                    comprimido, tempo_compressao = cronometrar(comprimir, args.repeticoes)
+                print(f'{nome:<10} {nome_compressao:<10} {len(comprimido) / 1e6:>8.2f} '
+                      f'{referencia / len(comprimido):>6.1f} {tempo_codificacao:>13.1f} {tempo_compressao:>13.1f}')
+
+        print('\nStreaming (ndjson, gzip-6 em blocos de TAMANHO_BLOCO):')
+        partes = list(stream_contratos(Contrato.objects.order_by('id'), 'ndjson'))
+        tamanho_bloco = compressao.CONFIGURACAO_PADRAO['TAMANHO_BLOCO']
+        comprimido, tempo = cronometrar(lambda: list(compressao._comprimir_partes(
+            partes, compressao.CompressorGzip({'NIVEL_GZIP': 6}), tamanho_bloco)), args.repeticoes)
+        total = sum(len(parte) for parte in comprimido)
+        print(f"{sum(len(parte) for parte in partes) / 1e6:.2f} MB -> {total / 1e6:.2f} MB "
+              f"em {len(comprimido)} blocos, {tempo:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
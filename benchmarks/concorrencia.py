@@ -0,0 +1,197 @@
+"""
+Benchmark de concorrência: leituras e escritas simultâneas na API de contratos.
+
+Compara dois perfis de banco, cada um em um processo e em um banco SQLite temporário:
+- padrao: configuração padrão do Django (journal em DELETE, sem pragmas, uma nova
+  conexão por requisição e uma única conexão para leitura e escrita).
+- producao: perfil de settings.py (WAL, pragmas, conexões persistentes, transações
+  IMMEDIATE e leituras na conexão somente leitura).
+
+As requisições passam pelo WSGIHandler do Django (sem servidor HTTP), para que o
+ciclo de conexões por requisição (CONN_MAX_AGE) seja o mesmo de produção. O cache
+de respostas e o rate limiting são desativados.
+
+    python benchmarks/concorrencia.py --contratos 20000 --leitores 8 --escritores 2 --duracao 10
+"""
+import argparse
+import io
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from wsgiref.util import setup_testing_defaults
+
+PERFIS = ('padrao', 'producao')
+
+
+def configurar_perfil(perfil, caminho):
+    """
+    Ajusta settings.DATABASES para o perfil antes de qualquer conexão ser aberta.
+    """
+    from django.conf import settings
+
+    bancos = settings.DATABASES
+    if perfil == 'padrao':
+        bancos['default'].update({'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}})
+        del bancos['leitura']
+    else:
+        bancos['leitura']['NAME'] = Path(caminho).as_uri() + '?mode=ro'
+    settings.CACHES['respostas'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+
+
+def requisitar(handler, metodo, caminho, token, corpo=None):
+    """
+    Executa uma requisição pelo WSGIHandler e retorna o código HTTP.
+    """
+    path, _, query = caminho.partition('?')
+    environ = {
+        'REQUEST_METHOD': metodo, 'PATH_INFO': path, 'QUERY_STRING': query,
+        'HTTP_HOST': 'testserver', 'HTTP_AUTHORIZATION': f'Bearer {token}',
+    }
+    if corpo is not None:
+        conteudo = json.dumps(corpo).encode()
+        environ.update({'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(conteudo)),
+                        'wsgi.input': io.BytesIO(conteudo)})
+    setup_testing_defaults(environ)
+    status_http = []
+    resposta = handler(environ, lambda status, cabecalhos, exc_info=None: status_http.append(status))
+    try:
+        b''.join(resposta)
+    finally:
+        # Dispara request_finished, que fecha (ou mantém) a conexão conforme CONN_MAX_AGE
+        resposta.close()
+    return int(status_http[0].split()[0])
+
+
+def leitura(aleatorio, contratos, estados):
+    return aleatorio.choice([
+        ('GET', '/api/contratos/resumo/'),
+        ('GET', f'/api/contratos/resumo/?estado={aleatorio.choice(estados)}'),
+        ('GET', f'/api/contratos/?estado={aleatorio.choice(estados)}&page_size=50'),
+        ('GET', f'/api/contratos/{aleatorio.randrange(1, contratos + 1)}/'),
+    ]) + (None,)
+
+
+def escrita(aleatorio, contratos, estados):
+    if aleatorio.random() < 0.5:
+        return 'PATCH', f'/api/contratos/{aleatorio.randrange(1, contratos + 1)}/', {'taxa_contrato': '3.00'}
+    return 'POST', '/api/contratos/', {
+        'data_emissao': '2025-01-18',
+        'data_nascimento_tomador': '1992-02-20',
+        'valor_desembolsado': '1500.00',
+        'numero_documento': f'{aleatorio.randrange(10 ** 11):011d}',
+        'endereco_tomador': {'estado': aleatorio.choice(estados), 'cidade': 'Cidade', 'pais': 'Brasil'},
+        'telefone_tomador': '2123456789',
+        'taxa_contrato': '2.00',
+        'gerar_parcelas': {'prazo': 12},
+    }
+
+
+def executar(args):
+    """
+    Executa a carga no perfil args.perfil e imprime o resultado em JSON.
+    """
+    from dados import ESTADOS, configurar_banco, popular
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = Path(diretorio) / 'concorrencia.sqlite3'
+        configurar_perfil(args.perfil, caminho)
+        configurar_banco(caminho)
+        if args.perfil == 'padrao':
+            # As migrações colocam o banco em WAL; o perfil padrão usa o journal do Django
+            from django.db import connection
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode=DELETE')
+        popular(args.contratos, args.parcelas, args.semente)
+
+        import logging
+        from django.contrib.auth.models import User
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.db import connections
+        from django.test.utils import setup_test_environment
+        from rest_framework_simplejwt.tokens import AccessToken
+        from gerenciamento_credito_app.app.views import ContratoViewSet
+
+        setup_test_environment()
+        ContratoViewSet.throttle_classes = []
+        # Erros (ex: "database is locked") são contabilizados, não impressos
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        token = str(AccessToken.for_user(User.objects.create_user(username='concorrencia')))
+        connections.close_all()
+
+        handler = WSGIHandler()
+        medicoes = {'leitura': [], 'escrita': []}
+        erros = {'leitura': 0, 'escrita': 0}
+        lock = threading.Lock()
+        fim = time.perf_counter() + args.duracao
+
+        def trabalhador(tipo, semente):
+            aleatorio = random.Random(semente)
+            gerar = leitura if tipo == 'leitura' else escrita
+            tempos = []
+            falhas = 0
+            while time.perf_counter() < fim:
+                metodo, caminho_url, corpo = gerar(aleatorio, args.contratos, ESTADOS)
+                inicio = time.perf_counter()
+                codigo = requisitar(handler, metodo, caminho_url, token, corpo)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+                falhas += codigo >= 400
+            connections.close_all()
+            with lock:
+                medicoes[tipo] += tempos
+                erros[tipo] += falhas
+
+        threads = [threading.Thread(target=trabalhador, args=('leitura', args.semente + i))
+                   for i in range(args.leitores)]
+        threads += [threading.Thread(target=trabalhador, args=('escrita', args.semente + 1000 + i))
+                    for i in range(args.escritores)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    resultado = {}
+    for tipo, tempos in medicoes.items():
+        if not tempos:
+            continue
+        resultado[tipo] = {
+            'requisicoes_por_segundo': round(len(tempos) / args.duracao, 1),
+            'p50_ms': round(statistics.median(tempos), 2),
+            'p95_ms': round(sorted(tempos)[int(0.95 * (len(tempos) - 1))], 2),
+            'erros': erros[tipo],
+        }
+    print(json.dumps(resultado))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contratos', type=int, default=20000)
+    parser.add_argument('--parcelas', type=int, default=12)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--leitores', type=int, default=8)
+    parser.add_argument('--escritores', type=int, default=2)
+    parser.add_argument('--duracao', type=float, default=10, help='Duração da carga em segundos.')
+    parser.add_argument('--perfil', choices=PERFIS, help='Executa apenas um perfil (uso interno).')
+    args = parser.parse_args()
+
+    if args.perfil:
+        executar(args)
+        return
+
+    print(f'{args.contratos} contratos, {args.leitores} leitores, {args.escritores} escritores, {args.duracao}s')
+    print(f"{'perfil':<10} {'tipo':<8} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'erros':>6}")
+    for perfil in PERFIS:
+        saida = subprocess.run([sys.executable, __file__, *sys.argv[1:], '--perfil', perfil],
+                               capture_output=True, text=True, check=True).stdout
+        for tipo, metricas in json.loads(saida.strip().splitlines()[-1]).items():
+            print(f"{perfil:<10} {tipo:<8} {metricas['requisicoes_por_segundo']:>8.1f} {metricas['p50_ms']:>9.2f} "
+                  f"{metricas['p95_ms']:>9.2f} {metricas['erros']:>6}")
+
+
+if __name__ == '__main__':
+    main()
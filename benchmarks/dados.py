@@ -0,0 +1,99 @@
+"""
+Utilitários compartilhados pelos benchmarks: configuração do Django em um banco
+SQLite temporário e geração determinística de contratos sintéticos.
+"""
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gerenciamento_credito_app.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, connections, transaction  # noqa: E402
+from gerenciamento_credito_app.app.models import Contrato, Parcela  # noqa: E402
+
+ESTADOS = ['SP', 'RJ', 'MG', 'BA', 'PR', 'RS', 'PE', 'CE', 'PA', 'SC', 'GO', 'MA', 'AM', 'ES',
+           'PB', 'RN', 'MT', 'AL', 'PI', 'DF', 'MS', 'SE', 'RO', 'TO', 'AC', 'AP', 'RR']
+DATA_INICIAL = date(2022, 1, 1)
+DIAS = 3 * 365
+LOTE = 10000
+
+
+def configurar_banco(caminho):
+    """
+    Aponta a conexão padrão (e a conexão somente leitura, quando configurada) para
+    `caminho` e cria o schema com as migrações. Deve ser chamado antes de qualquer consulta.
+    """
+    connection.close()
+    connection.settings_dict['NAME'] = str(caminho)
+    if 'leitura' in connections:
+        connections['leitura'].close()
+        connections['leitura'].settings_dict['NAME'] = Path(caminho).resolve().as_uri() + '?mode=ro'
+    call_command('migrate', verbosity=0)
+
+
+def ler_pesos_estados(texto):
+    """
+    Converte 'SP=4,RJ=2,MG=1' em {'SP': 4.0, 'RJ': 2.0, 'MG': 1.0}.
+    """
+    pesos = {}
+    for item in filter(None, (parte.strip() for parte in texto.split(','))):
+        estado, _, peso = item.partition('=')
+        pesos[estado.strip()] = float(peso or 1)
+    return pesos
+
+
+def popular(quantidade, parcelas_por_contrato=1, semente=42, pesos_estados=None):
+    """
+    Insere `quantidade` contratos (e suas parcelas) com SQL direto, em lotes de LOTE
+    linhas por transação. A mesma semente sempre gera os mesmos dados.
+    Os signals não são disparados: a tabela consolidada e o índice de busca são
+    reconstruídos ao final.
+    Parâmetros:
+        - quantidade: Quantidade de contratos.
+        - parcelas_por_contrato: Parcelas mensais de cada contrato.
+        - semente: Semente do gerador pseudoaleatório.
+        - pesos_estados: Distribuição dos estados ({'SP': 4, 'RJ': 1}); padrão uniforme em ESTADOS.
+    """
+    from gerenciamento_credito_app.app import busca, consolidacao
+
+    pesos_estados = pesos_estados or {estado: 1 for estado in ESTADOS}
+    estados = list(pesos_estados)
+    pesos = [pesos_estados[estado] for estado in estados]
+    aleatorio = random.Random(semente)
+    tabela_contrato = Contrato._meta.db_table
+    tabela_parcela = Parcela._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        for inicio in range(0, quantidade, LOTE):
+            contratos = []
+            parcelas = []
+            for contrato_id in range(inicio + 1, min(inicio + LOTE, quantidade) + 1):
+                emissao = DATA_INICIAL + timedelta(days=aleatorio.randrange(DIAS))
+                contratos.append((
+                    contrato_id, emissao.isoformat(), '1990-01-01', '1000.00',
+                    f'{aleatorio.randrange(10 ** 11):011d}',
+                    json.dumps({'estado': aleatorio.choices(estados, pesos)[0], 'cidade': 'Cidade', 'pais': 'Brasil'}),
+                    '11987654321', '2.50',
+                ))
+                for numero in range(1, parcelas_por_contrato + 1):
+                    vencimento = emissao + timedelta(days=30 * numero)
+                    parcelas.append((contrato_id, numero, '100.00', vencimento.isoformat()))
+            cursor.executemany(
+                f'INSERT INTO {tabela_contrato} (id, data_emissao, data_nascimento_tomador, valor_desembolsado, '
+                'numero_documento, endereco_tomador, telefone_tomador, taxa_contrato) '
+                'VALUES (%s, %s, %s, %s, %s, %s, %s, %s)', contratos)
+            cursor.executemany(
+                f'INSERT INTO {tabela_parcela} (contrato_id, numero_parcela, valor_parcela, data_vencimento) '
+                'VALUES (%s, %s, %s, %s)', parcelas)
+    consolidacao.reconstruir()
+    busca.reconstruir()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
@@ -0,0 +1,97 @@
+"""
+Benchmark dos filtros de contratos (cpf, data_emissao, estado) com e sem índices.
+
+Cria um banco SQLite temporário, popula com contratos sintéticos e mede a latência
+das consultas de filtro em dois cenários:
+    - antes: sem os índices de 0003_indices_filtros_estado e filtrando o estado
+      pelo JSON (endereco_tomador__estado), como no código original.
+    - depois: com os índices e filtrando pela coluna gerada `estado`.
+
+Uso:
+    python benchmarks/filtros.py --contratos 1000000 --repeticoes 20
+"""
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from dados import Contrato, Parcela, configurar_banco, connection, popular
+
+
+def cenarios(amostra, estado_por_json):
+    """
+    Retorna os filtros medidos. `amostra` é um contrato existente, usado para que
+    os filtros sempre encontrem resultados.
+    """
+    filtro_estado = 'endereco_tomador__estado' if estado_por_json else 'estado'
+    return {
+        'cpf': {'numero_documento': amostra.numero_documento},
+        'data_emissao': {'data_emissao': amostra.data_emissao},
+        'estado': {filtro_estado: 'SP'},
+        'estado+data_emissao': {filtro_estado: 'SP', 'data_emissao': amostra.data_emissao},
+        'cpf+data_emissao': {'numero_documento': amostra.numero_documento, 'data_emissao': amostra.data_emissao},
+    }
+
+
+def medir(filtros, repeticoes, limite):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        list(Contrato.objects.filter(**filtros).values_list('id', flat=True)[:limite])
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'mediana_ms': round(statistics.median(tempos), 3),
+        'p95_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.95))], 3),
+    }
+
+
+def executar_rodada(nome, estado_por_json, args, amostra):
+    resultado = {}
+    for cenario, filtros in cenarios(amostra, estado_por_json).items():
+        resultado[cenario] = medir(filtros, args.repeticoes, args.limite)
+        print(f"{nome:>6} {cenario:<22} mediana={resultado[cenario]['mediana_ms']:>10.3f} ms "
+              f"p95={resultado[cenario]['p95_ms']:>10.3f} ms")
+    return resultado
+
+
+def remover_indices():
+    with connection.schema_editor() as editor:
+        for model in (Contrato, Parcela):
+            for indice in model._meta.indexes:
+                editor.remove_index(model, indice)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contratos', type=int, default=1000000)
+    parser.add_argument('--parcelas', type=int, default=1, help='Parcelas por contrato.')
+    parser.add_argument('--repeticoes', type=int, default=20)
+    parser.add_argument('--limite', type=int, default=100, help='Contratos lidos por consulta.')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='Arquivo JSON com os resultados.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_banco(Path(diretorio) / 'benchmark.sqlite3')
+
+        print(f'Populando {args.contratos} contratos...')
+        inicio = time.perf_counter()
+        popular(args.contratos, args.parcelas, args.semente)
+        print(f'Populado em {time.perf_counter() - inicio:.1f} s')
+
+        amostra = Contrato.objects.get(id=args.contratos // 2 + 1)
+        depois = executar_rodada('depois', False, args, amostra)
+        remover_indices()
+        antes = executar_rodada('antes', True, args, amostra)
+        connection.close()
+
+    resultado = {'contratos': args.contratos, 'antes': antes, 'depois': depois}
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resultado, indent=2))
+
+
+if __name__ == '__main__':
+    main()
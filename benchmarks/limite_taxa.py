@@ -0,0 +1,138 @@
+"""
+Benchmark do rate limiting: custo por requisição e precisão entre processos.
+
+Compara as configurações:
+- drf_duplicado: UserRateThrottle listado duas vezes com o LocMemCache (configuração antiga).
+- drf: UserRateThrottle uma vez, com o LocMemCache.
+- sqlite: LimiteTaxaThrottle com os contadores em um arquivo SQLite (padrão).
+- cache: LimiteTaxaThrottle com os contadores no LocMemCache (ArmazenamentoCache).
+
+O custo é medido chamando allow_request diretamente, sem banco e sem servidor, com
+as requisições distribuídas entre --usuarios usuários (abaixo do limite). A precisão
+é medida com --processos processos enviando requisições do mesmo usuário: com um
+armazenamento por processo o limite efetivo é multiplicado pelo número de processos.
+
+    python benchmarks/limite_taxa.py --requisicoes 20000 --usuarios 1000 --processos 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+from pathlib import Path
+
+# Não usa o banco: configura apenas o Django, sem o banco temporário de dados.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gerenciamento_credito_app.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import caches  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework.throttling import UserRateThrottle  # noqa: E402
+from gerenciamento_credito_app.app import limite_taxa  # noqa: E402
+
+CONFIGURACOES = ('drf_duplicado', 'drf', 'sqlite', 'cache')
+
+
+def configurar(nome, diretorio):
+    """
+    Retorna as classes de throttle da configuração, com os contadores zerados.
+    """
+    caches['default'].clear()
+    if nome == 'sqlite':
+        settings.LIMITE_TAXA = {'ARMAZENAMENTO': 'gerenciamento_credito_app.app.limite_taxa.ArmazenamentoSQLite',
+                                'OPCOES': {'caminho': Path(diretorio) / f'{nome}.sqlite3'}}
+    else:
+        settings.LIMITE_TAXA = {'ARMAZENAMENTO': 'gerenciamento_credito_app.app.limite_taxa.ArmazenamentoCache',
+                                'OPCOES': {}}
+    limite_taxa.armazenamento.cache_clear()
+    return {
+        'drf_duplicado': [UserRateThrottle, UserRateThrottle],
+        'drf': [UserRateThrottle],
+        'sqlite': [limite_taxa.LimiteTaxaThrottle],
+        'cache': [limite_taxa.LimiteTaxaThrottle],
+    }[nome]
+
+
+def requisicao(usuario):
+    request = Request(APIRequestFactory().get('/api/contratos/'))
+    request.user = usuario
+    return request
+
+
+def aceitar(classes, request):
+    return all(classe().allow_request(request, None) for classe in classes)
+
+
+def medir_custo(nome, args, diretorio):
+    classes = configurar(nome, diretorio)
+    usuarios = [User(pk=i, username=f'usuario{i}') for i in range(1, args.usuarios + 1)]
+    requisicoes = [requisicao(usuarios[i % len(usuarios)]) for i in range(args.requisicoes)]
+    for request in requisicoes[:args.usuarios]:
+        aceitar(classes, request)
+
+    tempos = []
+    for request in requisicoes:
+        inicio = time.perf_counter()
+        aceitar(classes, request)
+        tempos.append((time.perf_counter() - inicio) * 1e6)
+    tempos.sort()
+    return {
+        'p50_us': statistics.median(tempos),
+        'p99_us': tempos[int(0.99 * (len(tempos) - 1))],
+        'media_us': statistics.fmean(tempos),
+    }
+
+
+def _enviar(nome, quantidade, diretorio, inicio):
+    classes = configurar(nome, diretorio)
+    request = requisicao(User(pk=1, username='usuario1'))
+    while time.time() < inicio:
+        time.sleep(0.001)
+    return sum(aceitar(classes, request) for _ in range(quantidade))
+
+
+def medir_precisao(nome, args, diretorio):
+    """
+    Total de requisições aceitas do mesmo usuário, enviadas por vários processos.
+    """
+    configurar(nome, diretorio)
+    limite_taxa.armazenamento().limpar()
+    contexto = get_context('fork')
+    inicio = time.time() + 0.5
+    with contexto.Pool(args.processos) as pool:
+        aceitas = pool.starmap(_enviar, [(nome, args.por_processo, diretorio, inicio)] * args.processos)
+    return sum(aceitas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requisicoes', type=int, default=20000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--processos', type=int, default=4)
+    parser.add_argument('--por-processo', type=int, default=100, help='Requisições de cada processo na precisão.')
+    parser.add_argument('--configuracoes', nargs='+', choices=CONFIGURACOES, default=list(CONFIGURACOES))
+    args = parser.parse_args()
+
+    limite = UserRateThrottle.THROTTLE_RATES['user']
+    print(f"{args.requisicoes} requisições, {args.usuarios} usuários, limite {limite}")
+    print(f"{'configuracao':<14} {'p50 us':>8} {'p99 us':>8} {'media us':>9} "
+          f"{f'aceitas ({args.processos} processos)':>24}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome in args.configuracoes:
+            custo = medir_custo(nome, args, diretorio)
+            aceitas = medir_precisao(nome, args, diretorio)
+            print(f"{nome:<14} {custo['p50_us']:>8.1f} {custo['p99_us']:>8.1f} {custo['media_us']:>9.1f} "
+                  f"{aceitas:>24}")
+
+
+if __name__ == '__main__':
+    main()
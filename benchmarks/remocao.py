@@ -0,0 +1,63 @@
+"""
+Benchmark da remoção em lote de contratos.
+
+Compara a remoção pelo Collector do Django (queryset.delete() com a consolidação
+adiada, como o DELETE de um contrato fazia) com remover_em_lote (DELETEs em conjunto,
+em transações de --tamanho-lote contratos). Cada estratégia remove os contratos de um
+estado (metade da carteira) em um banco recém-populado. O Collector mantém a trava de
+escrita do SQLite durante toda a remoção; remover_em_lote, apenas durante cada lote.
+
+    python benchmarks/remocao.py --contratos 20000 --parcelas 12
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from dados import configurar_banco, popular
+
+from gerenciamento_credito_app.app import consolidacao
+from gerenciamento_credito_app.app.models import Contrato, Parcela
+from gerenciamento_credito_app.app.remocao import TAMANHO_LOTE_REMOCAO, contar_remocao, remover_em_lote
+
+
+def remover_com_collector(queryset, tamanho_lote):
+    with consolidacao.adiar_consolidacao():
+        _, removidos = queryset.delete()
+    return {'contratos': removidos.get(Contrato._meta.label, 0), 'parcelas': removidos.get(Parcela._meta.label, 0)}
+
+
+ESTRATEGIAS = {
+    'collector': remover_com_collector,
+    'remover_em_lote': remover_em_lote,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contratos', type=int, default=20000)
+    parser.add_argument('--parcelas', type=int, default=12)
+    parser.add_argument('--tamanho-lote', type=int, default=TAMANHO_LOTE_REMOCAO)
+    args = parser.parse_args()
+
+    print(f"{'estrategia':<16} {'contratos':>10} {'parcelas':>10} {'total ms':>10} {'maior transacao ms':>19}")
+    for nome, remover in ESTRATEGIAS.items():
+        with tempfile.TemporaryDirectory() as diretorio:
+            configurar_banco(Path(diretorio) / 'remocao.sqlite3')
+            popular(args.contratos, args.parcelas, pesos_estados={'SP': 1, 'RJ': 1})
+            queryset = Contrato.objects.filter(endereco_tomador__estado='SP')
+            esperado = contar_remocao(queryset)
+
+            inicio = time.perf_counter()
+            removidos = remover(queryset, args.tamanho_lote)
+            duracao = (time.perf_counter() - inicio) * 1000
+            assert removidos == esperado, (removidos, esperado)
+            assert consolidacao.verificar() == []
+
+            lotes = 1 if nome == 'collector' else -(-removidos['contratos'] // args.tamanho_lote)
+            print(f"{nome:<16} {removidos['contratos']:>10} {removidos['parcelas']:>10} {duracao:>10.0f} "
+                  f"{duracao / lotes:>19.0f}")
+
+
+if __name__ == '__main__':
+    main()
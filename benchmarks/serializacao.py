@@ -0,0 +1,72 @@
+"""
+Microbenchmark da serialização da listagem de contratos: ContratoSerializer + JSONRenderer
+do DRF versus o caminho rápido (app/serializacao_rapida.py), medindo consulta, montagem
+e codificação JSON para cada tamanho de carteira.
+
+Uso:
+    python benchmarks/serializacao.py --tamanhos 1000 10000 100000 --parcelas 12
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from dados import Contrato, configurar_banco, popular
+
+from rest_framework.renderers import JSONRenderer
+from gerenciamento_credito_app.app.consultas import com_parcelas
+from gerenciamento_credito_app.app.serializacao_rapida import linhas_contratos, renderizar_json
+from gerenciamento_credito_app.app.serializers import ContratoSerializer
+
+
+def caminho_serializer(quantidade):
+    queryset = com_parcelas(Contrato.objects.filter(id__lte=quantidade).order_by('id'))
+    return JSONRenderer().render(ContratoSerializer(queryset, many=True).data)
+
+
+def caminho_rapido(quantidade):
+    return renderizar_json(linhas_contratos(Contrato.objects.filter(id__lte=quantidade).order_by('id')))
+
+
+def medir(funcao, quantidade, repeticoes):
+    melhor = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        conteudo = funcao(quantidade)
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor * 1000, conteudo
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--parcelas', type=int, default=12, help='Parcelas por contrato.')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', help='Arquivo JSON com os resultados.')
+    args = parser.parse_args()
+
+    resultado = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        configurar_banco(Path(diretorio) / 'benchmark.sqlite3')
+        popular(max(args.tamanhos), args.parcelas)
+
+        for quantidade in args.tamanhos:
+            serializer_ms, esperado = medir(caminho_serializer, quantidade, args.repeticoes)
+            rapido_ms, obtido = medir(caminho_rapido, quantidade, args.repeticoes)
+            resultado[quantidade] = {
+                'serializer_ms': round(serializer_ms, 1),
+                'rapido_ms': round(rapido_ms, 1),
+                'aceleracao': round(serializer_ms / rapido_ms, 1),
+                'bytes_identicos': esperado == obtido,
+            }
+            print(f'{quantidade:>7} contratos: serializer={serializer_ms:>9.1f} ms rapido={rapido_ms:>8.1f} ms '
+                  f"({resultado[quantidade]['aceleracao']}x, bytes idênticos: {esperado == obtido})")
+
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resultado, indent=2))
+
+
+if __name__ == '__main__':
+    main()
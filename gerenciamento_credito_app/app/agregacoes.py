@@ -0,0 +1,169 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncMonth
+from .consultas import filtrar_contratos
+from .models import ContratoArquivado, Parcela, ParcelaArquivada, ResumoConsolidado
+
+
+# Expressões de agrupamento aceitas pelo parâmetro group_by do resumo
+AGRUPAMENTOS = {
+    'estado': lambda: F('estado'),
+    'data_emissao': lambda: F('data_emissao'),
+    'mes': lambda: TruncMonth('data_emissao'),
+}
+
+
+def total_parcelas_subquery(modelo=Parcela):
+    """
+    Subquery com a soma das parcelas de cada contrato.
+    Usar uma subquery (ao invés de JOIN com parcelas) permite somar os valores dos
+    contratos e das parcelas na mesma consulta sem duplicar as linhas de Contrato.
+    """
+    parcelas = (
+        modelo.objects.filter(contrato=OuterRef('pk'))
+        .order_by()
+        .values('contrato')
+        .annotate(total=Sum('valor_parcela'))
+        .values('total')
+    )
+    return Subquery(parcelas, output_field=DecimalField(max_digits=20, decimal_places=2))
+
+
+def _metricas():
+    return {
+        'valor_total_a_receber': Sum('total_parcelas'),
+        'valor_total_desembolsado': Sum('valor_desembolsado'),
+        'numero_total_de_contratos': Count('id'),
+        'soma_taxas': Sum('taxa_contrato'),
+    }
+
+
+def _formatar(linha):
+    """
+    Converte uma linha agregada no formato de resposta do resumo.
+    """
+    num_contratos = linha['numero_total_de_contratos'] or 0
+    soma_taxas = linha['soma_taxas'] or 0
+    return {
+        'valor_total_a_receber': linha['valor_total_a_receber'] or 0,
+        'valor_total_desembolsado': linha['valor_total_desembolsado'] or 0,
+        'numero_total_de_contratos': num_contratos,
+        'taxa_media_dos_contratos': Decimal(soma_taxas) / num_contratos if num_contratos else 0,
+    }
+
+
+def calcular_resumo(queryset, group_by=None):
+    """
+    Calcula o resumo dos contratos em uma única consulta ao banco.
+    Sem agrupamento, executa um único aggregate com as somas, a contagem e a soma
+    das taxas. Com agrupamento, executa uma única consulta agrupada e os totais
+    gerais são obtidos somando os grupos em Python.
+    Parâmetros:
+        - queryset: QuerySet de Contrato já filtrado.
+        - group_by: Opcional. Uma das chaves de AGRUPAMENTOS ('estado', 'data_emissao', 'mes').
+    Retorna:
+        tuple: (resumo, grupos), onde resumo é o dicionário com os totais e grupos é
+        a lista de totais por grupo (ou None quando não há agrupamento).
+    """
+    queryset = queryset.order_by().annotate(total_parcelas=total_parcelas_subquery())
+
+    if not group_by:
+        return _formatar(queryset.aggregate(**_metricas())), None
+
+    linhas = list(
+        queryset.annotate(grupo=AGRUPAMENTOS[group_by]())
+        .values('grupo')
+        .annotate(**_metricas())
+        .order_by('grupo')
+    )
+
+    totais = {chave: sum(linha[chave] or 0 for linha in linhas) for chave in _metricas()}
+    grupos = [{group_by: linha['grupo'], **_formatar(linha)} for linha in linhas]
+    return _formatar(totais), grupos
+
+
+def _resumo_consolidado_queryset(params):
+    queryset = ResumoConsolidado.objects.all()
+    if params.get('cpf'):
+        queryset = queryset.filter(numero_documento=params['cpf'])
+    if params.get('data_emissao'):
+        queryset = queryset.filter(data_emissao=params['data_emissao'])
+    if params.get('estado'):
+        queryset = queryset.filter(estado=params['estado'])
+    return queryset
+
+
+def _metricas_consolidadas():
+    return {
+        'valor_total_a_receber': Sum('valor_total_parcelas'),
+        'valor_total_desembolsado': Sum('valor_total_desembolsado'),
+        'numero_total_de_contratos': Sum('numero_contratos'),
+        'soma_taxas': Sum('soma_taxas'),
+    }
+
+
+def _agrupados(queryset, group_by):
+    return queryset.annotate(grupo=AGRUPAMENTOS[group_by]()).values('grupo').annotate(
+        **_metricas_consolidadas()).order_by('grupo')
+
+
+def _totais_e_grupos(linhas, group_by):
+    totais = {chave: sum(linha[chave] or 0 for linha in linhas) for chave in _metricas_consolidadas()}
+    grupos = [{group_by: linha['grupo'], **_formatar(linha)} for linha in linhas]
+    return _formatar(totais), grupos
+
+
+def calcular_resumo_consolidado(params, group_by=None):
+    """
+    Calcula o resumo a partir da tabela consolidada (ResumoConsolidado), sem ler
+    Contrato e Parcela. O custo depende da quantidade de linhas consolidadas que
+    atendem aos filtros e não da quantidade de contratos.
+    Parâmetros:
+        - params: Parâmetros da requisição com os filtros cpf, data_emissao e estado.
+        - group_by: Opcional. Uma das chaves de AGRUPAMENTOS.
+    Retorna:
+        tuple: (resumo, grupos), no mesmo formato de calcular_resumo.
+    """
+    queryset = _resumo_consolidado_queryset(params)
+    if not group_by:
+        return _formatar(queryset.aggregate(**_metricas_consolidadas())), None
+    return _totais_e_grupos(list(_agrupados(queryset, group_by)), group_by)
+
+
+def calcular_resumo_com_arquivados(params, group_by=None):
+    """
+    Calcula o resumo incluindo os contratos arquivados (`include_archived=true`): os
+    totais dos contratos ativos vêm da tabela consolidada e os dos arquivados são
+    calculados a partir de ContratoArquivado e ParcelaArquivada, e os dois são somados
+    (por grupo, com group_by).
+    Parâmetros e retorno iguais aos de calcular_resumo_consolidado.
+    """
+    consolidado = _resumo_consolidado_queryset(params)
+    arquivados = filtrar_contratos(ContratoArquivado.objects.all(), params, ('cpf', 'data_emissao', 'estado'))
+    arquivados = arquivados.order_by().annotate(total_parcelas=total_parcelas_subquery(ParcelaArquivada))
+
+    if not group_by:
+        linhas = [consolidado.aggregate(**_metricas_consolidadas()), arquivados.aggregate(**_metricas())]
+        return _formatar({chave: sum(linha[chave] or 0 for linha in linhas) for chave in _metricas()}), None
+
+    por_grupo = defaultdict(list)
+    for linha in list(_agrupados(consolidado, group_by)) + list(
+            arquivados.annotate(grupo=AGRUPAMENTOS[group_by]()).values('grupo').annotate(**_metricas())):
+        # Na tabela consolidada, contratos sem estado ficam com estado ''
+        por_grupo['' if linha['grupo'] is None else linha['grupo']].append(linha)
+    linhas = [
+        {'grupo': grupo, **{chave: sum(linha[chave] or 0 for linha in linhas) for chave in _metricas()}}
+        for grupo, linhas in sorted(por_grupo.items())
+    ]
+    return _totais_e_grupos(linhas, group_by)
+
+
+async def acalcular_resumo_consolidado(params, group_by=None):
+    """
+    Versão assíncrona de calcular_resumo_consolidado (ORM assíncrono), com o mesmo resultado.
+    """
+    queryset = _resumo_consolidado_queryset(params)
+    if not group_by:
+        return _formatar(await queryset.aaggregate(**_metricas_consolidadas())), None
+    return _totais_e_grupos([linha async for linha in _agrupados(queryset, group_by)], group_by)
@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.dispatch import receiver
+from .consolidacao import contratos_alterados
+from .models import AlteracaoContrato, Contrato
+from .serializacao_rapida import CAMPOS_PADRAO, linhas_contratos
+
+
+TAMANHO_PAGINA_ALTERACOES = 100
+TAMANHO_PAGINA_ALTERACOES_MAXIMO = 1000
+LOTE_REGISTRO = 500
+
+
+def registrar(contrato_ids):
+    """
+    Registra uma nova alteração para cada contrato informado, substituindo a anterior.
+    As novas linhas recebem sequências maiores que todas as existentes. No SQLite as
+    escritas são serializadas, então as sequências ficam visíveis na ordem em que são
+    geradas e um cliente que leu até a sequência N não perde alterações anteriores a N.
+    """
+    contrato_ids = sorted(contrato_ids)
+    if not contrato_ids:
+        return
+    with transaction.atomic():
+        for inicio in range(0, len(contrato_ids), LOTE_REGISTRO):
+            lote = contrato_ids[inicio:inicio + LOTE_REGISTRO]
+            AlteracaoContrato.objects.filter(contrato_id__in=lote).delete()
+            AlteracaoContrato.objects.bulk_create([AlteracaoContrato(contrato_id=contrato_id) for contrato_id in lote])
+
+
+@receiver(contratos_alterados)
+def registrar_contratos_alterados(sender, contrato_ids, apos_commit=False, **kwargs):
+    # Registrado na mesma transação da escrita; a notificação após o commit é ignorada
+    if not apos_commit:
+        registrar(contrato_ids)
+
+
+def listar_alteracoes(since, tamanho_pagina=TAMANHO_PAGINA_ALTERACOES, campos=CAMPOS_PADRAO):
+    """
+    Retorna os contratos alterados depois da sequência `since`, em ordem de sequência.
+    Cada contrato aparece uma única vez, com os dados atuais; contratos removidos
+    aparecem como lápides (`removido: true`, sem `contrato`).
+    Parâmetros:
+        - since: Última sequência já recebida pelo cliente (0 para a carga inicial).
+        - tamanho_pagina: Quantidade máxima de alterações retornadas.
+        - campos: Campos de cada contrato (ver campos_selecionados).
+    Retorna:
+        dict: `results` (seq, id, removido, contrato), `next_since` (a sequência a
+        informar na próxima chamada) e `has_more` (se existem mais alterações).
+    """
+    alteracoes = list(
+        AlteracaoContrato.objects.filter(id__gt=since).order_by('id').values_list('id', 'contrato_id')[:tamanho_pagina + 1]
+    )
+    has_more = len(alteracoes) > tamanho_pagina
+    alteracoes = alteracoes[:tamanho_pagina]
+
+    contratos = {}
+    if alteracoes:
+        contratos = {
+            contrato['id']: contrato for contrato in linhas_contratos(
+                Contrato.objects.filter(id__in=[contrato_id for _, contrato_id in alteracoes]), campos)
+        }
+    return {
+        'results': [
+            {'seq': seq, 'id': contrato_id, 'removido': contrato_id not in contratos,
+             'contrato': contratos.get(contrato_id)}
+            for seq, contrato_id in alteracoes
+        ],
+        'next_since': alteracoes[-1][0] if alteracoes else since,
+        'has_more': has_more,
+    }
@@ -0,0 +1,111 @@
+import calendar
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, localcontext
+
+
+SISTEMAS_AMORTIZACAO = ('price', 'sac')
+PRAZO_MAXIMO = 600
+CENTAVOS = Decimal('0.01')
+
+
+def somar_meses(data, meses):
+    """
+    Soma meses a uma data, ajustando o dia para o último dia do mês quando necessário
+    (ex: 31/01 + 1 mês = 28/02).
+    """
+    mes = data.month - 1 + meses
+    ano = data.year + mes // 12
+    mes = mes % 12 + 1
+    dia = min(data.day, calendar.monthrange(ano, mes)[1])
+    return date(ano, mes, dia)
+
+
+def _arredondar(valor):
+    return valor.quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+
+
+def _parcela_price(saldo, taxa, restantes):
+    """
+    Parcela fixa (tabela Price) que quita `saldo` em `restantes` parcelas, sem arredondar.
+    """
+    if taxa == 0:
+        return saldo / restantes
+    return saldo * taxa / (1 - (1 + taxa) ** -restantes)
+
+
+def _cronograma(valor, taxa, prazo, amortizacao):
+    """
+    Monta as parcelas período a período a partir do saldo devedor: os juros de cada
+    período são arredondados para centavos, `amortizacao(saldo, juros, restantes)` dá a
+    amortização (limitada ao saldo e nunca negativa) e a última parcela quita o saldo
+    exato. Recalcular a amortização a partir do saldo evita que a diferença de
+    arredondamento seja capitalizada ao longo do prazo e caia toda na última parcela.
+    """
+    saldo = valor
+    valores = []
+    for numero in range(1, prazo + 1):
+        juros = _arredondar(saldo * taxa)
+        restantes = prazo - numero + 1
+        if restantes == 1:
+            amortizado = saldo
+        else:
+            amortizado = min(max(amortizacao(saldo, juros, restantes), Decimal(0)), saldo)
+        valores.append(_arredondar(amortizado + juros))
+        saldo -= amortizado
+    return valores
+
+
+def _valores_price(valor, taxa, prazo):
+    """
+    Tabela Price: parcelas fixas. A parcela é recalculada (e arredondada) sobre o saldo
+    e o prazo restantes a cada período, então as parcelas variam no máximo alguns
+    centavos e a última quita o saldo.
+    """
+    return _cronograma(valor, taxa, prazo,
+                       lambda saldo, juros, restantes: _arredondar(_parcela_price(saldo, taxa, restantes)) - juros)
+
+
+def _valores_sac(valor, taxa, prazo):
+    """
+    SAC: amortização constante (o saldo dividido pelo prazo restante, arredondado) e
+    juros sobre o saldo devedor; a última amortização quita o saldo.
+    """
+    return _cronograma(valor, taxa, prazo, lambda saldo, juros, restantes: _arredondar(saldo / restantes))
+
+
+def gerar_cronograma(valor, taxa_percentual, prazo, primeiro_vencimento, sistema='price'):
+    """
+    Gera as parcelas de um contrato pelo sistema de amortização informado.
+    Todos os valores são calculados com Decimal (sem float) e arredondados para centavos,
+    de forma que a soma das amortizações é exatamente o valor desembolsado (arredondado
+    para centavos). Valores em float são convertidos pelo texto (1000.1 -> Decimal('1000.1')),
+    não pela expansão binária.
+    Parâmetros:
+        - valor: Valor desembolsado do contrato.
+        - taxa_percentual: Taxa de juros mensal, em percentual (ex: 2.5 para 2,5% a.m.).
+        - prazo: Quantidade de parcelas mensais.
+        - primeiro_vencimento: Data de vencimento da primeira parcela.
+        - sistema: 'price' (parcelas fixas) ou 'sac' (amortização constante).
+    Retorna:
+        list: Dicionários com numero_parcela, valor_parcela e data_vencimento.
+    """
+    if sistema not in SISTEMAS_AMORTIZACAO:
+        raise ValueError(f'Sistema de amortização inválido: {sistema}')
+    if not 1 <= prazo <= PRAZO_MAXIMO:
+        raise ValueError(f'O prazo deve estar entre 1 e {PRAZO_MAXIMO} parcelas.')
+
+    with localcontext() as contexto:
+        contexto.prec = 34
+        valor = _arredondar(Decimal(str(valor)))
+        taxa = Decimal(str(taxa_percentual)) / 100
+        calcular = _valores_price if sistema == 'price' else _valores_sac
+        valores = calcular(valor, taxa, prazo)
+
+    return [
+        {
+            'numero_parcela': numero,
+            'valor_parcela': valor_parcela,
+            'data_vencimento': somar_meses(primeiro_vencimento, numero - 1),
+        }
+        for numero, valor_parcela in enumerate(valores, start=1)
+    ]
@@ -0,0 +1,117 @@
+from datetime import date
+from decimal import Decimal
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from .models import Parcela
+
+
+# Faixas de atraso (em dias) das parcelas vencidas: (nome, dias mínimos, dias máximos)
+FAIXAS_ATRASO = (
+    ('1-30', 1, 30),
+    ('31-60', 31, 60),
+    ('61-90', 61, 90),
+    ('91-180', 91, 180),
+    ('181+', 181, None),
+)
+
+DIAS_POR_MES = Decimal('30.4375')
+
+
+def _faixa(dias):
+    for nome, minimo, maximo in FAIXAS_ATRASO:
+        if dias >= minimo and (maximo is None or dias <= maximo):
+            return nome
+
+
+def _vencimentos(queryset):
+    """
+    Soma e contagem das parcelas dos contratos filtrados por data de vencimento, em
+    uma única consulta agrupada. O resultado tem uma linha por data distinta (no
+    máximo alguns milhares), independente da quantidade de parcelas.
+    """
+    parcelas = Parcela.objects.all()
+    if queryset.query.where:
+        parcelas = parcelas.filter(contrato__in=queryset.values('id'))
+    return (
+        parcelas.order_by()
+        .values('data_vencimento')
+        .annotate(valor=Sum('valor_parcela'), quantidade=Count('id'))
+        .order_by('data_vencimento')
+    )
+
+
+def calcular_analise_carteira(queryset, data_referencia=None):
+    """
+    Calcula os indicadores da carteira dos contratos filtrados, na data de referência:
+    - atraso: valor e quantidade das parcelas vencidas por faixa de dias de atraso.
+    - fluxo_projetado: valor e quantidade das parcelas a vencer por mês de vencimento.
+    - taxa_media_ponderada: taxa dos contratos ponderada pelo valor desembolsado.
+    - prazo_medio_meses: prazo médio do fluxo a vencer, ponderado pelo valor das parcelas.
+    - duration_meses: duration de Macaulay do fluxo a vencer, descontado mensalmente
+      pela taxa média ponderada.
+    As parcelas não são carregadas: o banco agrega os valores por data de vencimento
+    (ver _vencimentos) e os indicadores são calculados sobre essas somas, o que mantém
+    o custo em Python proporcional à quantidade de datas, e não de parcelas.
+    Não há registro de pagamentos, então toda parcela com vencimento anterior à data de
+    referência é considerada em atraso.
+    Parâmetros:
+        - queryset: QuerySet de Contrato já filtrado.
+        - data_referencia: Opcional. Data da análise (padrão: hoje).
+    Retorna:
+        dict: Os indicadores da carteira.
+    """
+    data_referencia = data_referencia or date.today()
+    queryset = queryset.order_by()
+
+    contratos = queryset.aggregate(
+        numero_contratos=Count('id'),
+        total_desembolsado=Sum('valor_desembolsado'),
+        soma_taxas_ponderadas=Sum(ExpressionWrapper(
+            F('taxa_contrato') * F('valor_desembolsado'),
+            output_field=DecimalField(max_digits=20, decimal_places=4),
+        )),
+    )
+    valor_desembolsado = contratos['total_desembolsado'] or Decimal(0)
+    taxa_media = (
+        Decimal(contratos['soma_taxas_ponderadas']) / valor_desembolsado if valor_desembolsado else Decimal(0)
+    )
+
+    atraso = {nome: {'valor': Decimal(0), 'quantidade': 0} for nome, _, _ in FAIXAS_ATRASO}
+    fluxo = {}
+    valor_a_vencer = Decimal(0)
+    soma_prazos = Decimal(0)
+    valor_presente = Decimal(0)
+    soma_prazos_descontados = Decimal(0)
+    desconto = 1 + taxa_media / 100
+
+    for linha in _vencimentos(queryset):
+        dias = (data_referencia - linha['data_vencimento']).days
+        if dias > 0:
+            faixa = atraso[_faixa(dias)]
+            faixa['valor'] += linha['valor']
+            faixa['quantidade'] += linha['quantidade']
+            continue
+
+        mes = linha['data_vencimento'].replace(day=1)
+        projecao = fluxo.setdefault(mes, {'mes': mes, 'valor': Decimal(0), 'quantidade': 0})
+        projecao['valor'] += linha['valor']
+        projecao['quantidade'] += linha['quantidade']
+
+        meses = Decimal(-dias) / DIAS_POR_MES
+        valor_a_vencer += linha['valor']
+        soma_prazos += meses * linha['valor']
+        valor_descontado = linha['valor'] / desconto ** meses
+        valor_presente += valor_descontado
+        soma_prazos_descontados += meses * valor_descontado
+
+    return {
+        'data_referencia': data_referencia,
+        'numero_contratos': contratos['numero_contratos'],
+        'valor_desembolsado': valor_desembolsado,
+        'taxa_media_ponderada': round(taxa_media, 4),
+        'valor_em_atraso': sum(faixa['valor'] for faixa in atraso.values()),
+        'valor_a_vencer': valor_a_vencer,
+        'prazo_medio_meses': round(soma_prazos / valor_a_vencer, 2) if valor_a_vencer else 0,
+        'duration_meses': round(soma_prazos_descontados / valor_presente, 2) if valor_presente else 0,
+        'atraso': [{'faixa': nome, **atraso[nome]} for nome, _, _ in FAIXAS_ATRASO],
+        'fluxo_projetado': list(fluxo.values()),
+    }
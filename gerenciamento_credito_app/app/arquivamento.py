@@ -0,0 +1,118 @@
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from .consolidacao import aplicar_alteracoes
+from .models import Contrato, ContratoArquivado, ContratoCompleto, Parcela, ParcelaArquivada
+from .remocao import apagar_contratos, apagar_linhas, processar_em_lotes
+
+
+# Configuração padrão; pode ser sobrescrita por settings.ARQUIVAMENTO
+CONFIGURACAO_PADRAO = {
+    # Contratos cuja última parcela venceu há mais que isso (em dias) são arquivados
+    'HORIZONTE_DIAS': 365,
+    # Contratos movidos por transação
+    'TAMANHO_LOTE': 1000,
+}
+
+
+def configuracao():
+    return {**CONFIGURACAO_PADRAO, **getattr(settings, 'ARQUIVAMENTO', {})}
+
+
+def incluir_arquivados(params):
+    """
+    Indica se a leitura deve incluir os contratos arquivados (`include_archived=true`).
+    """
+    return params.get('include_archived', '').lower() in ('1', 'true')
+
+
+def contratos_leitura(params):
+    """
+    Contratos das leituras da API: apenas os ativos ou, com `include_archived=true`,
+    também os arquivados, pela visão ContratoCompleto.
+    """
+    if incluir_arquivados(params):
+        # A visão traz os ativos e depois os arquivados: a ordem por ID mantém a da tabela
+        return ContratoCompleto.objects.order_by('id')
+    return Contrato.objects.all()
+
+
+def contratos_quitados(horizonte_dias=None, hoje=None):
+    """
+    Contratos ativos cuja última parcela venceu antes de `hoje - horizonte_dias`.
+    Como não há registro de pagamentos, são considerados quitados. Contratos sem
+    parcelas não são arquivados.
+    """
+    if horizonte_dias is None:
+        horizonte_dias = configuracao()['HORIZONTE_DIAS']
+    data_limite = (hoje or date.today()) - timedelta(days=horizonte_dias)
+    # EXISTS em vez de MAX com GROUP BY: a leitura segue a ordem do ID e para no
+    # tamanho do lote, sem agregar (e ordenar) todos os contratos a cada lote
+    parcelas = Parcela.objects.filter(contrato=OuterRef('pk'))
+    return Contrato.objects.filter(Exists(parcelas), ~Exists(parcelas.filter(data_vencimento__gte=data_limite)))
+
+
+def _copiar(cursor, origem, destino, coluna, ids):
+    # INSERT ... SELECT mantendo os IDs; a coluna gerada (estado) é recalculada pelo banco
+    colunas = ', '.join(campo.column for campo in origem._meta.concrete_fields if not campo.generated)
+    cursor.execute(
+        f"INSERT INTO {destino._meta.db_table} ({colunas}) SELECT {colunas} FROM {origem._meta.db_table} "
+        f"WHERE {coluna} IN ({', '.join(['%s'] * len(ids))})", ids
+    )
+
+
+def _arquivar_lote(contratos):
+    ids = [contrato.id for contrato in contratos]
+    with connection.cursor() as cursor:
+        _copiar(cursor, Contrato, ContratoArquivado, 'id', ids)
+        _copiar(cursor, Parcela, ParcelaArquivada, Parcela._meta.get_field('contrato').column, ids)
+    return apagar_contratos(contratos)
+
+
+def _restaurar_lote(contratos):
+    ids = [contrato.id for contrato in contratos]
+    coluna_contrato = ParcelaArquivada._meta.get_field('contrato').column
+    with connection.cursor() as cursor:
+        _copiar(cursor, ContratoArquivado, Contrato, 'id', ids)
+        _copiar(cursor, ParcelaArquivada, Parcela, coluna_contrato, ids)
+        parcelas = apagar_linhas(cursor, ParcelaArquivada, coluna_contrato, ids)
+        restaurados = apagar_linhas(cursor, ContratoArquivado, 'id', ids)
+    # As chaves consolidadas dos contratos restaurados são lidas do banco
+    aplicar_alteracoes(contrato_ids=ids)
+    return {'contratos': restaurados, 'parcelas': parcelas}
+
+
+def arquivar(queryset=None, tamanho_lote=None):
+    """
+    Move os contratos quitados (e suas parcelas) para as tabelas de arquivo
+    (ContratoArquivado e ParcelaArquivada), com INSERT ... SELECT e DELETE em conjunto,
+    em transações de `tamanho_lote` contratos. Os IDs são mantidos.
+    Os contratos arquivados saem da tabela consolidada (resumo), do índice de busca e
+    das leituras padrão, e aparecem como removidos no feed de alterações; continuam
+    disponíveis com `include_archived=true` e podem ser restaurados (restaurar).
+    Parâmetros:
+        - queryset: QuerySet de Contrato a arquivar (padrão: contratos_quitados()).
+        - tamanho_lote: Contratos por transação (padrão: TAMANHO_LOTE da configuração).
+    Retorna:
+        dict: Quantidade de contratos e parcelas arquivados.
+    """
+    if queryset is None:
+        queryset = contratos_quitados()
+    tamanho_lote = tamanho_lote or configuracao()['TAMANHO_LOTE']
+    return {'contratos': 0, 'parcelas': 0, **processar_em_lotes(queryset, _arquivar_lote, tamanho_lote)}
+
+
+def restaurar(queryset, tamanho_lote=None):
+    """
+    Move os contratos arquivados do queryset (e suas parcelas) de volta para as tabelas
+    ativas, com os mesmos IDs, atualizando a tabela consolidada, o índice de busca, o
+    feed de alterações e o cache.
+    Parâmetros:
+        - queryset: QuerySet de ContratoArquivado a restaurar.
+        - tamanho_lote: Contratos por transação (padrão: TAMANHO_LOTE da configuração).
+    Retorna:
+        dict: Quantidade de contratos e parcelas restaurados.
+    """
+    tamanho_lote = tamanho_lote or configuracao()['TAMANHO_LOTE']
+    return {'contratos': 0, 'parcelas': 0, **processar_em_lotes(queryset, _restaurar_lote, tamanho_lote)}
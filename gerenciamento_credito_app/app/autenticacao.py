@@ -0,0 +1,170 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .models import TokenRevogado
+
+
+# Configuração padrão; pode ser sobrescrita por settings.AUTENTICACAO_JWT
+CONFIGURACAO_PADRAO = {
+    # Quantidade máxima de tokens guardados por processo (os menos usados são descartados)
+    'MAXIMO_TOKENS': 10000,
+    # Segundos até um token em cache ter a revogação e o usuário verificados de novo no
+    # banco. Limita o atraso de revogações e alterações feitas em outros processos.
+    'REVALIDAR_APOS': 60,
+}
+
+_metricas = {'acertos': 0, 'falhas': 0, 'revalidacoes': 0}
+_lock_metricas = threading.Lock()
+
+
+def _contar(metrica):
+    with _lock_metricas:
+        _metricas[metrica] += 1
+
+
+def configuracao():
+    return {**CONFIGURACAO_PADRAO, **getattr(settings, 'AUTENTICACAO_JWT', {})}
+
+
+class CacheTokens:
+    """
+    Cache LRU, em memória e limitado a `maximo` entradas, dos tokens já verificados,
+    indexado pelo hash do token. remover_se percorre todas as entradas e é usado
+    apenas nas revogações e alterações de usuários, que são raras.
+    """
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+            return entrada
+
+    def guardar(self, chave, entrada):
+        with self._lock:
+            self._entradas[chave] = entrada
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def remover(self, chave):
+        with self._lock:
+            self._entradas.pop(chave, None)
+
+    def remover_se(self, condicao):
+        with self._lock:
+            for chave in [chave for chave, entrada in self._entradas.items() if condicao(entrada)]:
+                del self._entradas[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+
+_tokens = CacheTokens(configuracao()['MAXIMO_TOKENS'])
+
+
+def obter_metricas():
+    """
+    Retorna os contadores do cache de tokens deste processo.
+    """
+    with _lock_metricas:
+        metricas = dict(_metricas, tokens_em_cache=len(_tokens))
+    consultas = metricas['acertos'] + metricas['falhas']
+    metricas['taxa_de_acerto'] = round(metricas['acertos'] / consultas, 4) if consultas else 0
+    return metricas
+
+
+def limpar_cache():
+    _tokens.limpar()
+
+
+def revogar_token(token):
+    """
+    Revoga um token de acesso já validado: ele passa a ser recusado até expirar.
+    As revogações de tokens já expirados são removidas da tabela.
+    """
+    agora = datetime.now(tz=timezone.utc)
+    TokenRevogado.objects.filter(expira_em__lt=agora).delete()
+    TokenRevogado.objects.get_or_create(jti=token[jwt_settings.JTI_CLAIM], defaults={
+        'usuario_id': token.get(jwt_settings.USER_ID_CLAIM),
+        'expira_em': datetime.fromtimestamp(token['exp'], tz=timezone.utc),
+    })
+
+
+@receiver(post_save, sender=TokenRevogado)
+def remover_token_revogado(sender, instance, **kwargs):
+    _tokens.remover_se(lambda entrada: entrada['jti'] == instance.jti)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def remover_tokens_do_usuario(sender, instance, **kwargs):
+    # Usuário desativado, excluído ou com a senha alterada: o token volta a ser verificado
+    _tokens.remover_se(lambda entrada: entrada['usuario'].pk == instance.pk)
+
+
+class JWTAuthenticationComCache(JWTAuthentication):
+    """
+    Autenticação JWT que guarda os tokens já verificados (claims e usuário) em um
+    cache LRU por processo, indexado pelo hash SHA-256 do token, até o `exp` do token.
+    No caminho rápido a requisição é autenticada sem verificar a assinatura e sem
+    consultar o usuário no banco. A cada REVALIDAR_APOS segundos a revogação e o
+    usuário são verificados de novo no banco (sem repetir a criptografia).
+    Tokens revogados (TokenRevogado) são recusados; as revogações e alterações de
+    usuários feitas neste processo removem as entradas do cache imediatamente.
+    """
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        chave = hashlib.sha256(raw_token).hexdigest()
+        agora = time.time()
+        entrada = _tokens.obter(chave)
+        if entrada is not None and agora < entrada['expira_em']:
+            if agora - entrada['validado_em'] >= configuracao()['REVALIDAR_APOS']:
+                _contar('revalidacoes')
+                entrada = self._revalidar(chave, entrada['token'], agora)
+            else:
+                _contar('acertos')
+            return entrada['usuario'], entrada['token']
+
+        _contar('falhas')
+        entrada = self._revalidar(chave, self.get_validated_token(raw_token), agora)
+        return entrada['usuario'], entrada['token']
+
+    def _revalidar(self, chave, token, agora):
+        """
+        Verifica a revogação do token e carrega o usuário, guardando o resultado no cache.
+        """
+        jti = token.get(jwt_settings.JTI_CLAIM)
+        if jti is not None and TokenRevogado.objects.filter(jti=jti).exists():
+            _tokens.remover(chave)
+            raise InvalidToken({'detail': 'Token revogado.', 'code': 'token_revoked'})
+        try:
+            usuario = self.get_user(token)
+        except Exception:
+            _tokens.remover(chave)
+            raise
+        entrada = {'usuario': usuario, 'token': token, 'jti': jti, 'expira_em': token['exp'], 'validado_em': agora}
+        _tokens.guardar(chave, entrada)
+        return entrada
@@ -0,0 +1,201 @@
+import re
+import unicodedata
+from django.db import connections, router, transaction
+from django.db.models import Case, IntegerField, Q, When
+from django.db.models.fields.json import KeyTextTransform
+from django.dispatch import receiver
+from rest_framework.exceptions import ValidationError
+from .consolidacao import contratos_alterados
+from .models import Contrato
+
+
+# Tabela FTS5 (tokenizer trigram) com uma linha por contrato (rowid = id do contrato),
+# criada pela migração 0007_contrato_busca. Existe apenas no SQLite.
+TABELA_BUSCA = 'contrato_busca'
+# Pesos do bm25 por coluna: numero_documento, telefone_tomador, cidade, estado
+PESOS_COLUNAS = (4.0, 2.0, 1.0, 1.0)
+LIMITE_BUSCA = 100
+LIMITE_BUSCA_MAXIMO = 1000
+TAMANHO_TRIGRAMA = 3
+LOTE_INDEXACAO = 500
+
+
+def normalizar_texto(texto):
+    """
+    Texto em minúsculas e sem acentos ('São Paulo' -> 'sao paulo').
+    """
+    decomposto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere)).lower()
+
+
+def somente_digitos(texto):
+    return re.sub(r'\D', '', str(texto or ''))
+
+
+def linha_indice(contrato_id, numero_documento, telefone_tomador, cidade, estado):
+    """
+    Valores indexados de um contrato: CPF e telefone apenas com dígitos (buscas por
+    '123.456' e '123456' são equivalentes), cidade e estado normalizados.
+    """
+    return (contrato_id, somente_digitos(numero_documento), somente_digitos(telefone_tomador),
+            normalizar_texto(cidade), normalizar_texto(estado))
+
+
+def limite_busca(params):
+    """
+    Quantidade máxima de contratos da busca (`limite`), entre 1 e LIMITE_BUSCA_MAXIMO.
+    """
+    try:
+        limite = int(params.get('limite', LIMITE_BUSCA))
+    except ValueError:
+        raise ValidationError({'limite': 'Deve ser um número inteiro.'})
+    return max(1, min(limite, LIMITE_BUSCA_MAXIMO))
+
+
+def termos_busca(q):
+    """
+    Separa a busca em termos normalizados: termos com dígitos são comparados apenas
+    pelos dígitos (CPF e telefone) e os demais sem acentos e sem maiúsculas.
+    """
+    termos = []
+    for termo in str(q).split():
+        termo = somente_digitos(termo) if any(caractere.isdigit() for caractere in termo) else normalizar_texto(termo)
+        if termo:
+            termos.append(termo)
+    return termos
+
+
+def disponivel(using):
+    return connections[using].vendor == 'sqlite'
+
+
+def _linhas(queryset):
+    return (
+        linha_indice(*linha) for linha in queryset.order_by().annotate(
+            cidade_busca=KeyTextTransform('cidade', 'endereco_tomador'),
+        ).values_list('id', 'numero_documento', 'telefone_tomador', 'cidade_busca', 'estado').iterator(
+            chunk_size=LOTE_INDEXACAO)
+    )
+
+
+def _inserir(cursor, linhas):
+    cursor.executemany(
+        f'INSERT INTO {TABELA_BUSCA} (rowid, numero_documento, telefone_tomador, cidade, estado) '
+        f'VALUES (%s, %s, %s, %s, %s)',
+        linhas,
+    )
+
+
+def indexar(contrato_ids):
+    """
+    Atualiza o índice de busca dos contratos informados: remove as linhas antigas e
+    insere as atuais (contratos removidos apenas saem do índice).
+    """
+    using = router.db_for_write(Contrato)
+    if not contrato_ids or not disponivel(using):
+        return
+    contrato_ids = sorted(contrato_ids)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        for inicio in range(0, len(contrato_ids), LOTE_INDEXACAO):
+            lote = contrato_ids[inicio:inicio + LOTE_INDEXACAO]
+            cursor.execute(
+                f"DELETE FROM {TABELA_BUSCA} WHERE rowid IN ({', '.join(['%s'] * len(lote))})", lote
+            )
+            _inserir(cursor, list(_linhas(Contrato.objects.using(using).filter(id__in=lote))))
+
+
+@receiver(contratos_alterados)
+def indexar_contratos_alterados(sender, contrato_ids, apos_commit=False, **kwargs):
+    # O índice é atualizado na mesma transação da escrita; a notificação repetida
+    # após o commit não precisa indexar de novo
+    if not apos_commit:
+        indexar(contrato_ids)
+
+
+def reconstruir(using=None):
+    """
+    Reconstrói todo o índice de busca a partir da tabela de contratos.
+    Retorna:
+        int: Quantidade de contratos indexados.
+    """
+    using = using or router.db_for_write(Contrato)
+    if not disponivel(using):
+        return 0
+    total = 0
+    lote = []
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABELA_BUSCA}')
+        for linha in _linhas(Contrato.objects.using(using).all()):
+            lote.append(linha)
+            if len(lote) == LOTE_INDEXACAO:
+                _inserir(cursor, lote)
+                total += len(lote)
+                lote = []
+        _inserir(cursor, lote)
+        total += len(lote)
+        cursor.execute(f"INSERT INTO {TABELA_BUSCA} ({TABELA_BUSCA}) VALUES ('optimize')")
+    return total
+
+
+def _ids_por_relevancia(queryset, termos, limite):
+    """
+    IDs dos contratos do queryset que contêm todos os termos, do mais relevante (bm25)
+    para o menos relevante. Termos com ao menos 3 caracteres são buscados por
+    substring em todas as colunas pelo índice trigram; termos menores (ex: 'SP') são
+    comparados com o estado.
+    """
+    longos = [termo for termo in termos if len(termo) >= TAMANHO_TRIGRAMA]
+    curtos = [termo for termo in termos if len(termo) < TAMANHO_TRIGRAMA]
+
+    condicoes, params = [], []
+    if longos:
+        condicoes.append(f'{TABELA_BUSCA} MATCH %s')
+        # Cada termo entre aspas é uma frase: caracteres especiais do FTS5 não são interpretados
+        params.append(' AND '.join('"{}"'.format(termo.replace('"', '""')) for termo in longos))
+    for termo in curtos:
+        condicoes.append('estado = %s')
+        params.append(termo)
+    if queryset.query.where:
+        sql_contratos, params_contratos = queryset.order_by().values('id').query.sql_with_params()
+        condicoes.append(f'rowid IN ({sql_contratos})')
+        params.extend(params_contratos)
+
+    ordem = f"bm25({TABELA_BUSCA}, {', '.join(map(str, PESOS_COLUNAS))}), rowid" if longos else 'rowid'
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {TABELA_BUSCA} WHERE {' AND '.join(condicoes)} ORDER BY {ordem} LIMIT %s",
+            params + [limite],
+        )
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+def buscar(queryset, q, limite=LIMITE_BUSCA):
+    """
+    Filtra o queryset de contratos pela busca `q` (CPF parcial, trecho do telefone,
+    cidade ou estado), ordenado por relevância e limitado a `limite` contratos.
+    Fora do SQLite (sem FTS5) a busca é feita com LIKE, ordenada por ID.
+    Parâmetros:
+        - queryset: QuerySet de Contrato já filtrado.
+        - q: Texto da busca, com um ou mais termos (todos precisam ser encontrados).
+        - limite: Quantidade máxima de contratos retornados.
+    Retorna:
+        QuerySet: Os contratos encontrados, na ordem de relevância.
+    """
+    termos = termos_busca(q)
+    if not termos:
+        return queryset.none()
+
+    if not disponivel(queryset.db):
+        for termo in termos:
+            queryset = queryset.filter(
+                Q(numero_documento__contains=termo) | Q(telefone_tomador__contains=termo)
+                | Q(endereco_tomador__cidade__icontains=termo) | Q(estado__iexact=termo)
+            )
+        return queryset.order_by('id')[:limite]
+
+    ids = _ids_por_relevancia(queryset, termos, limite)
+    if not ids:
+        return queryset.none()
+    ordem = Case(*[When(id=contrato_id, then=posicao) for posicao, contrato_id in enumerate(ids)],
+                 output_field=IntegerField())
+    return queryset.filter(id__in=ids).order_by(ordem)
@@ -0,0 +1,173 @@
+import hashlib
+import random
+import threading
+import uuid
+from functools import wraps
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from .consolidacao import contratos_alterados
+
+
+ALIAS_CACHE = 'respostas'
+CHAVE_GERACAO_LISTAS = 'geracao:listas'
+
+_metricas = {'acertos': 0, 'falhas': 0, 'remocoes': 0, 'invalidacoes': 0}
+_lock_metricas = threading.Lock()
+
+
+def _contar(metrica, quantidade=1):
+    with _lock_metricas:
+        _metricas[metrica] += quantidade
+
+
+def obter_metricas():
+    """
+    Retorna os contadores do cache de respostas deste processo.
+    """
+    with _lock_metricas:
+        metricas = dict(_metricas)
+    consultas = metricas['acertos'] + metricas['falhas']
+    metricas['taxa_de_acerto'] = round(metricas['acertos'] / consultas, 4) if consultas else 0
+    return metricas
+
+
+class LocMemCacheComMetricas(LocMemCache):
+    """
+    Cache em memória local (LRU com TTL) que contabiliza as entradas removidas por
+    falta de espaço (MAX_ENTRIES).
+    """
+    def _cull(self):
+        antes = len(self._cache)
+        super()._cull()
+        _contar('remocoes', antes - len(self._cache))
+
+
+class FileBasedCacheComMetricas(FileBasedCache):
+    """
+    Cache em arquivos (compartilhado entre os workers da mesma máquina) que
+    contabiliza as entradas removidas por falta de espaço (MAX_ENTRIES).
+    """
+    def _cull(self):
+        arquivos = self._list_cache_files()
+        if len(arquivos) < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            _contar('remocoes', len(arquivos))
+            return self.clear()
+        removidos = 0
+        for arquivo in random.sample(arquivos, int(len(arquivos) / self._cull_frequency)):
+            removidos += bool(self._delete(arquivo))
+        _contar('remocoes', removidos)
+
+
+def _cache():
+    return caches[ALIAS_CACHE]
+
+
+def _geracao(chave):
+    """
+    Retorna o token de geração atual de `chave`, criando um novo quando não existe.
+    Trocar (ou apagar) o token invalida todas as respostas que o usam na chave.
+    """
+    cache = _cache()
+    token = cache.get(chave)
+    if token is None:
+        token = uuid.uuid4().hex
+        if not cache.add(chave, token, timeout=None):
+            token = cache.get(chave, token)
+    return token
+
+
+def invalidar(contrato_ids=()):
+    """
+    Invalida as respostas afetadas pela escrita dos contratos informados: todas as
+    listagens e resumos, e apenas o detalhe dos contratos alterados.
+    """
+    cache = _cache()
+    cache.set(CHAVE_GERACAO_LISTAS, uuid.uuid4().hex, timeout=None)
+    cache.delete_many([f'geracao:contrato:{contrato_id}' for contrato_id in contrato_ids])
+    _contar('invalidacoes')
+
+
+@receiver(contratos_alterados)
+def invalidar_contratos_alterados(sender, contrato_ids, **kwargs):
+    invalidar(contrato_ids)
+
+
+def _chave_resposta(request, escopo, geracao):
+    """
+    Monta a chave da resposta a partir do escopo, do usuário e dos parâmetros de
+    consulta normalizados (ordenados), para que ?a=1&b=2 e ?b=2&a=1 compartilhem a entrada.
+    """
+    parametros = sorted(
+        (nome, valor) for nome in request.query_params for valor in request.query_params.getlist(nome)
+    )
+    identificacao = repr((request.path, getattr(request.user, 'pk', None), parametros,
+                          getattr(request, 'accepted_media_type', None)))
+    return f'resposta:{escopo}:{geracao}:{hashlib.sha256(identificacao.encode()).hexdigest()}'
+
+
+def _nao_modificado(request, etag):
+    # Comparação fraca: o CompressaoMiddleware transforma o ETag em W/"..." nas respostas comprimidas
+    etags = [valor.strip().removeprefix('W/') for valor in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+    return etag in etags or '*' in etags
+
+
+def cache_resposta(escopo, parametros_ignorados=('stream',)):
+    """
+    Decorator para actions de leitura do ContratoViewSet que guarda a resposta
+    renderizada no cache `respostas` e responde 304 quando o cliente envia um
+    If-None-Match com o ETag atual.
+    Parâmetros:
+        - escopo: 'lista' (listagens e resumo, invalidados por qualquer escrita) ou
+          'detalhe' (invalidado apenas pela escrita do próprio contrato).
+        - parametros_ignorados: Quando algum desses parâmetros está presente, a
+          resposta não é cacheada (ex: streaming).
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if any(parametro in request.query_params for parametro in parametros_ignorados):
+                return view_method(self, request, *args, **kwargs)
+
+            if escopo == 'detalhe':
+                geracao = _geracao(f"geracao:contrato:{kwargs.get('pk')}")
+            else:
+                geracao = _geracao(CHAVE_GERACAO_LISTAS)
+            chave = _chave_resposta(request, escopo, geracao)
+
+            guardada = _cache().get(chave)
+            if guardada is not None:
+                _contar('acertos')
+                conteudo, content_type, etag = guardada
+                if _nao_modificado(request, etag):
+                    resposta = HttpResponseNotModified()
+                else:
+                    resposta = HttpResponse(conteudo, content_type=content_type)
+                resposta['ETag'] = etag
+                resposta['X-Cache'] = 'HIT'
+                patch_vary_headers(resposta, ['Authorization', 'Accept'])
+                return resposta
+
+            _contar('falhas')
+            resposta = view_method(self, request, *args, **kwargs)
+            if resposta.status_code != 200:
+                return resposta
+
+            resposta = self.finalize_response(request, resposta, *args, **kwargs)
+            if hasattr(resposta, 'render'):
+                resposta.render()
+            etag = '"%s"' % hashlib.md5(resposta.content).hexdigest()
+            _cache().set(chave, (resposta.content, resposta['Content-Type'], etag))
+            resposta['ETag'] = etag
+            resposta['X-Cache'] = 'MISS'
+            if _nao_modificado(request, etag):
+                resposta = HttpResponseNotModified()
+                resposta['ETag'] = etag
+            return resposta
+        return wrapper
+    return decorator
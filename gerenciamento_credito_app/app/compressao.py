@@ -0,0 +1,178 @@
+import zlib
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from .perfilamento import medir
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele as respostas são comprimidas apenas com gzip
+    brotli = None
+
+
+# Configuração padrão; pode ser sobrescrita por settings.COMPRESSAO
+CONFIGURACAO_PADRAO = {
+    # Respostas menores que isso (em bytes) não são comprimidas: o ganho não compensa a CPU
+    'TAMANHO_MINIMO': 1024,
+    # 1 (mais rápido) a 9 (menor); acima de 6 o ganho de tamanho é pequeno para JSON
+    'NIVEL_GZIP': 6,
+    # 0 a 11; 4 comprime mais que o gzip 6 usando menos CPU
+    'QUALIDADE_BROTLI': 4,
+    # Nas respostas em streaming, bytes recebidos antes de enviar o que já foi comprimido
+    'TAMANHO_BLOCO': 64 * 1024,
+    # Prefixos dos Content-Types comprimidos
+    'TIPOS': ('application/json', 'application/x-ndjson', 'application/msgpack',
+              'application/vnd.apache.arrow.stream', 'text/'),
+}
+
+
+def configuracao():
+    return {**CONFIGURACAO_PADRAO, **getattr(settings, 'COMPRESSAO', {})}
+
+
+class CompressorGzip:
+    def __init__(self, config):
+        # wbits=31: formato gzip, com mtime zerado (mesmo conteúdo gera os mesmos bytes)
+        self._compressor = zlib.compressobj(config['NIVEL_GZIP'], zlib.DEFLATED, 31)
+
+    def comprimir(self, dados):
+        return self._compressor.compress(dados)
+
+    def descarregar(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finalizar(self):
+        return self._compressor.flush()
+
+
+class CompressorBrotli:
+    def __init__(self, config):
+        self._compressor = brotli.Compressor(quality=config['QUALIDADE_BROTLI'])
+
+    def comprimir(self, dados):
+        return self._compressor.process(dados)
+
+    def descarregar(self):
+        return self._compressor.flush()
+
+    def finalizar(self):
+        return self._compressor.finish()
+
+
+def compressores():
+    """
+    Codificações disponíveis, da preferida para a menos preferida.
+    """
+    if brotli is not None:
+        return {'br': CompressorBrotli, 'gzip': CompressorGzip}
+    return {'gzip': CompressorGzip}
+
+
+def escolher_codificacao(accept_encoding):
+    """
+    Escolhe a codificação pelo cabeçalho Accept-Encoding (com pesos `q`): a de maior
+    peso entre as disponíveis e, no empate, a preferida. None quando nenhuma é aceita.
+    """
+    pesos = {}
+    for item in accept_encoding.split(','):
+        nome, _, parametros = item.partition(';')
+        peso = 1.0
+        for parametro in parametros.split(';'):
+            chave, _, valor = parametro.strip().partition('=')
+            if chave.lower() == 'q':
+                try:
+                    peso = float(valor)
+                except ValueError:
+                    peso = 0.0
+        if nome.strip():
+            pesos[nome.strip().lower()] = peso
+
+    melhor, melhor_peso = None, 0.0
+    for nome in compressores():
+        peso = pesos.get(nome, pesos.get('*', 0.0))
+        if peso > melhor_peso:
+            melhor, melhor_peso = nome, peso
+    return melhor
+
+
+def _comprimir_partes(partes, compressor, tamanho_bloco):
+    """
+    Comprime as partes de uma resposta em streaming. O que já foi comprimido é enviado
+    a cada `tamanho_bloco` bytes recebidos (flush), e não a cada parte: gerar um bloco
+    por contrato aumentaria muito o tamanho e o custo da compressão.
+    """
+    pendente = 0
+    for parte in partes:
+        saida = compressor.comprimir(parte)
+        pendente += len(parte)
+        if pendente >= tamanho_bloco:
+            saida += compressor.descarregar()
+            pendente = 0
+        if saida:
+            yield saida
+    yield compressor.finalizar()
+
+
+async def _acomprimir_partes(partes, compressor, tamanho_bloco):
+    pendente = 0
+    async for parte in partes:
+        saida = compressor.comprimir(parte)
+        pendente += len(parte)
+        if pendente >= tamanho_bloco:
+            saida += compressor.descarregar()
+            pendente = 0
+        if saida:
+            yield saida
+    yield compressor.finalizar()
+
+
+class CompressaoMiddleware(MiddlewareMixin):
+    """
+    Comprime as respostas com brotli (quando instalado) ou gzip, conforme o
+    Accept-Encoding da requisição, inclusive as respostas em streaming (listagem com
+    `stream`, exportações e resultados de tarefas), que são comprimidas em blocos sem
+    perder o envio incremental.
+    Respostas menores que TAMANHO_MINIMO, sem corpo, já codificadas ou de tipos fora
+    de TIPOS são enviadas sem compressão. Deve ficar no início do MIDDLEWARE (logo
+    após o PerfilamentoMiddleware, que passa a medir o tamanho comprimido).
+    Funciona com views síncronas e assíncronas (MiddlewareMixin).
+    Observação: as credenciais da API vão no cabeçalho Authorization e não no corpo,
+    então a compressão não expõe segredos a ataques do tipo BREACH.
+    """
+    def process_response(self, request, response):
+        config = configuracao()
+        if response.status_code in (204, 304) or response.has_header('Content-Encoding'):
+            return response
+        if not response.get('Content-Type', '').startswith(config['TIPOS']):
+            return response
+        if not response.streaming and len(response.content) < config['TAMANHO_MINIMO']:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacao = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacao is None:
+            return response
+
+        compressor = compressores()[codificacao](config)
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acomprimir_partes(
+                    response.streaming_content, compressor, config['TAMANHO_BLOCO'])
+            else:
+                response.streaming_content = _comprimir_partes(
+                    response.streaming_content, compressor, config['TAMANHO_BLOCO'])
+            del response.headers['Content-Length']
+        else:
+            with medir('compressao'):
+                comprimido = compressor.comprimir(response.content) + compressor.finalizar()
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+
+        # O conteúdo muda com a codificação: o ETag forte passa a ser fraco (como no GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codificacao
+        return response
@@ -0,0 +1,187 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import transaction
+from django.dispatch import Signal
+from django.db.models import Count, Sum, Value
+from django.db.models.functions import Coalesce
+from .agregacoes import total_parcelas_subquery
+from .models import Contrato, ResumoConsolidado
+
+
+CAMPOS_CHAVE = ('estado', 'data_emissao', 'numero_documento')
+
+# Pendências de atualização quando a consolidação está adiada (ver adiar_consolidacao)
+_pendentes = ContextVar('consolidacao_pendentes', default=None)
+
+# Enviado após cada escrita de contratos/parcelas, com os IDs dos contratos afetados
+contratos_alterados = Signal()
+
+
+def chave_contrato(contrato):
+    """
+    Retorna a chave (estado, data_emissao, numero_documento) de um contrato.
+    """
+    estado = (contrato.endereco_tomador or {}).get('estado') or ''
+    return (str(estado), contrato.data_emissao, contrato.numero_documento)
+
+
+def _contratos_por_chave(queryset):
+    """
+    Agrupa os contratos pela chave da consolidação, calculando os totais em uma consulta.
+    """
+    return (
+        queryset.order_by()
+        .annotate(
+            estado_chave=Coalesce('estado', Value('')),
+            total_parcelas=total_parcelas_subquery(),
+        )
+        .values('estado_chave', 'data_emissao', 'numero_documento')
+        .annotate(
+            valor_total_desembolsado=Sum('valor_desembolsado'),
+            valor_total_parcelas=Sum('total_parcelas'),
+            soma_taxas=Sum('taxa_contrato'),
+            numero_contratos=Count('id'),
+        )
+    )
+
+
+def _linha_consolidada(linha):
+    return ResumoConsolidado(
+        estado=linha['estado_chave'],
+        data_emissao=linha['data_emissao'],
+        numero_documento=linha['numero_documento'],
+        valor_total_desembolsado=linha['valor_total_desembolsado'] or 0,
+        valor_total_parcelas=linha['valor_total_parcelas'] or 0,
+        soma_taxas=linha['soma_taxas'] or 0,
+        numero_contratos=linha['numero_contratos'],
+    )
+
+
+def atualizar_chaves(chaves=(), contrato_ids=()):
+    """
+    Recalcula as linhas consolidadas das chaves informadas.
+    Apenas os contratos das chaves afetadas são lidos (filtrados por CPF), então o
+    custo depende do tamanho da chave e não do tamanho da tabela.
+    Parâmetros:
+        - chaves: Chaves (estado, data_emissao, numero_documento) que foram alteradas.
+        - contrato_ids: IDs de contratos alterados, cujas chaves são obtidas do banco.
+    """
+    chaves = set(chaves)
+    if contrato_ids:
+        chaves.update(
+            chave_contrato(contrato) for contrato in
+            Contrato.objects.filter(id__in=contrato_ids).only(*CAMPOS_CHAVE[1:], 'endereco_tomador')
+        )
+    if not chaves:
+        return
+
+    documentos = {numero_documento for _, _, numero_documento in chaves}
+    linhas = {
+        (linha['estado_chave'], linha['data_emissao'], linha['numero_documento']): linha
+        for linha in _contratos_por_chave(Contrato.objects.filter(numero_documento__in=documentos))
+    }
+
+    # As linhas antigas são localizadas pelos CPFs e comparadas com as chaves aqui, em vez
+    # de um OR com uma condição por chave: montar esse filtro custa mais que a consulta
+    # e, com mais de 1000 chaves, o SQLite recusa a expressão
+    chaves_texto = {(estado, str(data_emissao), numero_documento) for estado, data_emissao, numero_documento in chaves}
+    antigas = [
+        linha_id for linha_id, estado, data_emissao, numero_documento in
+        ResumoConsolidado.objects.filter(numero_documento__in=documentos)
+        .values_list('id', 'estado', 'data_emissao', 'numero_documento')
+        if (estado, str(data_emissao), numero_documento) in chaves_texto
+    ]
+
+    with transaction.atomic():
+        ResumoConsolidado.objects.filter(id__in=antigas).delete()
+        ResumoConsolidado.objects.bulk_create(
+            [_linha_consolidada(linhas[chave]) for chave in chaves if chave in linhas]
+        )
+
+
+def aplicar_alteracoes(chaves=(), contrato_ids=()):
+    """
+    Recalcula as chaves consolidadas afetadas e notifica (contratos_alterados) que os
+    contratos informados mudaram. A notificação é repetida após o commit (com
+    apos_commit=True), para que leituras feitas durante a transação não deixem dados
+    antigos em cache.
+    """
+    contrato_ids = set(contrato_ids)
+    atualizar_chaves(chaves, contrato_ids)
+    contratos_alterados.send(sender=Contrato, contrato_ids=contrato_ids)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(
+            lambda: contratos_alterados.send(sender=Contrato, contrato_ids=contrato_ids, apos_commit=True)
+        )
+
+
+def registrar_alteracao(chave=None, contrato_id=None):
+    """
+    Registra que uma chave (ou o contrato informado) precisa ser recalculada.
+    Dentro de adiar_consolidacao o recálculo é acumulado; fora dele é imediato.
+    """
+    pendentes = _pendentes.get()
+    if pendentes is None:
+        aplicar_alteracoes([chave] if chave else (), [contrato_id] if contrato_id else ())
+        return
+    if chave:
+        pendentes['chaves'].add(chave)
+    if contrato_id:
+        pendentes['contrato_ids'].add(contrato_id)
+
+
+@contextmanager
+def adiar_consolidacao():
+    """
+    Acumula as alterações feitas dentro do bloco e recalcula cada chave afetada
+    uma única vez ao final, em vez de uma vez por contrato/parcela salvo.
+    Blocos aninhados são consolidados pelo bloco mais externo.
+    """
+    if _pendentes.get() is not None:
+        yield
+        return
+
+    pendentes = {'chaves': set(), 'contrato_ids': set()}
+    token = _pendentes.set(pendentes)
+    try:
+        yield
+    finally:
+        _pendentes.reset(token)
+    aplicar_alteracoes(pendentes['chaves'], pendentes['contrato_ids'])
+
+
+def reconstruir():
+    """
+    Reconstrói toda a tabela consolidada a partir de Contrato e Parcela.
+    Retorna:
+        int: Quantidade de linhas consolidadas.
+    """
+    linhas = [_linha_consolidada(linha) for linha in _contratos_por_chave(Contrato.objects.all())]
+    with transaction.atomic():
+        ResumoConsolidado.objects.all().delete()
+        ResumoConsolidado.objects.bulk_create(linhas, batch_size=1000)
+    return len(linhas)
+
+
+def verificar():
+    """
+    Compara a tabela consolidada com os valores calculados a partir dos contratos.
+    Retorna:
+        list: Lista de divergências (chave, esperado, atual), vazia quando não há drift.
+    """
+    campos = ('valor_total_desembolsado', 'valor_total_parcelas', 'soma_taxas', 'numero_contratos')
+    esperado = {
+        (linha['estado_chave'], linha['data_emissao'], linha['numero_documento']):
+            tuple(linha[campo] or 0 for campo in campos)
+        for linha in _contratos_por_chave(Contrato.objects.all())
+    }
+    atual = {
+        (linha['estado'], linha['data_emissao'], linha['numero_documento']):
+            tuple(linha[campo] for campo in campos)
+        for linha in ResumoConsolidado.objects.values(*CAMPOS_CHAVE, *campos)
+    }
+    return [
+        (chave, esperado.get(chave), atual.get(chave))
+        for chave in sorted(set(esperado) | set(atual), key=str)
+        if esperado.get(chave) != atual.get(chave)
+    ]
@@ -0,0 +1,71 @@
+from django.db.models import Prefetch
+from .models import Parcela
+
+
+# Colunas de Parcela que o ParcelaSerializer realmente usa (mais a FK para o prefetch).
+CAMPOS_PARCELA = ['id', 'contrato_id', 'numero_parcela', 'valor_parcela', 'data_vencimento']
+
+
+def modelo_parcela(modelo_contrato):
+    """
+    Modelo das parcelas (relação `parcelas`) de Contrato, ContratoArquivado ou ContratoCompleto.
+    """
+    return modelo_contrato._meta.get_field('parcelas').related_model
+
+
+def parcelas_queryset(modelo=Parcela):
+    """
+    Retorna o queryset de parcelas usado no prefetch dos contratos.
+    As parcelas vêm ordenadas pelo número da parcela e limitadas às colunas
+    que são serializadas, evitando trazer dados desnecessários do banco.
+    """
+    return modelo.objects.only(*CAMPOS_PARCELA).order_by('contrato_id', 'numero_parcela', 'id')
+
+
+def com_parcelas(queryset):
+    """
+    Anexa ao queryset de contratos o prefetch das parcelas.
+    Independente da quantidade de contratos, as parcelas são buscadas em uma
+    única consulta (WHERE contrato_id IN (...)), eliminando o problema de N+1
+    consultas causado pelo ParcelaSerializer aninhado.
+    Parâmetros:
+        - queryset: QuerySet de Contrato.
+    Retorna:
+        QuerySet: O mesmo queryset com o prefetch das parcelas configurado.
+    """
+    return queryset.prefetch_related(Prefetch('parcelas', queryset=parcelas_queryset(modelo_parcela(queryset.model))))
+
+
+def filtrar_contratos(queryset, params, filtros=('id', 'cpf', 'data_emissao', 'estado')):
+    """
+    Aplica ao queryset os filtros de consulta aceitos pela API.
+    Filtros disponíveis:
+    - id: Filtra contratos pelo ID.
+    - cpf: Filtra contratos pelo número do documento (CPF).
+    - data_emissao: Filtra contratos pela data de emissão.
+    - estado: Filtra contratos pelo estado do endereço do tomador.
+    Parâmetros:
+        - queryset: QuerySet de Contrato.
+        - params: Dicionário com os parâmetros da requisição (ex: request.query_params).
+        - filtros: Filtros que devem ser considerados.
+    Retorna:
+        QuerySet: O queryset filtrado de acordo com os parâmetros fornecidos.
+    """
+    contrato_id = params.get('id') if 'id' in filtros else None
+    if contrato_id:
+        queryset = queryset.filter(id=contrato_id)
+
+    cpf = params.get('cpf') if 'cpf' in filtros else None
+    if cpf:
+        queryset = queryset.filter(numero_documento=cpf)
+
+    data_emissao = params.get('data_emissao') if 'data_emissao' in filtros else None
+    if data_emissao:
+        queryset = queryset.filter(data_emissao=data_emissao)
+
+    estado = params.get('estado') if 'estado' in filtros else None
+    if estado:
+        # Coluna gerada a partir de endereco_tomador, indexada junto com data_emissao
+        queryset = queryset.filter(estado=estado)
+
+    return queryset
@@ -0,0 +1,27 @@
+import tempfile
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class ExecutorTestes(DiscoverRunner):
+    """
+    Executor dos testes (settings.TEST_RUNNER). O cache de respostas, os contadores do
+    rate limiting e os resultados das tarefas gravam em BASE_DIR por padrão; durante
+    os testes, todos os módulos usam um diretório temporário.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._diretorio = tempfile.TemporaryDirectory()
+        respostas = {**settings.CACHES['respostas'], 'LOCATION': self._diretorio.name}
+        self._configuracao = override_settings(
+            CACHES={**settings.CACHES, 'respostas': respostas},
+            LIMITE_TAXA={**settings.LIMITE_TAXA, 'OPCOES': {'caminho': f'{self._diretorio.name}/limite_taxa.sqlite3'}},
+            TAREFAS_DIRETORIO=self._diretorio.name,
+        )
+        self._configuracao.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._configuracao.disable()
+        self._diretorio.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,163 @@
+import csv
+import io
+import pyarrow
+import pyarrow.ipc
+from django.db import connections, router
+from django.db.models import CharField, F, Func, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+from .consultas import filtrar_contratos
+from .models import Contrato, Parcela
+
+
+FORMATOS_EXPORTACAO = {
+    'csv': 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+EXTENSOES = {'csv': 'csv', 'arrow': 'arrows'}
+
+CHUNK_SIZE_EXPORTACAO = 10000
+CHUNK_SIZE_EXPORTACAO_MAXIMO = 100000
+
+# Colunas de cada tabela exportada: (nome, tipo). Os tipos são usados no esquema Arrow.
+COLUNAS = {
+    'contratos': [
+        ('id', 'int64'),
+        ('data_emissao', 'date'),
+        ('data_nascimento_tomador', 'date'),
+        ('valor_desembolsado', 'decimal'),
+        ('numero_documento', 'string'),
+        ('estado', 'string'),
+        ('cidade', 'string'),
+        ('pais', 'string'),
+        ('telefone_tomador', 'string'),
+        ('taxa_contrato', 'decimal'),
+    ],
+    'parcelas': [
+        ('id', 'int64'),
+        ('contrato_id', 'int64'),
+        ('numero_parcela', 'int64'),
+        ('valor_parcela', 'decimal'),
+        ('data_vencimento', 'date'),
+    ],
+}
+
+
+def _colunas_texto(tabela):
+    """
+    Expressões que leem as colunas de data e decimais já como texto no SQLite
+    (datas ISO e decimais com duas casas), evitando os conversores do ORM, que
+    dominam o tempo de exportação em CSV.
+    """
+    expressoes = {}
+    for nome, tipo in COLUNAS[tabela]:
+        if tipo == 'date':
+            expressoes[f'{nome}_texto'] = Cast(nome, CharField())
+        elif tipo == 'decimal':
+            # O formato vai como parâmetro: um '%' no SQL quebra o log de consultas (DEBUG)
+            expressoes[f'{nome}_texto'] = Func(Value('%.2f'), F(nome), function='printf', output_field=CharField())
+    return expressoes
+
+
+def linhas_exportacao(tabela, params, chunk_size=CHUNK_SIZE_EXPORTACAO, texto=False):
+    """
+    Retorna um iterador de tuplas com as colunas de COLUNAS[tabela], lidas do banco
+    com um cursor (.iterator) em lotes de `chunk_size` linhas, sem instanciar modelos.
+    Os filtros são os mesmos da listagem (id, cpf, data_emissao, estado); na tabela de
+    parcelas eles se aplicam ao contrato de cada parcela.
+    Com `texto` (usado pelo CSV), no SQLite as datas e os decimais já vêm formatados
+    como texto pelo banco.
+    """
+    contratos = filtrar_contratos(Contrato.objects.all(), params)
+    colunas = [nome for nome, _ in COLUNAS[tabela]]
+
+    if tabela == 'contratos':
+        queryset = contratos.annotate(
+            cidade=KeyTextTransform('cidade', 'endereco_tomador'),
+            pais=KeyTextTransform('pais', 'endereco_tomador'),
+        )
+    else:
+        queryset = Parcela.objects.all()
+        if contratos.query.where:
+            queryset = queryset.filter(contrato__in=contratos.values('id'))
+
+    # A conexão é fixada agora: a verificação do banco vale para a conexão que lê as linhas
+    queryset = queryset.using(router.db_for_read(queryset.model))
+    if texto and connections[queryset.db].vendor == 'sqlite':
+        expressoes = _colunas_texto(tabela)
+        queryset = queryset.annotate(**expressoes)
+        colunas = [f'{nome}_texto' if f'{nome}_texto' in expressoes else nome for nome in colunas]
+
+    return queryset.order_by('id').values_list(*colunas).iterator(chunk_size=chunk_size)
+
+
+def _lotes(linhas, chunk_size):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) == chunk_size:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def exportar_csv(tabela, linhas, chunk_size=CHUNK_SIZE_EXPORTACAO):
+    """
+    Gera o CSV (com cabeçalho) em partes de `chunk_size` linhas.
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow([nome for nome, _ in COLUNAS[tabela]])
+    for lote in _lotes(linhas, chunk_size):
+        escritor.writerows(lote)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    conteudo = buffer.getvalue()
+    if conteudo:
+        yield conteudo.encode()
+
+
+def _esquema_arrow(tabela):
+    tipos = {
+        'int64': pyarrow.int64(),
+        'date': pyarrow.date32(),
+        'decimal': pyarrow.decimal128(20, 2),
+        'string': pyarrow.string(),
+    }
+    return pyarrow.schema([(nome, tipos[tipo]) for nome, tipo in COLUNAS[tabela]])
+
+
+def exportar_arrow(tabela, linhas, chunk_size=CHUNK_SIZE_EXPORTACAO):
+    """
+    Gera um stream Arrow IPC com um record batch colunar a cada `chunk_size` linhas.
+    """
+    esquema = _esquema_arrow(tabela)
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, esquema) as escritor:
+        for lote in _lotes(linhas, chunk_size):
+            colunas = list(zip(*lote))
+            escritor.write_batch(pyarrow.record_batch(
+                [pyarrow.array(coluna, type=campo.type) for coluna, campo in zip(colunas, esquema)],
+                schema=esquema,
+            ))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+def exportar(tabela, formato, params, chunk_size=CHUNK_SIZE_EXPORTACAO):
+    """
+    Retorna o gerador de bytes da exportação colunar, com uso de memória constante.
+    Parâmetros:
+        - tabela: 'contratos' ou 'parcelas'.
+        - formato: 'csv' ou 'arrow' (ver FORMATOS_EXPORTACAO).
+        - params: Filtros da listagem (id, cpf, data_emissao, estado).
+        - chunk_size: Linhas lidas do banco e escritas por vez.
+    """
+    linhas = linhas_exportacao(tabela, params, chunk_size, texto=formato == 'csv')
+    if formato == 'csv':
+        return exportar_csv(tabela, linhas, chunk_size)
+    return exportar_arrow(tabela, linhas, chunk_size)
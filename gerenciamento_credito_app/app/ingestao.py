@@ -0,0 +1,68 @@
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ValidationError
+from .consolidacao import aplicar_alteracoes
+from .models import Contrato, Parcela
+
+
+TAMANHO_LOTE_PADRAO = 500
+MAXIMO_ITENS = 50000
+
+
+def validar_em_lote(serializer, itens):
+    """
+    Valida cada item com a mesma instância do serializer, sem interromper no primeiro erro.
+    Reutilizar o serializer evita reconstruir os campos para cada contrato.
+    Parâmetros:
+        - serializer: Instância de ContratoSerializer (sem dados).
+        - itens: Lista de dicionários recebidos na requisição.
+    Retorna:
+        tuple: (validos, erros), onde validos é uma lista de (indice, dados validados) e
+        erros é uma lista de (indice, detalhes do erro).
+    """
+    validos = []
+    erros = []
+    for indice, item in enumerate(itens):
+        if not isinstance(item, dict):
+            erros.append((indice, {'non_field_errors': ['Esperado um objeto de contrato.']}))
+            continue
+        try:
+            validos.append((indice, serializer.run_validation(item)))
+        except ValidationError as exc:
+            erros.append((indice, exc.detail))
+    return validos, erros
+
+
+def criar_em_lote(validos, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """
+    Grava os contratos validados com bulk_create, em transações de `tamanho_lote` contratos.
+    Cada lote executa um INSERT para os contratos e um para as parcelas. Se um lote
+    falhar no banco, apenas os contratos daquele lote são reportados como erro.
+    Parâmetros:
+        - validos: Lista de (indice, dados validados) retornada por validar_em_lote.
+        - tamanho_lote: Quantidade de contratos por transação.
+    Retorna:
+        tuple: (criados, erros), onde criados é uma lista de (indice, id do contrato) e
+        erros é uma lista de (indice, detalhes do erro).
+    """
+    criados = []
+    erros = []
+    for inicio in range(0, len(validos), tamanho_lote):
+        lote = validos[inicio:inicio + tamanho_lote]
+        try:
+            with transaction.atomic():
+                contratos = Contrato.objects.bulk_create([
+                    Contrato(**{campo: valor for campo, valor in dados.items() if campo != 'parcelas'})
+                    for _, dados in lote
+                ])
+                Parcela.objects.bulk_create([
+                    Parcela(contrato=contrato, **{campo: valor for campo, valor in parcela.items() if campo != 'id'})
+                    for contrato, (_, dados) in zip(contratos, lote)
+                    for parcela in dados.get('parcelas', [])
+                ], batch_size=tamanho_lote * 10)
+                # bulk_create não dispara signals: a tabela consolidada e o cache são atualizados aqui
+                aplicar_alteracoes(contrato_ids=[contrato.id for contrato in contratos])
+        except DatabaseError as exc:
+            erros.extend((indice, {'non_field_errors': [f'Erro ao gravar o lote: {exc}']}) for indice, _ in lote)
+            continue
+        criados.extend((indice, contrato.id) for contrato, (indice, _) in zip(contratos, lote))
+    return criados, erros
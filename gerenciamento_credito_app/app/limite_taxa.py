@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# Configuração padrão; pode ser sobrescrita por settings.LIMITE_TAXA
+CONFIGURACAO_PADRAO = {
+    'ARMAZENAMENTO': 'gerenciamento_credito_app.app.limite_taxa.ArmazenamentoSQLite',
+    'OPCOES': {'caminho': 'limite_taxa.sqlite3'},
+}
+
+
+class ArmazenamentoSQLite:
+    """
+    Contadores do rate limiting em um arquivo SQLite próprio (separado do banco da
+    aplicação), compartilhado por todos os processos e threads da mesma máquina.
+    Cada contador é incrementado com um único UPSERT atômico; as janelas expiradas
+    são removidas quando uma nova janela é aberta.
+    """
+    def __init__(self, caminho):
+        self.caminho = str(caminho)
+        self._local = threading.local()
+
+    def _conexao(self):
+        # Uma conexão por thread, reaberta após um fork (ex: workers do gunicorn com --preload)
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            # Contadores são descartáveis: dispensam o fsync a cada escrita
+            conexao.execute('PRAGMA synchronous=OFF')
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS limite_taxa ('
+                'chave TEXT NOT NULL, janela INTEGER NOT NULL, contador INTEGER NOT NULL, '
+                'expira_em REAL NOT NULL, PRIMARY KEY (chave, janela)) WITHOUT ROWID'
+            )
+            conexao.execute('CREATE INDEX IF NOT EXISTS limite_taxa_expira_em ON limite_taxa (expira_em)')
+            self._local.conexao, self._local.pid = conexao, os.getpid()
+        return conexao
+
+    def registrar(self, chave, janela, expira_em, agora):
+        """
+        Incrementa o contador da janela atual de `chave`, que expira em `expira_em`
+        (timestamp). `agora` é o horário da requisição.
+        Retorna:
+            tuple: (contador da janela atual, contador da janela anterior).
+        """
+        conexao = self._conexao()
+        atual = conexao.execute(
+            'INSERT INTO limite_taxa (chave, janela, contador, expira_em) VALUES (?, ?, 1, ?) '
+            'ON CONFLICT (chave, janela) DO UPDATE SET contador = contador + 1 RETURNING contador',
+            (chave, janela, expira_em),
+        ).fetchone()[0]
+        anterior = conexao.execute(
+            'SELECT contador FROM limite_taxa WHERE chave = ? AND janela = ?', (chave, janela - 1)
+        ).fetchone()
+        if atual == 1:
+            conexao.execute('DELETE FROM limite_taxa WHERE expira_em < ?', (agora,))
+        return atual, anterior[0] if anterior else 0
+
+    def desfazer(self, chave, janela):
+        self._conexao().execute(
+            'UPDATE limite_taxa SET contador = contador - 1 WHERE chave = ? AND janela = ?', (chave, janela)
+        )
+
+    def limpar(self):
+        self._conexao().execute('DELETE FROM limite_taxa')
+
+
+class ArmazenamentoCache:
+    """
+    Contadores do rate limiting em um cache do Django (settings.CACHES), usando as
+    operações atômicas add/incr. Com um cache compartilhado (ex: Redis ou Memcached)
+    os limites valem para todos os servidores; com o LocMemCache, apenas por processo.
+    limpar() apaga todo o cache, então o ideal é usar um alias dedicado.
+    """
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def registrar(self, chave, janela, expira_em, agora):
+        cache = caches[self.alias]
+        chave_atual = f'{chave}:{janela}'
+        timeout = max(1, int(expira_em - agora))
+        cache.add(chave_atual, 0, timeout=timeout)
+        try:
+            atual = cache.incr(chave_atual)
+        except ValueError:  # expirou entre o add e o incr
+            cache.set(chave_atual, 1, timeout=timeout)
+            atual = 1
+        return atual, cache.get(f'{chave}:{janela - 1}', 0)
+
+    def desfazer(self, chave, janela):
+        try:
+            caches[self.alias].decr(f'{chave}:{janela}')
+        except ValueError:
+            pass
+
+    def limpar(self):
+        caches[self.alias].clear()
+
+
+def configuracao():
+    return {**CONFIGURACAO_PADRAO, **getattr(settings, 'LIMITE_TAXA', {})}
+
+
+@lru_cache(maxsize=None)
+def armazenamento():
+    """
+    Retorna o armazenamento de contadores configurado em settings.LIMITE_TAXA.
+    """
+    config = configuracao()
+    return import_string(config['ARMAZENAMENTO'])(**config['OPCOES'])
+
+
+@receiver(setting_changed)
+def _recarregar_configuracao(setting, **kwargs):
+    if setting == 'LIMITE_TAXA':
+        armazenamento.cache_clear()
+
+
+class LimiteTaxaThrottle(SimpleRateThrottle):
+    """
+    Rate limiting por janela deslizante, com os contadores em um armazenamento
+    compartilhado entre os processos (ver armazenamento()).
+    O número de requisições na última janela é estimado a partir dos contadores da
+    janela fixa atual e da anterior, ponderando a anterior pela fração dela que ainda
+    está dentro da janela deslizante: um incremento e uma leitura por requisição,
+    ao invés da lista de horários do SimpleRateThrottle.
+    O escopo (e a taxa em DEFAULT_THROTTLE_RATES) é o `throttle_scope` da view ou
+    da action (ex: 'bulk', 'resumo'), que têm orçamentos próprios; nas demais views é
+    'user' para usuários autenticados e 'anon' para os demais.
+    Requisições recusadas não são contabilizadas.
+    """
+    cache_format = 'limite:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # A taxa depende do escopo da view, definido em allow_request
+        pass
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            self.scope = 'user' if request.user and request.user.is_authenticated else 'anon'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        self.now = self.timer()
+        janela, decorrido = divmod(self.now, self.duration)
+        self.janela = int(janela)
+        self.peso_anterior = 1 - decorrido / self.duration
+
+        atual, anterior = armazenamento().registrar(
+            self.key, self.janela, (self.janela + 2) * self.duration, self.now
+        )
+        self.estimativa = anterior * self.peso_anterior + atual
+        if self.estimativa <= self.num_requests:
+            return True
+
+        armazenamento().desfazer(self.key, self.janela)
+        self.anterior = anterior
+        return False
+
+    def wait(self):
+        """
+        Estimativa do tempo até uma nova requisição ser aceita: a contribuição da
+        janela anterior diminui com o tempo; sem requisições na janela anterior,
+        espera o fim da janela atual.
+        """
+        fim_janela = (self.janela + 1) * self.duration - self.now
+        if not self.anterior:
+            return fim_janela
+        excesso = self.estimativa - self.num_requests
+        return min(excesso / self.anterior * self.duration, fim_janela)
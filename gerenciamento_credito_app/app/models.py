@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.db import models
+from django.db.models.fields.json import KeyTextTransform
 
 
-class Contrato(models.Model):
+class DadosContrato(models.Model):
+    """
+    Campos comuns aos contratos ativos (Contrato), arquivados (ContratoArquivado) e à
+    visão com os dois (ContratoCompleto).
+    """
     id = models.AutoField(primary_key=True)
     data_emissao = models.DateField()
     data_nascimento_tomador = models.DateField()
@@ -10,15 +16,183 @@ class Contrato(models.Model):
     endereco_tomador = models.JSONField()  # País, Estado, Cidade
     telefone_tomador = models.CharField(max_length=15)  # Número de telefone
     taxa_contrato = models.DecimalField(max_digits=5, decimal_places=2)  # Taxa do contrato
+    # Estado extraído de endereco_tomador pelo próprio banco, para ser filtrado por índice
+    estado = models.GeneratedField(
+        expression=KeyTextTransform('estado', 'endereco_tomador'),
+        output_field=models.CharField(max_length=50, null=True),
+        db_persist=True,
+    )
+
+    class Meta:
+        abstract = True
+
+
+class Contrato(DadosContrato):
+    class Meta:
+        indexes = [
+            models.Index(fields=['numero_documento', 'data_emissao'], name='contrato_cpf_data_idx'),
+            models.Index(fields=['estado', 'data_emissao'], name='contrato_estado_data_idx'),
+            models.Index(fields=['data_emissao'], name='contrato_data_emissao_idx'),
+        ]
 
     def __str__(self):
         return f"Contrato {self.id}"
 
-class Parcela(models.Model):
-    contrato = models.ForeignKey(Contrato, related_name="parcelas", on_delete=models.CASCADE)
+class DadosParcela(models.Model):
     numero_parcela = models.IntegerField()
     valor_parcela = models.DecimalField(max_digits=10, decimal_places=2)
     data_vencimento = models.DateField()
 
+    class Meta:
+        abstract = True
+
+
+class Parcela(DadosParcela):
+    contrato = models.ForeignKey(Contrato, related_name="parcelas", on_delete=models.CASCADE)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['contrato', 'numero_parcela'], name='parcela_contrato_numero_idx'),
+            # Índice de cobertura da análise da carteira (somas por data de vencimento)
+            models.Index(fields=['data_vencimento', 'valor_parcela'], name='parcela_vencimento_valor_idx'),
+        ]
+
+    def __str__(self):
+        return f"Parcela {self.numero_parcela} do Contrato {self.contrato.id}"
+
+
+class ContratoArquivado(DadosContrato):
+    """
+    Contratos quitados movidos para fora das tabelas ativas (ver app/arquivamento.py),
+    com os mesmos IDs. Só são lidos com `include_archived=true` e podem ser restaurados.
+    """
+    class Meta:
+        indexes = [
+            models.Index(fields=['numero_documento', 'data_emissao'], name='contrato_arq_cpf_data_idx'),
+            models.Index(fields=['estado', 'data_emissao'], name='contrato_arq_estado_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"Contrato arquivado {self.id}"
+
+
+class ParcelaArquivada(DadosParcela):
+    contrato = models.ForeignKey(ContratoArquivado, related_name="parcelas", on_delete=models.CASCADE)
+
+    def __str__(self):
+        return f"Parcela {self.numero_parcela} do Contrato arquivado {self.contrato_id}"
+
+
+class ContratoCompleto(DadosContrato):
+    """
+    Visão (VIEW com UNION ALL, criada na migração 0009) dos contratos ativos e
+    arquivados, usada nas leituras com `include_archived=true`. Somente leitura.
+    """
+    class Meta:
+        managed = False
+        db_table = 'contrato_completo'
+
+
+class ParcelaCompleta(DadosParcela):
+    contrato = models.ForeignKey(ContratoCompleto, related_name="parcelas", on_delete=models.DO_NOTHING,
+                                 db_constraint=False)
+
+    class Meta:
+        managed = False
+        db_table = 'parcela_completa'
+
+class ResumoConsolidado(models.Model):
+    """
+    Tabela de totais pré-agregados dos contratos, usada pelo endpoint de resumo.
+    Cada linha consolida os contratos de uma mesma combinação de estado, data de
+    emissão e CPF. É mantida de forma incremental a cada escrita de contratos e
+    parcelas (ver app/consolidacao.py) e pode ser reconstruída com o comando
+    `python manage.py reconstruir_resumo`.
+    """
+    estado = models.CharField(max_length=50, blank=True, default='')
+    data_emissao = models.DateField()
+    numero_documento = models.CharField(max_length=14)
+    valor_total_desembolsado = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    valor_total_parcelas = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    soma_taxas = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    numero_contratos = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['estado', 'data_emissao', 'numero_documento'],
+                                    name='resumo_consolidado_chave_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['numero_documento'], name='resumo_cpf_idx'),
+            models.Index(fields=['data_emissao'], name='resumo_data_emissao_idx'),
+        ]
+
+    def __str__(self):
+        return f"Resumo {self.estado} {self.data_emissao} {self.numero_documento}"
+
+class Tarefa(models.Model):
+    """
+    Tarefa executada em segundo plano pelo comando `python manage.py processar_tarefas`
+    (ver app/tarefas.py), como exportações e resumos completos da carteira.
+    A fila é a própria tabela: o worker reserva as tarefas pendentes com um UPDATE
+    condicional e grava o resultado em um arquivo em settings.TAREFAS_DIRETORIO.
+    """
+    PENDENTE = 'pendente'
+    EXECUTANDO = 'executando'
+    CONCLUIDA = 'concluida'
+    FALHOU = 'falhou'
+    STATUS = [
+        (PENDENTE, 'Pendente'),
+        (EXECUTANDO, 'Executando'),
+        (CONCLUIDA, 'Concluída'),
+        (FALHOU, 'Falhou'),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS, default=PENDENTE)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='tarefas', on_delete=models.CASCADE,
+                                null=True, blank=True)
+    arquivo_resultado = models.CharField(max_length=255, blank=True, default='')
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    erro = models.TextField(blank=True, default='')
+    criada_em = models.DateTimeField(auto_now_add=True)
+    iniciada_em = models.DateTimeField(null=True, blank=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='tarefa_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Tarefa {self.id} ({self.tipo}, {self.status})"
+
+class TokenRevogado(models.Model):
+    """
+    Tokens de acesso JWT revogados antes de expirar, identificados pelo claim `jti`.
+    Consultada pela autenticação (ver app/autenticacao.py) ao verificar um token.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='tokens_revogados',
+                                on_delete=models.CASCADE, null=True, blank=True)
+    expira_em = models.DateTimeField()
+    revogado_em = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Token revogado {self.jti}"
+
+
+class AlteracaoContrato(models.Model):
+    """
+    Feed de alterações de contratos (ver app/alteracoes.py): a última alteração de
+    cada contrato, identificada por uma sequência crescente (o `id`, AUTOINCREMENT no
+    SQLite, nunca reutilizado). Cada nova alteração substitui a linha anterior do
+    contrato, então a tabela tem no máximo uma linha por contrato já alterado.
+    Contratos removidos continuam na tabela (lápides).
+    """
+    contrato_id = models.BigIntegerField(unique=True)
+    alterado_em = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"Parcela {self.numero_parcela} do Contrato {self.contrato.id}"
\ No newline at end of file
+        return f"Alteração {self.id} do contrato {self.contrato_id}"
@@ -0,0 +1,104 @@
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class ContratoKeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) baseada no ID do contrato.
+    Cada página é obtida com WHERE id > cursor ORDER BY id LIMIT n, o que mantém
+    o custo constante por página (sem OFFSET) e a navegação estável mesmo com
+    novos contratos sendo inseridos durante a leitura.
+    A paginação é opcional: só é aplicada quando a requisição informa `cursor`
+    ou `page_size`, mantendo a listagem completa como comportamento padrão.
+    Parâmetros de consulta:
+        - cursor: ID do último contrato da página anterior.
+        - page_size: Quantidade de contratos por página (máximo de `max_page_size`).
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        pagina = self.queryset_pagina(queryset, request)
+        if pagina is None:
+            return None
+        return self.paginar(list(pagina))
+
+    def queryset_pagina(self, queryset, request):
+        """
+        Queryset da página pedida, ou None quando a requisição não pede paginação.
+        Separado de paginar para que as views assíncronas leiam a página com o ORM assíncrono.
+        """
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.get_cursor(request)
+
+        if cursor is not None:
+            queryset = queryset.filter(id__gt=cursor)
+
+        # Busca um registro a mais para saber se existe próxima página
+        return queryset.order_by('id')[:self.page_size + 1]
+
+    def paginar(self, resultados):
+        """
+        Descarta o registro a mais lido por queryset_pagina e guarda o cursor da próxima
+        página. Os resultados são contratos ou dicionários com o `id` (caminho rápido).
+        """
+        self.has_next = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        ultimo = resultados[-1] if resultados else None
+        self.next_cursor = ultimo['id'] if isinstance(ultimo, dict) else getattr(ultimo, 'id', None)
+        return resultados
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            return int(cursor)
+        except ValueError:
+            raise NotFound('Cursor inválido.')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def dados_paginados(self, data):
+        return {
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor if self.has_next else None,
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.dados_paginados(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'integer', 'nullable': True},
+                'results': schema,
+            },
+        }
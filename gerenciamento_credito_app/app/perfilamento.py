@@ -0,0 +1,231 @@
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+# Configuração padrão; pode ser sobrescrita por settings.PERFILAMENTO
+CONFIGURACAO_PADRAO = {
+    'ATIVO': False,
+    # Fração das requisições executadas com cProfile (0 desativa)
+    'AMOSTRAGEM_CPROFILE': 0.0,
+    # Apenas os perfis de requisições mais lentas que este limite são guardados
+    'LIMITE_LENTO_MS': 500,
+    'MAXIMO_PERFIS': 20,
+    # Uma mesma consulta repetida este número de vezes na requisição é tratada como N+1
+    'LIMITE_REPETICOES': 5,
+}
+
+# Limites superiores (ms) dos intervalos dos histogramas de duração
+INTERVALOS_HISTOGRAMA = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_requisicao_atual = ContextVar('perfilamento_requisicao', default=None)
+_endpoints = {}
+_perfis = deque()
+_lock = threading.Lock()
+
+
+def configuracao():
+    return {**CONFIGURACAO_PADRAO, **getattr(settings, 'PERFILAMENTO', {})}
+
+
+@contextmanager
+def medir(etapa):
+    """
+    Soma o tempo gasto no bloco à etapa informada (ex: 'serializacao') da requisição
+    em andamento. Blocos aninhados da mesma etapa são contados uma única vez.
+    Fora de uma requisição perfilada não faz nada.
+    """
+    medicao = _requisicao_atual.get()
+    if medicao is None or etapa in medicao['em_andamento']:
+        yield
+        return
+    medicao['em_andamento'].add(etapa)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicao['etapas'][etapa] = medicao['etapas'].get(etapa, 0) + time.perf_counter() - inicio
+        medicao['em_andamento'].discard(etapa)
+
+
+def _registrar_consulta(medicao):
+    def wrapper(execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            medicao['tempo_banco'] += time.perf_counter() - inicio
+            medicao['consultas'][sql] += 1
+    return wrapper
+
+
+def _histograma_vazio():
+    return {**{f'<={limite}': 0 for limite in INTERVALOS_HISTOGRAMA}, f'>{INTERVALOS_HISTOGRAMA[-1]}': 0}
+
+
+def _intervalo(duracao_ms):
+    for limite in INTERVALOS_HISTOGRAMA:
+        if duracao_ms <= limite:
+            return f'<={limite}'
+    return f'>{INTERVALOS_HISTOGRAMA[-1]}'
+
+
+def _agregar(endpoint, resultado):
+    with _lock:
+        metricas = _endpoints.get(endpoint)
+        if metricas is None:
+            metricas = _endpoints[endpoint] = {
+                'requisicoes': 0, 'tempo_total_ms': 0.0, 'tempo_maximo_ms': 0.0, 'tempo_banco_ms': 0.0,
+                'consultas': 0, 'requisicoes_com_repeticao': 0, 'bytes': 0, 'etapas_ms': {},
+                'histograma_ms': _histograma_vazio(),
+            }
+        metricas['requisicoes'] += 1
+        metricas['tempo_total_ms'] += resultado['total_ms']
+        metricas['tempo_maximo_ms'] = max(metricas['tempo_maximo_ms'], resultado['total_ms'])
+        metricas['tempo_banco_ms'] += resultado['banco_ms']
+        metricas['consultas'] += resultado['consultas']
+        metricas['requisicoes_com_repeticao'] += bool(resultado['repetidas'])
+        metricas['bytes'] += resultado['bytes']
+        for etapa, duracao in resultado['etapas_ms'].items():
+            metricas['etapas_ms'][etapa] = metricas['etapas_ms'].get(etapa, 0) + duracao
+        metricas['histograma_ms'][_intervalo(resultado['total_ms'])] += 1
+
+
+def obter_metricas():
+    """
+    Retorna as métricas agregadas por endpoint deste processo (tempos em ms, médias
+    por requisição e histograma de duração) e os perfis das requisições lentas.
+    """
+    with _lock:
+        endpoints = {}
+        for endpoint, metricas in sorted(_endpoints.items()):
+            requisicoes = metricas['requisicoes']
+            endpoints[endpoint] = {
+                'requisicoes': requisicoes,
+                'tempo_medio_ms': round(metricas['tempo_total_ms'] / requisicoes, 3),
+                'tempo_maximo_ms': round(metricas['tempo_maximo_ms'], 3),
+                'tempo_banco_medio_ms': round(metricas['tempo_banco_ms'] / requisicoes, 3),
+                'consultas_media': round(metricas['consultas'] / requisicoes, 2),
+                'requisicoes_com_repeticao': metricas['requisicoes_com_repeticao'],
+                'bytes_medio': round(metricas['bytes'] / requisicoes),
+                'etapas_medias_ms': {
+                    etapa: round(duracao / requisicoes, 3) for etapa, duracao in sorted(metricas['etapas_ms'].items())
+                },
+                'histograma_ms': dict(metricas['histograma_ms']),
+            }
+        perfis = list(_perfis)
+    return {'endpoints': endpoints, 'perfis': perfis}
+
+
+def limpar_metricas():
+    with _lock:
+        _endpoints.clear()
+        _perfis.clear()
+
+
+def _nome_endpoint(request):
+    resolver_match = getattr(request, 'resolver_match', None)
+    nome = resolver_match.view_name if resolver_match else 'nao_encontrado'
+    return f'{request.method} {nome}'
+
+
+def _guardar_perfil(perfilador, endpoint, total_ms, maximo_perfis):
+    saida = io.StringIO()
+    pstats.Stats(perfilador, stream=saida).sort_stats('cumulative').print_stats(30)
+    with _lock:
+        _perfis.append({
+            'endpoint': endpoint,
+            'duracao_ms': round(total_ms, 3),
+            'registrado_em': timezone.now().isoformat(),
+            'estatisticas': saida.getvalue(),
+        })
+        while len(_perfis) > maximo_perfis:
+            _perfis.popleft()
+
+
+class PerfilamentoMiddleware:
+    """
+    Middleware opcional (settings.PERFILAMENTO['ATIVO']) que mede cada requisição:
+    tempo total, tempo e quantidade de consultas SQL, consultas repetidas (indício de
+    N+1), tempo de serialização/renderização e tamanho da resposta.
+    As medições são enviadas no cabeçalho Server-Timing e agregadas por endpoint em
+    memória (ver obter_metricas). Uma fração das requisições (AMOSTRAGEM_CPROFILE) é
+    executada com cProfile e o perfil é guardado quando passa de LIMITE_LENTO_MS.
+    Respostas em streaming são medidas apenas até o início do envio. O middleware é
+    síncrono: sob ASGI, quando ativo, as views assíncronas passam a ser executadas em
+    uma thread, então deve ficar ativo apenas durante investigações.
+    """
+    def __init__(self, get_response):
+        self.config = configuracao()
+        if not self.config['ATIVO']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicao = {'tempo_banco': 0.0, 'consultas': Counter(), 'etapas': {}, 'em_andamento': set()}
+        token = _requisicao_atual.set(medicao)
+        perfilador = None
+        if random.random() < self.config['AMOSTRAGEM_CPROFILE']:
+            perfilador = cProfile.Profile()
+
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as pilha:
+                for conexao in connections.all():
+                    pilha.enter_context(conexao.execute_wrapper(_registrar_consulta(medicao)))
+                if perfilador is not None:
+                    try:
+                        perfilador.enable()
+                    except ValueError:  # outro profiler já ativo nesta thread
+                        perfilador = None
+                    else:
+                        pilha.callback(perfilador.disable)
+                response = self.get_response(request)
+        finally:
+            _requisicao_atual.reset(token)
+        total_ms = (time.perf_counter() - inicio) * 1000
+
+        endpoint = _nome_endpoint(request)
+        repetidas = {sql: vezes for sql, vezes in medicao['consultas'].items() if vezes > 1}
+        resultado = {
+            'total_ms': total_ms,
+            'banco_ms': medicao['tempo_banco'] * 1000,
+            'consultas': sum(medicao['consultas'].values()),
+            'repetidas': sum(vezes - 1 for vezes in repetidas.values()),
+            'bytes': 0 if response.streaming else len(response.content),
+            'etapas_ms': {etapa: duracao * 1000 for etapa, duracao in medicao['etapas'].items()},
+        }
+        _agregar(endpoint, resultado)
+
+        for sql, vezes in repetidas.items():
+            if vezes >= self.config['LIMITE_REPETICOES']:
+                logger.warning('Possível N+1 em %s: consulta executada %d vezes: %s', endpoint, vezes, sql[:200])
+
+        if perfilador is not None and total_ms >= self.config['LIMITE_LENTO_MS']:
+            _guardar_perfil(perfilador, endpoint, total_ms, self.config['MAXIMO_PERFIS'])
+
+        response['Server-Timing'] = self.server_timing(resultado)
+        return response
+
+    @staticmethod
+    def server_timing(resultado):
+        metricas = [
+            f"total;dur={resultado['total_ms']:.3f}",
+            f"db;dur={resultado['banco_ms']:.3f};desc=\"{resultado['consultas']} consultas, "
+            f"{resultado['repetidas']} repetidas\"",
+        ]
+        metricas += [f'{etapa};dur={duracao:.3f}' for etapa, duracao in sorted(resultado['etapas_ms'].items())]
+        return ', '.join(metricas)
@@ -0,0 +1,87 @@
+from django.db import connection, transaction
+from .consolidacao import aplicar_alteracoes, chave_contrato
+from .consultas import modelo_parcela
+from .models import Contrato, Parcela
+
+
+TAMANHO_LOTE_REMOCAO = 1000
+
+
+def contar_remocao(queryset):
+    """
+    Quantidade de contratos e parcelas que remover_em_lote removeria (dry-run).
+    """
+    queryset = queryset.prefetch_related(None).order_by()
+    return {
+        'contratos': queryset.count(),
+        'parcelas': modelo_parcela(queryset.model).objects.filter(contrato__in=queryset.values('id')).count(),
+    }
+
+
+def apagar_linhas(cursor, modelo, coluna, ids):
+    """
+    Executa DELETE FROM <tabela do modelo> WHERE <coluna> IN (ids) e retorna a
+    quantidade de linhas removidas.
+    """
+    cursor.execute(
+        f"DELETE FROM {modelo._meta.db_table} WHERE {coluna} IN ({', '.join(['%s'] * len(ids))})", ids
+    )
+    return cursor.rowcount
+
+
+def processar_em_lotes(queryset, processar, tamanho_lote=TAMANHO_LOTE_REMOCAO):
+    """
+    Chama `processar(contratos)` para os contratos do queryset, em ordem de ID e em
+    transações de `tamanho_lote` contratos (paginação por keyset, sem OFFSET). Os
+    contratos são carregados apenas com os campos da chave consolidada.
+    `processar` retorna um dicionário de contagens, somadas entre os lotes.
+    """
+    queryset = queryset.prefetch_related(None).only('id', 'data_emissao', 'numero_documento', 'endereco_tomador')
+    totais = {}
+    ultimo_id = None
+    while True:
+        with transaction.atomic():
+            lote = queryset.order_by('id')
+            if ultimo_id is not None:
+                lote = lote.filter(id__gt=ultimo_id)
+            contratos = list(lote[:tamanho_lote])
+            if not contratos:
+                break
+            for chave, quantidade in processar(contratos).items():
+                totais[chave] = totais.get(chave, 0) + quantidade
+        ultimo_id = contratos[-1].id
+    return totais
+
+
+def apagar_contratos(contratos):
+    """
+    Apaga os contratos ativos informados e suas parcelas com DELETEs em conjunto, na
+    transação do chamador, e atualiza a tabela consolidada, o índice de busca, o feed
+    de alterações e o cache (aplicar_alteracoes).
+    Retorna:
+        dict: Quantidade de contratos e parcelas removidos.
+    """
+    ids = [contrato.id for contrato in contratos]
+    with connection.cursor() as cursor:
+        parcelas = apagar_linhas(cursor, Parcela, Parcela._meta.get_field('contrato').column, ids)
+        removidos = apagar_linhas(cursor, Contrato, 'id', ids)
+    # Os contratos já foram removidos: as chaves consolidadas são informadas diretamente
+    aplicar_alteracoes({chave_contrato(contrato) for contrato in contratos}, ids)
+    return {'contratos': removidos, 'parcelas': parcelas}
+
+
+def remover_em_lote(queryset, tamanho_lote=TAMANHO_LOTE_REMOCAO):
+    """
+    Remove os contratos do queryset e suas parcelas com DELETEs em conjunto, em
+    transações de `tamanho_lote` contratos, sem o Collector do Django (que carrega
+    cada parcela e dispara um signal por objeto). Entre os lotes a trava de escrita do
+    SQLite é liberada, então as demais escritas não ficam bloqueadas durante toda a
+    remoção. A tabela consolidada, o índice de busca, o feed de alterações e o cache
+    são atualizados uma vez por lote (aplicar_alteracoes).
+    Parâmetros:
+        - queryset: QuerySet de Contrato já filtrado.
+        - tamanho_lote: Quantidade de contratos por transação.
+    Retorna:
+        dict: Quantidade de contratos e parcelas removidos.
+    """
+    return {'contratos': 0, 'parcelas': 0, **processar_em_lotes(queryset, apagar_contratos, tamanho_lote)}
@@ -0,0 +1,36 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from .codificacao_msgpack import MEDIA_TYPE_MSGPACK, codificar
+from .perfilamento import medir
+from .serializacao_rapida import renderizar_json
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """
+    JSONRenderer que codifica com orjson (quando instalado), com a mesma saída do
+    JSONRenderer do DRF. Respostas com indentação solicitada (ex: `; indent=4` no
+    Accept) continuam usando o renderer padrão.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with medir('renderizacao'):
+            if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+                return super().render(data, accepted_media_type, renderer_context)
+            return renderizar_json(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renderer MessagePack, escolhido com `Accept: application/msgpack` ou
+    `?format=msgpack`. Os dados são os mesmos da resposta JSON, em formato binário.
+    """
+    media_type = MEDIA_TYPE_MSGPACK
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        with medir('renderizacao'):
+            return codificar(data)
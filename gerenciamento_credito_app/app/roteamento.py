@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+ALIAS_LEITURA = 'leitura'
+
+# Ativado pelas views durante as requisições de leitura (ver usar_leitura)
+_leitura = ContextVar('roteamento_leitura', default=False)
+
+
+@contextmanager
+def usar_leitura():
+    """
+    Envia para a conexão somente leitura as consultas feitas dentro do bloco.
+    """
+    token = _leitura.set(True)
+    try:
+        yield
+    finally:
+        _leitura.reset(token)
+
+
+def gerar_em_leitura(partes):
+    """
+    Consome o iterador `partes` (ex: o corpo de uma StreamingHttpResponse) gerando cada
+    parte dentro de usar_leitura(). O corpo é lido depois que a view retorna, fora do
+    bloco de usar_leitura() da view; cada parte ativa o bloco de novo, pois o servidor
+    pode consumir o corpo em outro contexto (ex: ASGI).
+    """
+    partes = iter(partes)
+    while True:
+        with usar_leitura():
+            parte = next(partes, None)
+        if parte is None:
+            return
+        yield parte
+
+
+class RoteadorLeituraEscrita:
+    """
+    Router de banco de dados: dentro de usar_leitura() (requisições GET da API) as
+    leituras vão para a conexão `leitura`; todas as escritas, e as leituras feitas
+    dentro de uma transação na conexão principal (que precisam enxergar as escritas
+    ainda não confirmadas), vão para a conexão padrão.
+    Sem a conexão `leitura` em settings.DATABASES, tudo usa a conexão padrão.
+    """
+    def db_for_read(self, model, **hints):
+        if not _leitura.get() or ALIAS_LEITURA not in settings.DATABASES:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return ALIAS_LEITURA
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # As duas conexões apontam para os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != ALIAS_LEITURA
@@ -0,0 +1,261 @@
+import json
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from django.db.models import Count, Min, Q, Sum
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from .consultas import modelo_parcela
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional: sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+# Campos de leitura do ContratoSerializer e do ParcelaSerializer, na mesma ordem
+CAMPOS_CONTRATO = ('id', 'data_emissao', 'data_nascimento_tomador', 'valor_desembolsado', 'numero_documento',
+                   'endereco_tomador', 'telefone_tomador', 'taxa_contrato')
+CAMPOS_PARCELA = ('contrato_id', 'id', 'numero_parcela', 'valor_parcela', 'data_vencimento')
+
+# Campos que podem ser escolhidos com fields/include/exclude. `parcelas_summary` traz
+# apenas a quantidade, o valor total e o próximo vencimento das parcelas de cada contrato.
+CAMPOS_SELECIONAVEIS = CAMPOS_CONTRATO + ('parcelas', 'parcelas_summary')
+CAMPOS_PADRAO = CAMPOS_CONTRATO + ('parcelas',)
+
+_CONVERSORES = {
+    'data_emissao': date.isoformat,
+    'data_nascimento_tomador': date.isoformat,
+    'valor_desembolsado': lambda valor: f'{valor:f}',
+    'taxa_contrato': lambda valor: f'{valor:f}',
+}
+
+
+def _parcela(linha):
+    _, parcela_id, numero_parcela, valor_parcela, data_vencimento = linha
+    return {
+        'id': parcela_id,
+        'numero_parcela': numero_parcela,
+        'valor_parcela': f'{valor_parcela:f}',
+        'data_vencimento': data_vencimento.isoformat(),
+    }
+
+
+def _contrato(linha, parcelas):
+    (contrato_id, data_emissao, data_nascimento_tomador, valor_desembolsado, numero_documento,
+     endereco_tomador, telefone_tomador, taxa_contrato) = linha
+    return {
+        'id': contrato_id,
+        'data_emissao': data_emissao.isoformat(),
+        'data_nascimento_tomador': data_nascimento_tomador.isoformat(),
+        'valor_desembolsado': f'{valor_desembolsado:f}',
+        'numero_documento': numero_documento,
+        'endereco_tomador': endereco_tomador,
+        'telefone_tomador': telefone_tomador,
+        'taxa_contrato': f'{taxa_contrato:f}',
+        'parcelas': parcelas,
+    }
+
+
+def _agrupar(contratos, linhas_parcelas):
+    """
+    Agrupa as parcelas por contrato em uma única passada e monta os registros.
+    """
+    parcelas = defaultdict(list)
+    for linha in linhas_parcelas:
+        parcelas[linha[0]].append(_parcela(linha))
+    return [_contrato(linha, parcelas.get(linha[0], [])) for linha in contratos]
+
+
+def _parcelas(modelo, filtro):
+    return modelo.objects.filter(**filtro).order_by('contrato_id', 'numero_parcela', 'id').values_list(*CAMPOS_PARCELA)
+
+
+def _resumos_parcelas(modelo, filtro):
+    """
+    Quantidade, soma e próximo vencimento (a partir de hoje) das parcelas de cada
+    contrato, calculados pelo banco em uma consulta agrupada por contrato_id.
+    """
+    return (
+        modelo.objects.filter(**filtro).order_by().values('contrato_id')
+        .annotate(quantidade=Count('id'), valor_total=Sum('valor_parcela'),
+                  proximo_vencimento=Min('data_vencimento', filter=Q(data_vencimento__gte=date.today())))
+        .values_list('contrato_id', 'quantidade', 'valor_total', 'proximo_vencimento')
+    )
+
+
+def _colunas(campos):
+    # O ID é sempre lido (primeira coluna): agrupa as parcelas e identifica o contrato
+    return [campo for campo in campos if campo in CAMPOS_CONTRATO]
+
+
+def _resumo(quantidade, valor_total, proximo_vencimento):
+    # A soma vinda do SQLite perde as casas decimais (750 ao invés de 750.00)
+    return {
+        'quantidade': quantidade,
+        'valor_total': f'{valor_total:.2f}',
+        'proximo_vencimento': proximo_vencimento.isoformat() if proximo_vencimento else None,
+    }
+
+
+def _montar(campos, contratos, linhas_parcelas):
+    """
+    Monta os registros apenas com os `campos` escolhidos. As linhas de parcelas são
+    as parcelas (campos com 'parcelas') ou os resumos já agregados pelo banco (apenas
+    'parcelas_summary'); com os dois campos, o resumo é calculado das parcelas lidas.
+    """
+    if campos == CAMPOS_PADRAO:
+        return _agrupar(contratos, linhas_parcelas)
+
+    colunas = _colunas(campos)
+    conversores = [_CONVERSORES.get(coluna) for coluna in colunas]
+    parcelas = defaultdict(list)
+    resumos = {}
+    if 'parcelas' in campos:
+        for linha in linhas_parcelas:
+            parcelas[linha[0]].append(linha)
+        if 'parcelas_summary' in campos:
+            hoje = date.today()
+            for contrato_id, linhas in parcelas.items():
+                resumos[contrato_id] = _resumo(
+                    len(linhas), sum(linha[3] for linha in linhas),
+                    min((linha[4] for linha in linhas if linha[4] >= hoje), default=None),
+                )
+    elif 'parcelas_summary' in campos:
+        resumos = {linha[0]: _resumo(*linha[1:]) for linha in linhas_parcelas}
+
+    registros = []
+    for linha in contratos:
+        registro = {
+            coluna: valor if conversor is None else conversor(valor)
+            for coluna, conversor, valor in zip(colunas, conversores, linha)
+        }
+        if 'parcelas' in campos:
+            registro['parcelas'] = [_parcela(parcela) for parcela in parcelas.get(linha[0], ())]
+        if 'parcelas_summary' in campos:
+            registro['parcelas_summary'] = resumos.get(linha[0]) or _resumo(0, Decimal(0), None)
+        registros.append(registro)
+    return registros
+
+
+def _consulta_parcelas(campos, queryset, filtro):
+    """
+    Consulta das parcelas exigida pelos `campos` escolhidos, ou None quando as
+    parcelas não fazem parte da resposta (nenhuma consulta é feita). As parcelas
+    são lidas do modelo relacionado ao do queryset (ex: ParcelaCompleta).
+    """
+    if 'parcelas' in campos:
+        return _parcelas(modelo_parcela(queryset.model), filtro)
+    if 'parcelas_summary' in campos:
+        return _resumos_parcelas(modelo_parcela(queryset.model), filtro)
+    return None
+
+
+def campos_selecionados(params):
+    """
+    Campos da resposta conforme os parâmetros `fields`, `include` e `exclude`
+    (listas separadas por vírgula dos campos de CAMPOS_SELECIONAVEIS):
+    - fields: substitui os campos padrão (todas as colunas e `parcelas`).
+    - include: acrescenta campos (ex: `include=parcelas` junto com `fields`, ou
+      `include=parcelas_summary`).
+    - exclude: remove campos (ex: `exclude=parcelas`).
+    O `id` é sempre retornado.
+    Retorna:
+        tuple: Os campos, na ordem de CAMPOS_SELECIONAVEIS.
+    """
+    def lista(parametro):
+        nomes = [nome.strip() for nome in params.get(parametro, '').split(',') if nome.strip()]
+        invalidos = [nome for nome in nomes if nome not in CAMPOS_SELECIONAVEIS]
+        if invalidos:
+            raise ValidationError({parametro: f"Campos inválidos: {', '.join(invalidos)}. "
+                                              f"Use: {', '.join(CAMPOS_SELECIONAVEIS)}."})
+        return set(nomes)
+
+    campos = lista('fields') if params.get('fields') else set(CAMPOS_PADRAO)
+    campos = (campos | lista('include')) - lista('exclude')
+    campos.add('id')
+    return tuple(campo for campo in CAMPOS_SELECIONAVEIS if campo in campos)
+
+
+def linhas_contratos(queryset, campos=CAMPOS_PADRAO):
+    """
+    Monta os contratos no mesmo formato do ContratoSerializer, sem instanciar modelos
+    nem campos do DRF. Executa duas consultas: uma para os contratos e outra para as
+    parcelas (filtradas pelo mesmo queryset via subquery).
+    Parâmetros:
+        - queryset: QuerySet de Contrato já filtrado (e ordenado, se necessário).
+        - campos: Campos retornados (ver campos_selecionados). Apenas as colunas
+          escolhidas são lidas e, sem `parcelas` nem `parcelas_summary`, as parcelas
+          não são consultadas.
+    Retorna:
+        list: Dicionários prontos para serem codificados em JSON.
+    """
+    queryset = queryset.prefetch_related(None)
+    contratos = list(queryset.values_list(*_colunas(campos)))
+    if not contratos:
+        return []
+    parcelas = _consulta_parcelas(campos, queryset, {'contrato__in': queryset.values('id')})
+    return _montar(campos, contratos, parcelas if parcelas is not None else ())
+
+
+def linhas_contratos_em_lotes(queryset, chunk_size, campos=CAMPOS_PADRAO):
+    """
+    Versão em lotes de linhas_contratos, para streaming: lê os contratos com um cursor
+    do banco e busca as parcelas de cada lote de `chunk_size` contratos em uma consulta.
+    """
+    def montar(lote):
+        parcelas = _consulta_parcelas(campos, queryset, {'contrato_id__in': [contrato[0] for contrato in lote]})
+        return _montar(campos, lote, parcelas if parcelas is not None else ())
+
+    lote = []
+    for linha in queryset.prefetch_related(None).values_list(*_colunas(campos)).iterator(chunk_size=chunk_size):
+        lote.append(linha)
+        if len(lote) == chunk_size:
+            yield from montar(lote)
+            lote = []
+    if lote:
+        yield from montar(lote)
+
+
+async def alinhas_contratos(queryset, campos=CAMPOS_PADRAO):
+    """
+    Versão assíncrona de linhas_contratos, usando o ORM assíncrono.
+    Para querysets fatiados (paginação) as parcelas são filtradas pelos IDs lidos.
+    Observação: cada consulta é lida com `async for` no queryset (um único
+    sync_to_async), pois o aiterator() de values_list do Django 5.1 executa a consulta
+    fora da thread do banco.
+    """
+    queryset = queryset.prefetch_related(None)
+    contratos = [linha async for linha in queryset.values_list(*_colunas(campos))]
+    if not contratos:
+        return []
+    if queryset.query.is_sliced:
+        filtro = {'contrato_id__in': [contrato[0] for contrato in contratos]}
+    else:
+        filtro = {'contrato__in': queryset.values('id')}
+    parcelas = _consulta_parcelas(campos, queryset, filtro)
+    return _montar(campos, contratos, [linha async for linha in parcelas] if parcelas is not None else ())
+
+
+def renderizar_json(dados):
+    """
+    Codifica os dados em JSON com a mesma saída do JSONRenderer do DRF (compacto,
+    UTF-8 sem escapes e com U+2028/U+2029 escapados), usando orjson quando disponível.
+    Tipos que o orjson não trata como o DRF (Decimal, datetime etc.) são convertidos
+    pelo JSONEncoder do DRF; se ainda assim o orjson falhar, usa o json da biblioteca padrão.
+    Observação: floats em notação científica (ex: dentro de endereco_tomador) podem ter
+    o expoente formatado de forma diferente pelo orjson (1e-7 ao invés de 1e-07).
+    """
+    conteudo = None
+    if orjson is not None:
+        try:
+            conteudo = orjson.dumps(dados, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            conteudo = None
+    if conteudo is None:
+        conteudo = json.dumps(dados, cls=JSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+                              allow_nan=not api_settings.STRICT_JSON, separators=(',', ':')).encode()
+    return conteudo.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -1,5 +1,17 @@
+from decimal import Decimal
+from django.db import transaction
 from rest_framework import serializers
-from .models import Contrato, Parcela
+from rest_framework.reverse import reverse
+from .models import Contrato, Parcela, Tarefa
+from .consolidacao import adiar_consolidacao, registrar_alteracao
+from .amortizacao import PRAZO_MAXIMO, SISTEMAS_AMORTIZACAO, gerar_cronograma, somar_meses
+from .perfilamento import medir
+from .agregacoes import AGRUPAMENTOS
+from .streaming import FORMATOS_STREAMING
+from .exportacao import COLUNAS, FORMATOS_EXPORTACAO
+
+
+MODOS_PARCELAS = ('mesclar', 'substituir')
 
 class ParcelaSerializer(serializers.ModelSerializer):
     """
@@ -13,11 +25,29 @@ class ParcelaSerializer(serializers.ModelSerializer):
                 - numero_parcela: Número da parcela.
                 - valor_parcela: Valor da parcela.
                 - data_vencimento: Data de vencimento da parcela.
+
+    O `id` é opcional na escrita: quando informado na atualização de um contrato,
+    identifica a parcela existente que deve ser alterada.
     """
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = Parcela
         fields = ['id', 'numero_parcela', 'valor_parcela', 'data_vencimento']
 
+class CronogramaSerializer(serializers.Serializer):
+    """
+    Parâmetros para gerar as parcelas do contrato no servidor.
+    Campos:
+        - sistema: Sistema de amortização, 'price' (padrão) ou 'sac'.
+        - prazo: Quantidade de parcelas mensais.
+        - primeiro_vencimento: Vencimento da primeira parcela (padrão: um mês após a emissão).
+    """
+    sistema = serializers.ChoiceField(choices=SISTEMAS_AMORTIZACAO, default='price')
+    prazo = serializers.IntegerField(min_value=1, max_value=PRAZO_MAXIMO)
+    primeiro_vencimento = serializers.DateField(required=False)
+
+
 class ContratoSerializer(serializers.ModelSerializer):
     """
     Serializer para o modelo Contrato, que inclui a serialização aninhada do modelo Parcela.
@@ -31,41 +61,195 @@ class ContratoSerializer(serializers.ModelSerializer):
         - telefone_tomador: Telefone do tomador do contrato.
         - taxa_contrato: Taxa aplicada ao contrato.
         - parcelas: Lista de parcelas associadas ao contrato.
+        - gerar_parcelas: Apenas escrita. Alternativa a `parcelas`: gera as parcelas no
+          servidor a partir do valor desembolsado, da taxa (% a.m.) e da data de emissão.
     Métodos:
         - create(self, validated_data): Cria um novo contrato e suas parcelas associadas.
         - update(self, instance, validated_data): Atualiza um contrato existente e suas parcelas associadas.
+
+    Na atualização, o modo de reconciliação das parcelas vem do contexto `modo_parcelas`:
+        - mesclar (padrão): atualiza as parcelas enviadas e cria as novas, mantendo as demais.
+        - substituir: o contrato passa a ter exatamente as parcelas enviadas; as demais são removidas.
     """
-    parcelas = ParcelaSerializer(many=True)
+    parcelas = ParcelaSerializer(many=True, required=False)
+    gerar_parcelas = CronogramaSerializer(write_only=True, required=False)
 
     class Meta:
         model = Contrato
         fields = ['id', 'data_emissao', 'data_nascimento_tomador', 'valor_desembolsado', 
-                  'numero_documento', 'endereco_tomador', 'telefone_tomador', 'taxa_contrato', 'parcelas']
+                  'numero_documento', 'endereco_tomador', 'telefone_tomador', 'taxa_contrato', 'parcelas',
+                  'gerar_parcelas']
+
+    def to_representation(self, instance):
+        with medir('serializacao'):
+            return super().to_representation(instance)
+
+    def validate(self, attrs):
+        """
+        Exige `parcelas` ou `gerar_parcelas` na criação e, quando `gerar_parcelas` é
+        informado, substitui-o pelas parcelas calculadas.
+        """
+        cronograma = attrs.pop('gerar_parcelas', None)
+        if cronograma is not None:
+            if 'parcelas' in attrs:
+                raise serializers.ValidationError('Informe `parcelas` ou `gerar_parcelas`, não ambos.')
+
+            def atual(campo):
+                return attrs[campo] if campo in attrs else getattr(self.instance, campo)
+
+            data_emissao = atual('data_emissao')
+            try:
+                parcelas = gerar_cronograma(
+                    atual('valor_desembolsado'),
+                    atual('taxa_contrato'),
+                    cronograma['prazo'],
+                    cronograma.get('primeiro_vencimento') or somar_meses(data_emissao, 1),
+                    cronograma['sistema'],
+                )
+            except ArithmeticError:
+                parcelas = None
+            # As parcelas precisam caber em valor_parcela (max_digits=10, decimal_places=2)
+            campo = Parcela._meta.get_field('valor_parcela')
+            maximo = Decimal(10) ** (campo.max_digits - campo.decimal_places) - Decimal('0.01')
+            if parcelas is None or any(not 0 <= parcela['valor_parcela'] <= maximo for parcela in parcelas):
+                raise serializers.ValidationError({'gerar_parcelas': [
+                    'Não é possível gerar as parcelas com este valor, taxa e prazo: '
+                    f'cada parcela deve estar entre 0 e {maximo}.']})
+            attrs['parcelas'] = parcelas
+        elif self.instance is None and 'parcelas' not in attrs:
+            raise serializers.ValidationError({'parcelas': ['Este campo é obrigatório.']})
+        return attrs
 
     def create(self, validated_data):
         parcelas_data = validated_data.pop('parcelas')
 
-        contrato = Contrato.objects.create(**validated_data)
-
         for parcela_data in parcelas_data:
-            Parcela.objects.create(contrato=contrato, **parcela_data)
+            parcela_data.pop('id', None)
+
+        # A tabela consolidada do resumo é recalculada uma única vez, ao final
+        with transaction.atomic(), adiar_consolidacao():
+            contrato = Contrato.objects.create(**validated_data)
+            Parcela.objects.bulk_create(Parcela(contrato=contrato, **parcela_data) for parcela_data in parcelas_data)
+            # bulk_create não dispara signals
+            registrar_alteracao(contrato_id=contrato.id)
 
         return contrato
 
     def update(self, instance, validated_data):
-        parcelas_data = validated_data.pop('parcelas', [])
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        parcelas_data = validated_data.pop('parcelas', None)
+        modo = self.context.get('modo_parcelas', 'mesclar')
+
+        with transaction.atomic(), adiar_consolidacao():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
 
+            if parcelas_data is not None:
+                self.reconciliar_parcelas(instance, parcelas_data, modo)
+
+        return instance
+
+    def reconciliar_parcelas(self, instance, parcelas_data, modo):
+        """
+        Aplica as parcelas recebidas ao contrato com operações em conjunto.
+        As parcelas existentes são lidas em uma consulta e comparadas com as recebidas,
+        pelo `id` ou, quando ele não é enviado, pelo `numero_parcela`. Em seguida são
+        executados um bulk_update, um bulk_create e (no modo substituir) um delete,
+        independente do número de parcelas.
+        Parâmetros:
+            - instance: Contrato que está sendo atualizado.
+            - parcelas_data: Lista de parcelas validadas pelo ParcelaSerializer.
+            - modo: 'mesclar' ou 'substituir'.
+        """
+        existentes = {parcela.id: parcela for parcela in Parcela.objects.filter(contrato=instance)}
+        por_numero = {parcela.numero_parcela: parcela for parcela in existentes.values()}
+
+        alteradas = {}
+        novas = []
         for parcela_data in parcelas_data:
-            parcela_id = parcela_data.get('id', None)
-            if parcela_id:
-                parcela = Parcela.objects.get(id=parcela_id, contrato=instance)
-                for key, value in parcela_data.items():
-                    setattr(parcela, key, value)
-                parcela.save()
+            parcela_id = parcela_data.pop('id', None)
+            if parcela_id is not None:
+                parcela = existentes.get(parcela_id)
+                if parcela is None:
+                    raise serializers.ValidationError(
+                        {'parcelas': [f'Parcela {parcela_id} não pertence ao contrato {instance.id}.']}
+                    )
             else:
-                Parcela.objects.create(contrato=instance, **parcela_data)
+                parcela = por_numero.get(parcela_data.get('numero_parcela'))
 
-        return instance
+            if parcela is None or parcela.id in alteradas:
+                novas.append(Parcela(contrato=instance, **parcela_data))
+                continue
+            for key, value in parcela_data.items():
+                setattr(parcela, key, value)
+            alteradas[parcela.id] = parcela
+
+        if alteradas:
+            Parcela.objects.bulk_update(alteradas.values(), ['numero_parcela', 'valor_parcela', 'data_vencimento'])
+        if novas:
+            Parcela.objects.bulk_create(novas)
+        if modo == 'substituir':
+            removidas = set(existentes) - set(alteradas)
+            if removidas:
+                Parcela.objects.filter(id__in=removidas).delete()
+
+        # bulk_update e bulk_create não disparam signals
+        registrar_alteracao(contrato_id=instance.id)
+
+
+class FiltrosContratoSerializer(serializers.Serializer):
+    """
+    Filtros de contratos aceitos pelas tarefas (os mesmos da listagem).
+    """
+    cpf = serializers.CharField(required=False, max_length=14)
+    data_emissao = serializers.DateField(required=False)
+    estado = serializers.CharField(required=False, max_length=50)
+
+
+class ParametrosExportacaoSerializer(FiltrosContratoSerializer):
+    """
+    Formatos aninhados (ndjson/json, como o streaming da listagem) ou colunares
+    (csv/arrow, como GET /api/contratos/exportar/, com a `tabela` exportada).
+    """
+    formato = serializers.ChoiceField(choices=list(FORMATOS_STREAMING) + list(FORMATOS_EXPORTACAO), default='ndjson')
+    tabela = serializers.ChoiceField(choices=list(COLUNAS), default='contratos')
+
+
+class ParametrosResumoSerializer(FiltrosContratoSerializer):
+    group_by = serializers.ChoiceField(choices=list(AGRUPAMENTOS), required=False)
+
+
+# Parâmetros aceitos por cada tipo de tarefa (os executores ficam em app/tarefas.py)
+PARAMETROS_TAREFA = {
+    'exportar_contratos': ParametrosExportacaoSerializer,
+    'resumo': ParametrosResumoSerializer,
+}
+
+
+class TarefaSerializer(serializers.ModelSerializer):
+    """
+    Serializer para o modelo Tarefa.
+    Na criação recebe apenas `tipo` e `parametros`; os parâmetros são validados pelo
+    serializer do tipo (PARAMETROS_TAREFA) e gravados já normalizados.
+    O campo `resultado` traz a URL de download quando a tarefa foi concluída.
+    """
+    tipo = serializers.ChoiceField(choices=list(PARAMETROS_TAREFA))
+    resultado = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Tarefa
+        fields = ['id', 'tipo', 'parametros', 'status', 'erro', 'criada_em', 'iniciada_em', 'concluida_em',
+                  'resultado']
+        read_only_fields = ['status', 'erro', 'criada_em', 'iniciada_em', 'concluida_em']
+
+    def validate(self, attrs):
+        parametros = PARAMETROS_TAREFA[attrs['tipo']](data=attrs.get('parametros') or {})
+        if not parametros.is_valid():
+            raise serializers.ValidationError({'parametros': parametros.errors})
+        attrs['parametros'] = parametros.data
+        return attrs
+
+    def get_resultado(self, tarefa):
+        if tarefa.status != Tarefa.CONCLUIDA:
+            return None
+        return reverse('tarefa-resultado', args=[tarefa.id], request=self.context.get('request'))
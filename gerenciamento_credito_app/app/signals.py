@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .consolidacao import chave_contrato, registrar_alteracao
+from .models import Contrato, Parcela
+
+
+@receiver(pre_save, sender=Contrato)
+def guardar_chave_anterior(sender, instance, raw=False, **kwargs):
+    """
+    Guarda a chave consolidada anterior do contrato, para que a linha antiga
+    também seja recalculada caso o estado, a data de emissão ou o CPF mudem.
+    """
+    if raw or instance.pk is None:
+        return
+    anterior = Contrato.objects.filter(pk=instance.pk).only('data_emissao', 'numero_documento', 'endereco_tomador').first()
+    instance._chave_consolidada_anterior = chave_contrato(anterior) if anterior else None
+
+
+@receiver(post_save, sender=Contrato)
+def consolidar_contrato_salvo(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    anterior = getattr(instance, '_chave_consolidada_anterior', None)
+    if anterior:
+        registrar_alteracao(chave=anterior)
+    # A nova chave é lida do banco, já com os valores normalizados pelos campos
+    registrar_alteracao(contrato_id=instance.pk)
+
+
+@receiver(post_delete, sender=Contrato)
+def consolidar_contrato_removido(sender, instance, **kwargs):
+    registrar_alteracao(chave=chave_contrato(instance), contrato_id=instance.pk)
+
+
+@receiver(post_save, sender=Parcela)
+@receiver(post_delete, sender=Parcela)
+def consolidar_parcela(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Usa apenas o ID: no delete em cascata o contrato já pode ter sido removido
+    registrar_alteracao(contrato_id=instance.contrato_id)
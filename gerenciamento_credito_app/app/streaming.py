@@ -0,0 +1,60 @@
+from .codificacao_msgpack import MEDIA_TYPE_MSGPACK, codificar
+from .serializacao_rapida import CAMPOS_PADRAO, linhas_contratos_em_lotes, renderizar_json
+
+
+FORMATOS_STREAMING = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+    'msgpack': MEDIA_TYPE_MSGPACK,
+}
+
+CHUNK_SIZE_PADRAO = 500
+CHUNK_SIZE_MAXIMO = 5000
+
+
+def stream_ndjson(registros):
+    """
+    Gera um contrato por linha (NDJSON).
+    """
+    for registro in registros:
+        yield renderizar_json(registro) + b'\n'
+
+
+def stream_json(registros):
+    """
+    Gera um array JSON válido, enviado em partes conforme os contratos são serializados.
+    """
+    yield b'['
+    separador = b''
+    for registro in registros:
+        yield separador + renderizar_json(registro)
+        separador = b','
+    yield b']'
+
+
+def stream_msgpack(registros):
+    """
+    Gera uma sequência de objetos MessagePack, um por contrato (lida com um
+    Unpacker/decoder em modo stream).
+    """
+    for registro in registros:
+        yield codificar(registro)
+
+
+def stream_contratos(queryset, formato, chunk_size=CHUNK_SIZE_PADRAO, campos=CAMPOS_PADRAO):
+    """
+    Retorna o gerador do corpo da resposta no formato solicitado.
+    Os contratos são lidos com um cursor do banco (.iterator) em lotes de `chunk_size`,
+    com uma consulta de parcelas por lote, sem materializar todo o resultado em memória.
+    Parâmetros:
+        - queryset: QuerySet de Contrato.
+        - formato: 'ndjson', 'json' ou 'msgpack'.
+        - chunk_size: Quantidade de contratos lidos do banco por vez.
+        - campos: Campos de cada contrato (ver campos_selecionados).
+    """
+    registros = linhas_contratos_em_lotes(queryset, chunk_size, campos)
+    if formato == 'ndjson':
+        return stream_ndjson(registros)
+    if formato == 'msgpack':
+        return stream_msgpack(registros)
+    return stream_json(registros)
@@ -0,0 +1,175 @@
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+from multiprocessing import get_context
+from pathlib import Path
+import django
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from . import exportacao
+from .agregacoes import calcular_resumo
+from .consultas import filtrar_contratos
+from .models import Contrato, Tarefa
+from .serializacao_rapida import renderizar_json
+from .streaming import FORMATOS_STREAMING, stream_contratos
+
+
+logger = logging.getLogger(__name__)
+
+FILTROS_TAREFA = ('cpf', 'data_emissao', 'estado')
+
+
+def exportar_contratos(parametros, arquivo):
+    """
+    Exporta os contratos filtrados no formato informado: aninhados, com as parcelas
+    (o mesmo conteúdo do streaming de GET /api/contratos/), ou colunar (csv/arrow)
+    com a tabela de contratos ou de parcelas.
+    """
+    formato = parametros.get('formato', 'ndjson')
+    if formato in exportacao.FORMATOS_EXPORTACAO:
+        for parte in exportacao.exportar(parametros.get('tabela', 'contratos'), formato, parametros):
+            arquivo.write(parte)
+        return exportacao.FORMATOS_EXPORTACAO[formato]
+    queryset = filtrar_contratos(Contrato.objects.all(), parametros, FILTROS_TAREFA).order_by('id')
+    for parte in stream_contratos(queryset, formato):
+        arquivo.write(parte)
+    return FORMATOS_STREAMING[formato]
+
+
+def gerar_resumo(parametros, arquivo):
+    """
+    Calcula o resumo dos contratos filtrados diretamente de Contrato e Parcela
+    (sem a tabela consolidada), opcionalmente agrupado por `group_by`.
+    """
+    queryset = filtrar_contratos(Contrato.objects.all(), parametros, FILTROS_TAREFA)
+    resumo, grupos = calcular_resumo(queryset, parametros.get('group_by'))
+    if grupos is not None:
+        resumo['grupos'] = grupos
+    arquivo.write(renderizar_json(resumo))
+    return 'application/json'
+
+
+# Executores de cada tipo de tarefa: recebem os parâmetros e o arquivo de resultado
+# (binário) e retornam o content type do resultado.
+EXECUTORES = {
+    'exportar_contratos': exportar_contratos,
+    'resumo': gerar_resumo,
+}
+
+
+def caminho_resultado(tarefa):
+    return Path(settings.TAREFAS_DIRETORIO) / tarefa.arquivo_resultado
+
+
+def reservar_proxima():
+    """
+    Reserva a tarefa pendente mais antiga, marcando-a como em execução.
+    O UPDATE é condicional ao status, então dois workers nunca reservam a mesma tarefa.
+    Retorna:
+        Tarefa | None: A tarefa reservada, ou None quando não há tarefas pendentes.
+    """
+    while True:
+        tarefa_id = Tarefa.objects.filter(status=Tarefa.PENDENTE).order_by('id').values_list('id', flat=True).first()
+        if tarefa_id is None:
+            return None
+        reservada = Tarefa.objects.filter(id=tarefa_id, status=Tarefa.PENDENTE).update(
+            status=Tarefa.EXECUTANDO, iniciada_em=timezone.now()
+        )
+        if reservada:
+            return Tarefa.objects.get(id=tarefa_id)
+
+
+def executar(tarefa):
+    """
+    Executa uma tarefa reservada e grava o resultado (ou o erro) na tabela.
+    """
+    diretorio = Path(settings.TAREFAS_DIRETORIO)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    tarefa.arquivo_resultado = f'tarefa_{tarefa.id}'
+    caminho = caminho_resultado(tarefa)
+    try:
+        with open(caminho, 'wb') as arquivo:
+            tarefa.content_type = EXECUTORES[tarefa.tipo](tarefa.parametros, arquivo)
+    except Exception as exc:
+        logger.exception('Falha na tarefa %s', tarefa.id)
+        caminho.unlink(missing_ok=True)
+        tarefa.status = Tarefa.FALHOU
+        tarefa.erro = f'{type(exc).__name__}: {exc}'
+        tarefa.arquivo_resultado = ''
+    else:
+        tarefa.status = Tarefa.CONCLUIDA
+    tarefa.concluida_em = timezone.now()
+    tarefa.save(update_fields=['status', 'erro', 'arquivo_resultado', 'content_type', 'concluida_em'])
+
+
+def executar_por_id(tarefa_id):
+    try:
+        executar(Tarefa.objects.get(id=tarefa_id))
+    finally:
+        connections.close_all()
+
+
+def processar_pendentes():
+    """
+    Executa na thread atual todas as tarefas pendentes, uma de cada vez.
+    Retorna:
+        int: Quantidade de tarefas executadas.
+    """
+    executadas = 0
+    while (tarefa := reservar_proxima()) is not None:
+        executar(tarefa)
+        executadas += 1
+    return executadas
+
+
+def recuperar_interrompidas(expiracao):
+    """
+    Devolve para a fila as tarefas em execução há mais de `expiracao` (timedelta),
+    abandonadas por um worker que foi encerrado no meio da execução.
+    """
+    return Tarefa.objects.filter(status=Tarefa.EXECUTANDO, iniciada_em__lt=timezone.now() - expiracao).update(
+        status=Tarefa.PENDENTE, iniciada_em=None
+    )
+
+
+def criar_pool(workers=None, processos=False):
+    """
+    Cria o pool que executa as tarefas: threads (padrão) ou processos, com um
+    worker por núcleo disponível quando `workers` não é informado.
+    Processos evitam a disputa pelo GIL em tarefas que usam muita CPU (ex: exportações).
+    """
+    workers = workers or os.cpu_count() or 1
+    if processos:
+        # Cada processo inicia o Django antes de receber as tarefas
+        return ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'), initializer=django.setup)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tarefa')
+
+
+def executar_fila(pool, workers, intervalo=1.0, uma_vez=False, expiracao=timedelta(minutes=30)):
+    """
+    Laço do worker: reserva tarefas enquanto houver workers livres no pool e espera
+    por novas tarefas a cada `intervalo` segundos. Com `uma_vez`, termina quando a
+    fila esvazia e todas as tarefas em execução terminam.
+    Retorna:
+        int: Quantidade de tarefas executadas.
+    """
+    em_execucao = set()
+    executadas = 0
+    recuperar_interrompidas(expiracao)
+    while True:
+        while len(em_execucao) < workers and (tarefa := reservar_proxima()) is not None:
+            em_execucao.add(pool.submit(executar_por_id, tarefa.id))
+        if not em_execucao:
+            if uma_vez:
+                return executadas
+            time.sleep(intervalo)
+            continue
+        concluidas, em_execucao = wait(em_execucao, timeout=intervalo, return_when=FIRST_COMPLETED)
+        for futuro in concluidas:
+            if futuro.exception() is not None:
+                logger.error('Erro no worker de tarefas', exc_info=futuro.exception())
+            else:
+                executadas += 1
@@ -0,0 +1,84 @@
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+from django.test import SimpleTestCase
+from .amortizacao import gerar_cronograma, somar_meses
+
+
+class AmortizacaoTest(SimpleTestCase):
+    def test_price_parcelas_fixas(self):
+        """
+        Testa a tabela Price: parcelas iguais, com a última quitando o saldo.
+        """
+        parcelas = gerar_cronograma(Decimal('1000.00'), Decimal('1.00'), 12, date(2025, 2, 17))
+        valores = [parcela['valor_parcela'] for parcela in parcelas]
+
+        self.assertEqual(valores[:11], [Decimal('88.85')] * 11)
+        self.assertEqual(valores[11], Decimal('88.84'))
+        self.assertEqual([parcela['numero_parcela'] for parcela in parcelas], list(range(1, 13)))
+
+    def test_sac_amortizacao_constante(self):
+        parcelas = gerar_cronograma(Decimal('1000.00'), Decimal('1.00'), 12, date(2025, 2, 17), 'sac')
+        valores = [parcela['valor_parcela'] for parcela in parcelas]
+
+        self.assertEqual(valores[0], Decimal('93.33'))
+        self.assertEqual(valores[-1], Decimal('84.16'))
+        self.assertEqual(valores, sorted(valores, reverse=True))
+
+    def test_valores_em_float(self):
+        """
+        Testa que float (usado fora da API) gera o mesmo cronograma do Decimal equivalente,
+        com todas as parcelas em centavos.
+        """
+        for sistema in ('price', 'sac'):
+            for valor, taxa, prazo in ((100000.1, 2.3, 36), (1000.0, 1.1, 12), (0.3, 0.7, 3)):
+                parcelas = gerar_cronograma(valor, taxa, prazo, date(2025, 2, 17), sistema)
+                esperadas = gerar_cronograma(Decimal(str(valor)), Decimal(str(taxa)), prazo, date(2025, 2, 17), sistema)
+                self.assertEqual(parcelas, esperadas)
+                for parcela in parcelas:
+                    self.assertEqual(parcela['valor_parcela'].as_tuple().exponent, -2)
+                self.assertQuitaOSaldo(Decimal(str(valor)), Decimal(str(taxa)), parcelas)
+
+    def assertQuitaOSaldo(self, valor, taxa_percentual, parcelas):
+        """
+        Refaz o saldo devedor com os juros arredondados de cada período: as parcelas
+        somam o valor mais os juros, nenhuma é negativa e o saldo final é zero.
+        """
+        saldo = valor
+        for parcela in parcelas:
+            self.assertGreaterEqual(parcela['valor_parcela'], 0)
+            juros = (saldo * taxa_percentual / 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            amortizacao = parcela['valor_parcela'] - juros
+            self.assertGreaterEqual(amortizacao, 0)
+            saldo -= amortizacao
+        self.assertEqual(saldo, 0)
+
+    def test_price_prazo_longo(self):
+        parcelas = gerar_cronograma(Decimal('123456.78'), Decimal('3'), 360, date(2025, 1, 1))
+        valores = [parcela['valor_parcela'] for parcela in parcelas]
+
+        self.assertEqual(len(valores), 360)
+        self.assertLessEqual(max(valores) - min(valores), Decimal('0.05'))
+        self.assertEqual(sum(valores), Decimal('1333366.06'))
+        self.assertQuitaOSaldo(Decimal('123456.78'), Decimal('3'), parcelas)
+
+    def test_prazo_maximo_com_taxa_alta(self):
+        for sistema in ('price', 'sac'):
+            parcelas = gerar_cronograma(Decimal('999.99'), Decimal('12'), 600, date(2025, 1, 1), sistema)
+            self.assertQuitaOSaldo(Decimal('999.99'), Decimal('12'), parcelas)
+
+        valores = [parcela['valor_parcela'] for parcela in
+                   gerar_cronograma(Decimal('999.99'), Decimal('12'), 600, date(2025, 1, 1))]
+        self.assertLessEqual(max(valores) - min(valores), Decimal('0.05'))
+
+    def test_taxa_zero_soma_o_valor(self):
+        for sistema in ('price', 'sac'):
+            parcelas = gerar_cronograma(Decimal('100.00'), Decimal('0'), 3, date(2025, 1, 1), sistema)
+            self.assertEqual(sum(parcela['valor_parcela'] for parcela in parcelas), Decimal('100.00'))
+
+    def test_vencimentos_mensais_no_fim_do_mes(self):
+        self.assertEqual(somar_meses(date(2025, 1, 31), 1), date(2025, 2, 28))
+        self.assertEqual(somar_meses(date(2024, 12, 31), 2), date(2025, 2, 28))
+
+    def test_prazo_invalido(self):
+        with self.assertRaises(ValueError):
+            gerar_cronograma(Decimal('100.00'), Decimal('1'), 0, date(2025, 1, 1))
@@ -0,0 +1,63 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from . import serializacao_rapida
+from .consultas import com_parcelas
+from .models import Contrato, Parcela
+from .serializers import ContratoSerializer
+from .serializacao_rapida import linhas_contratos, linhas_contratos_em_lotes, renderizar_json
+
+
+class SerializacaoRapidaParidadeTest(TestCase):
+    """
+    Garante que o caminho rápido gera exatamente os mesmos bytes do ContratoSerializer
+    renderizado pelo JSONRenderer do DRF.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        enderecos = [
+            {"estado": "SP", "cidade": "São Paulo", "pais": "Brasil"},
+            {"estado": "RJ", "cidade": "Linha\u2028separada", "pais": "Brasil", "cep": 20000000},
+            {"estado": "MG", "complemento": None, "coordenadas": [-19.9, -43.9], "principal": True},
+        ]
+        for i, endereco in enumerate(enderecos):
+            contrato = Contrato.objects.create(
+                data_emissao=date(2025, 1, 17 + i),
+                data_nascimento_tomador=date(1990, 5, 10),
+                valor_desembolsado=Decimal('1000.5'),
+                numero_documento=f"{i:011d}",
+                endereco_tomador=endereco,
+                telefone_tomador="11987654321",
+                taxa_contrato=Decimal('5'),
+            )
+            # O último contrato fica sem parcelas
+            for numero in range(2 - i, 0, -1):
+                Parcela.objects.create(contrato=contrato, numero_parcela=numero,
+                                       valor_parcela=Decimal('250.1'), data_vencimento=date(2025, 2, numero))
+
+    def renderizar_serializer(self, queryset):
+        return JSONRenderer().render(ContratoSerializer(com_parcelas(queryset), many=True).data)
+
+    def test_paridade(self):
+        queryset = Contrato.objects.order_by('id')
+        self.assertEqual(renderizar_json(linhas_contratos(queryset)), self.renderizar_serializer(queryset))
+
+    def test_paridade_sem_orjson(self):
+        queryset = Contrato.objects.order_by('id')
+        with mock.patch.object(serializacao_rapida, 'orjson', None):
+            self.assertEqual(renderizar_json(linhas_contratos(queryset)), self.renderizar_serializer(queryset))
+
+    def test_paridade_em_lotes(self):
+        queryset = Contrato.objects.order_by('id')
+        self.assertEqual(renderizar_json(list(linhas_contratos_em_lotes(queryset, chunk_size=2))),
+                         self.renderizar_serializer(queryset))
+
+    def test_consultas_constantes(self):
+        with self.assertNumQueries(2):
+            linhas_contratos(Contrato.objects.filter(estado__in=['SP', 'RJ']))
+
+    def test_queryset_vazio(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(linhas_contratos(Contrato.objects.filter(estado='AC')), [])
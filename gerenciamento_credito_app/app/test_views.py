@@ -1,8 +1,30 @@
+import csv
+import gzip
+import json
+import zlib
+from unittest import mock, skipUnless
+from decimal import Decimal
+from django.conf import settings
 from django.contrib.auth.models import User
-from rest_framework.test import APITestCase
+from io import StringIO
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, connections
+import tempfile
+from django.test import AsyncClient, SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework import status
-from .models import Contrato, Parcela
-from datetime import date
+from .models import (AlteracaoContrato, Contrato, ContratoArquivado, Parcela, ParcelaArquivada, ResumoConsolidado, Tarefa,
+                     TokenRevogado)
+from . import (arquivamento, autenticacao, cache_respostas, codificacao_msgpack, compressao, consolidacao, exportacao,
+               limite_taxa, perfilamento, tarefas)
+from .roteamento import RoteadorLeituraEscrita, usar_leitura
+from .serializers import ContratoSerializer
+from datetime import date, timedelta
+from django.utils import timezone
 from django.urls import reverse
 from time import sleep
 
@@ -77,6 +99,30 @@ class ContratoViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['numero_documento'], "10987654321")
 
+    def test_create_contrato_falha_nas_parcelas_nao_deixa_contrato(self):
+        """
+        Testa que uma falha ao gravar as parcelas desfaz também a criação do
+        contrato, sem deixar um contrato órfão no banco.
+        """
+        data = {
+            "data_emissao": "2025-01-18",
+            "data_nascimento_tomador": "1992-02-20",
+            "valor_desembolsado": 1500.00,
+            "numero_documento": "10987654321",
+            "endereco_tomador": {"estado": "RJ", "cidade": "Rio de Janeiro", "pais": "Brasil"},
+            "telefone_tomador": "2123456789",
+            "taxa_contrato": 7.00,
+            "parcelas": [{"numero_parcela": 1, "valor_parcela": 300.00, "data_vencimento": "2025-03-01"}]
+        }
+        serializer = ContratoSerializer(data=data)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        total = Contrato.objects.count()
+        with mock.patch.object(Parcela.objects, 'bulk_create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                serializer.save()
+        self.assertEqual(Contrato.objects.count(), total)
+        self.assertFalse(Contrato.objects.filter(numero_documento="10987654321").exists())
+
     def test_retrieve_contrato(self):
         """
         Testa a recuperação de um contrato específico, verificando se 
@@ -159,3 +205,1507 @@ class ContratoViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]['id'], self.contrato.id)
+
+
+def configuracao_limite_taxa(diretorio):
+    return {**settings.LIMITE_TAXA, 'OPCOES': {'caminho': f'{diretorio}/limite_taxa.sqlite3'}}
+
+
+def limpar_caches():
+    """
+    Limpa todos os caches (respostas) e os contadores do rate limiting para isolar os testes.
+    """
+    for cache in caches.all():
+        cache.clear()
+    limite_taxa.armazenamento().limpar()
+    autenticacao.limpar_cache()
+
+
+def criar_contratos(quantidade, parcelas_por_contrato=3, estado="SP"):
+    """
+    Cria `quantidade` contratos com `parcelas_por_contrato` parcelas cada,
+    inseridas em ordem decrescente de número para validar a ordenação.
+    """
+    contratos = []
+    for i in range(quantidade):
+        contrato = Contrato.objects.create(
+            data_emissao=date(2025, 1, 17),
+            data_nascimento_tomador=date(1990, 5, 10),
+            valor_desembolsado=1000.00,
+            numero_documento=f"{i:011d}",
+            endereco_tomador={"estado": estado, "cidade": "São Paulo", "pais": "Brasil"},
+            telefone_tomador="11987654321",
+            taxa_contrato=5.00
+        )
+        for numero in range(parcelas_por_contrato, 0, -1):
+            Parcela.objects.create(
+                contrato=contrato,
+                numero_parcela=numero,
+                valor_parcela=250.00,
+                data_vencimento=date(2025, 1, 17) + timedelta(days=30 * numero)
+            )
+        contratos.append(contrato)
+    return contratos
+
+
+class ContratoQueryCountTest(APITestCase):
+    """
+    Garante que o número de consultas SQL das rotas de leitura é constante,
+    independente da quantidade de contratos e parcelas retornados.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='consultas', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(consultas), response
+
+    def test_list_numero_de_consultas_constante(self):
+        """
+        Testa que listar 1 ou 20 contratos executa o mesmo número de consultas.
+        """
+        criar_contratos(1)
+        consultas_um, _ = self.contar_consultas('/api/contratos/')
+
+        criar_contratos(19)
+        consultas_vinte, response = self.contar_consultas('/api/contratos/')
+
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(consultas_um, consultas_vinte)
+
+    def test_retrieve_parcelas_em_uma_consulta(self):
+        """
+        Testa que o detalhe do contrato busca as parcelas em uma única consulta
+        e as retorna ordenadas pelo número da parcela.
+        """
+        criar_contratos(1, parcelas_por_contrato=12)
+        contrato = Contrato.objects.get()
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/contratos/{contrato.id}/')
+
+        numeros = [parcela['numero_parcela'] for parcela in response.data['parcelas']]
+        self.assertEqual(numeros, list(range(1, 13)))
+
+
+class ContratoPaginacaoStreamingTest(APITestCase):
+    """
+    Testa a paginação por cursor e o modo streaming da listagem de contratos.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='paginacao', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contratos = criar_contratos(5, parcelas_por_contrato=2)
+
+    def test_paginacao_por_cursor(self):
+        """
+        Testa que as páginas percorrem todos os contratos, em ordem de ID, sem repetição.
+        """
+        response = self.client.get('/api/contratos/?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [contrato['id'] for contrato in response.data['results']]
+
+        while response.data['next_cursor'] is not None:
+            response = self.client.get(f"/api/contratos/?page_size=2&cursor={response.data['next_cursor']}")
+            ids += [contrato['id'] for contrato in response.data['results']]
+
+        self.assertEqual(ids, [contrato.id for contrato in self.contratos])
+        self.assertIsNone(response.data['next'])
+
+    def test_paginacao_cursor_invalido(self):
+        response = self.client.get('/api/contratos/?cursor=abc')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_listagem_sem_paginacao_por_padrao(self):
+        response = self.client.get('/api/contratos/')
+        self.assertEqual(len(response.data), 5)
+
+    def test_streaming_ndjson(self):
+        """
+        Testa que o modo NDJSON envia um contrato por linha, com as parcelas aninhadas.
+        """
+        response = self.client.get('/api/contratos/?stream=ndjson&chunk_size=2&estado=SP')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        linhas = b''.join(response.streaming_content).decode().splitlines()
+        registros = [json.loads(linha) for linha in linhas]
+        self.assertEqual([r['id'] for r in registros], [c.id for c in self.contratos])
+        self.assertEqual(len(registros[0]['parcelas']), 2)
+
+    def test_streaming_json_igual_a_listagem(self):
+        """
+        Testa que o modo JSON em streaming produz o mesmo conteúdo da listagem padrão.
+        """
+        response = self.client.get('/api/contratos/?stream=json')
+        registros = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(registros, json.loads(self.client.get('/api/contratos/').content))
+
+    def test_streaming_formato_invalido(self):
+        response = self.client.get('/api/contratos/?stream=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ResumoAgregacaoTest(APITestCase):
+    """
+    Testa o cálculo do resumo em uma única consulta e os agrupamentos.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='resumo', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        criar_contratos(3, parcelas_por_contrato=4, estado="SP")
+        criar_contratos(2, parcelas_por_contrato=2, estado="RJ")
+
+    def test_resumo_uma_consulta(self):
+        """
+        Testa que o resumo executa uma única consulta e soma as parcelas sem
+        duplicar os valores dos contratos.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/contratos/resumo/')
+
+        self.assertEqual(Decimal(response.data['valor_total_a_receber']), Decimal('4000.00'))
+        self.assertEqual(Decimal(response.data['valor_total_desembolsado']), Decimal('5000.00'))
+        self.assertEqual(response.data['numero_total_de_contratos'], 5)
+        self.assertEqual(Decimal(response.data['taxa_media_dos_contratos']), Decimal('5.00'))
+
+    def test_resumo_group_by_estado(self):
+        """
+        Testa o agrupamento por estado, verificando os totais de cada grupo e o total geral.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/contratos/resumo/?group_by=estado')
+
+        self.assertEqual(response.data['numero_total_de_contratos'], 5)
+        grupos = {grupo['estado']: grupo for grupo in response.data['grupos']}
+        self.assertEqual(grupos['SP']['numero_total_de_contratos'], 3)
+        self.assertEqual(Decimal(grupos['SP']['valor_total_a_receber']), Decimal('3000.00'))
+        self.assertEqual(Decimal(grupos['RJ']['valor_total_a_receber']), Decimal('1000.00'))
+
+    def test_resumo_group_by_mes_com_filtro(self):
+        response = self.client.get('/api/contratos/resumo/?group_by=mes&estado=RJ')
+        self.assertEqual(len(response.data['grupos']), 1)
+        self.assertEqual(response.data['grupos'][0]['numero_total_de_contratos'], 2)
+
+    def test_resumo_group_by_invalido(self):
+        response = self.client.get('/api/contratos/resumo/?group_by=cidade')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_resumo_sem_contratos(self):
+        response = self.client.get('/api/contratos/resumo/?estado=MG')
+        self.assertEqual(response.data, [])
+
+
+class ResumoConsolidadoTest(APITestCase):
+    """
+    Testa a manutenção incremental da tabela consolidada usada pelo resumo.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='consolidado', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.dados = {
+            "data_emissao": "2025-01-18",
+            "data_nascimento_tomador": "1992-02-20",
+            "valor_desembolsado": 1500.00,
+            "numero_documento": "10987654321",
+            "endereco_tomador": {"estado": "RJ", "cidade": "Rio de Janeiro", "pais": "Brasil"},
+            "telefone_tomador": "2123456789",
+            "taxa_contrato": 7.00,
+            "parcelas": [
+                {"numero_parcela": 1, "valor_parcela": 300.00, "data_vencimento": "2025-03-01"},
+                {"numero_parcela": 2, "valor_parcela": 300.00, "data_vencimento": "2025-04-01"},
+            ]
+        }
+
+    def test_consolidado_acompanha_escritas_da_api(self):
+        """
+        Testa que criação, alteração de estado e exclusão mantêm a tabela consolidada
+        igual ao recálculo completo a partir dos contratos.
+        """
+        response = self.client.post('/api/contratos/', self.dados, format='json')
+        contrato_id = response.data['id']
+        linha = ResumoConsolidado.objects.get(estado='RJ')
+        self.assertEqual(linha.valor_total_parcelas, Decimal('600.00'))
+        self.assertEqual(linha.numero_contratos, 1)
+
+        self.dados['endereco_tomador'] = {"estado": "MG", "cidade": "Belo Horizonte", "pais": "Brasil"}
+        self.client.put(f'/api/contratos/{contrato_id}/', self.dados, format='json')
+        self.assertFalse(ResumoConsolidado.objects.filter(estado='RJ').exists())
+        self.assertEqual(consolidacao.verificar(), [])
+
+        response = self.client.get('/api/contratos/resumo/?estado=MG')
+        self.assertEqual(Decimal(response.data['valor_total_a_receber']), Decimal('600.00'))
+
+        self.client.delete(f'/api/contratos/{contrato_id}/')
+        self.assertFalse(ResumoConsolidado.objects.exists())
+
+    def test_comando_reconstruir_resumo(self):
+        """
+        Testa que o comando detecta divergências com --verificar e as corrige ao reconstruir.
+        """
+        criar_contratos(3)
+        ResumoConsolidado.objects.all().delete()
+
+        with self.assertRaises(CommandError):
+            call_command('reconstruir_resumo', '--verificar', stdout=StringIO())
+
+        call_command('reconstruir_resumo', stdout=StringIO())
+        self.assertEqual(consolidacao.verificar(), [])
+        self.assertEqual(ResumoConsolidado.objects.count(), 3)
+
+
+class ContratoBulkTest(APITestCase):
+    """
+    Testa a criação de contratos em lote (POST /api/contratos/bulk/).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='bulk', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def contrato(self, numero_documento, estado="SP", parcelas=2):
+        return {
+            "data_emissao": "2025-01-18",
+            "data_nascimento_tomador": "1992-02-20",
+            "valor_desembolsado": "1500.00",
+            "numero_documento": numero_documento,
+            "endereco_tomador": {"estado": estado, "cidade": "Cidade", "pais": "Brasil"},
+            "telefone_tomador": "2123456789",
+            "taxa_contrato": "7.00",
+            "parcelas": [
+                {"numero_parcela": numero, "valor_parcela": "100.00", "data_vencimento": "2025-03-01"}
+                for numero in range(1, parcelas + 1)
+            ]
+        }
+
+    def test_bulk_json_em_lotes(self):
+        """
+        Testa que o número de consultas depende apenas da quantidade de lotes e não
+        da quantidade de contratos e parcelas de cada lote.
+        """
+        def contar(itens):
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.post('/api/contratos/bulk/?tamanho_lote=20', itens, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(consultas)
+
+        consultas_dois = contar([self.contrato(f"{i:011d}") for i in range(2)])
+        consultas_vinte = contar([self.contrato(f"{i:011d}", parcelas=5) for i in range(100, 120)])
+
+        self.assertEqual(consultas_dois, consultas_vinte)
+        self.assertEqual(Contrato.objects.count(), 22)
+        self.assertEqual(Parcela.objects.count(), 104)
+        self.assertEqual(consolidacao.verificar(), [])
+
+    def test_bulk_falha_parcial(self):
+        itens = [self.contrato("11111111111"), {"numero_documento": "2"}, self.contrato("33333333333")]
+        response = self.client.post('/api/contratos/bulk/', itens, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['criados'], 2)
+        self.assertEqual([r['indice'] for r in response.data['resultados']], [0, 1, 2])
+        self.assertIn('erros', response.data['resultados'][1])
+        self.assertIn('id', response.data['resultados'][2])
+
+    def test_bulk_ndjson(self):
+        corpo = '\n'.join(json.dumps(self.contrato(f"{i:011d}", estado="RJ")) for i in range(3))
+        response = self.client.post('/api/contratos/bulk/', corpo, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Contrato.objects.filter(estado='RJ').count(), 3)
+
+    def test_bulk_todos_invalidos(self):
+        response = self.client.post('/api/contratos/bulk/', [{}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['criados'], 0)
+
+
+class ContratoUpdateParcelasTest(APITestCase):
+    """
+    Testa a reconciliação das parcelas na atualização de contratos.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='reconciliacao', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contrato = criar_contratos(1, parcelas_por_contrato=3)[0]
+        self.dados = {
+            "data_emissao": "2025-01-17",
+            "data_nascimento_tomador": "1990-05-10",
+            "valor_desembolsado": "1000.00",
+            "numero_documento": self.contrato.numero_documento,
+            "endereco_tomador": {"estado": "SP", "cidade": "São Paulo", "pais": "Brasil"},
+            "telefone_tomador": "11987654321",
+            "taxa_contrato": "5.00",
+        }
+
+    def cronograma(self, quantidade, valor="90.00"):
+        return [
+            {"numero_parcela": numero, "valor_parcela": valor, "data_vencimento": "2025-06-01"}
+            for numero in range(1, quantidade + 1)
+        ]
+
+    def test_mesclar_atualiza_por_numero_e_cria_novas(self):
+        self.dados['parcelas'] = self.cronograma(4)
+        response = self.client.put(f'/api/contratos/{self.contrato.id}/', self.dados, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        parcelas = Parcela.objects.filter(contrato=self.contrato)
+        self.assertEqual(parcelas.count(), 4)
+        self.assertEqual(set(parcelas.values_list('valor_parcela', flat=True)), {Decimal('90.00')})
+
+    def test_substituir_remove_parcelas_nao_enviadas(self):
+        primeira = Parcela.objects.get(contrato=self.contrato, numero_parcela=1)
+        self.dados['parcelas'] = [{"id": primeira.id, "numero_parcela": 1, "valor_parcela": "500.00",
+                                   "data_vencimento": "2025-06-01"}]
+        response = self.client.put(f'/api/contratos/{self.contrato.id}/?modo_parcelas=substituir',
+                                   self.dados, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Parcela.objects.filter(contrato=self.contrato).values_list('id', flat=True)),
+                         [primeira.id])
+        self.assertEqual(consolidacao.verificar(), [])
+
+    def test_numero_de_consultas_constante(self):
+        """
+        Testa que substituir um cronograma de 12 ou de 120 parcelas custa o mesmo número de consultas.
+        """
+        def contar(quantidade):
+            self.dados['parcelas'] = self.cronograma(quantidade)
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.put(f'/api/contratos/{self.contrato.id}/?modo_parcelas=substituir',
+                                           self.dados, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(consultas)
+
+        contar(12)
+        self.assertEqual(contar(12), contar(120) - 1)  # 120 parcelas: + 1 INSERT das novas
+        self.assertEqual(Parcela.objects.filter(contrato=self.contrato).count(), 120)
+
+    def test_parcela_de_outro_contrato(self):
+        outra = criar_contratos(1)[0].parcelas.first()
+        self.dados['parcelas'] = [{"id": outra.id, "numero_parcela": 1, "valor_parcela": "1.00",
+                                   "data_vencimento": "2025-06-01"}]
+        response = self.client.put(f'/api/contratos/{self.contrato.id}/', self.dados, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Contrato.objects.get(id=self.contrato.id).parcelas.count(), 3)
+
+
+class ContratoGerarParcelasTest(APITestCase):
+    """
+    Testa a geração das parcelas no servidor (gerar_parcelas).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='amortizacao', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.dados = {
+            "data_emissao": "2025-01-31",
+            "data_nascimento_tomador": "1992-02-20",
+            "valor_desembolsado": "1000.00",
+            "numero_documento": "10987654321",
+            "endereco_tomador": {"estado": "RJ", "cidade": "Rio de Janeiro", "pais": "Brasil"},
+            "telefone_tomador": "2123456789",
+            "taxa_contrato": "1.00",
+            "gerar_parcelas": {"sistema": "sac", "prazo": 12},
+        }
+
+    def test_criar_com_parcelas_geradas(self):
+        response = self.client.post('/api/contratos/', self.dados, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('gerar_parcelas', response.data)
+        self.assertEqual(len(response.data['parcelas']), 12)
+        self.assertEqual(response.data['parcelas'][0]['data_vencimento'], '2025-02-28')
+        self.assertEqual(response.data['parcelas'][0]['valor_parcela'], '93.33')
+
+    def test_bulk_com_parcelas_geradas(self):
+        itens = [dict(self.dados, numero_documento=f"{i:011d}") for i in range(5)]
+        response = self.client.post('/api/contratos/bulk/', itens, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Parcela.objects.count(), 60)
+
+    def test_parcelas_fora_do_limite(self):
+        # Prazo longo com taxa alta: cronograma válido, sem parcelas negativas
+        self.dados.update(valor_desembolsado='999.99', taxa_contrato='12.00',
+                          gerar_parcelas={'sistema': 'price', 'prazo': 600})
+        response = self.client.post('/api/contratos/', self.dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # A parcela única não cabe em valor_parcela (max_digits=10)
+        self.dados.update(valor_desembolsado='99999999.99', taxa_contrato='999.99',
+                          gerar_parcelas={'sistema': 'price', 'prazo': 1})
+        response = self.client.post('/api/contratos/', self.dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('gerar_parcelas', response.data)
+
+    def test_sem_parcelas(self):
+        del self.dados['gerar_parcelas']
+        response = self.client.post('/api/contratos/', self.dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parcelas', response.data)
+
+
+class CacheRespostasTest(APITestCase):
+    """
+    Testa o cache das respostas de leitura, o ETag e a invalidação pelas escritas.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='cache', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contratos = criar_contratos(2)
+
+    def test_listagem_cacheada_com_parametros_normalizados(self):
+        primeira = self.client.get('/api/contratos/?estado=SP&cpf=00000000000')
+        with self.assertNumQueries(0):
+            segunda = self.client.get('/api/contratos/?cpf=00000000000&estado=SP')
+
+        self.assertEqual(primeira['X-Cache'], 'MISS')
+        self.assertEqual(segunda['X-Cache'], 'HIT')
+        self.assertEqual(primeira.content, segunda.content)
+
+    def test_cache_fora_do_projeto(self):
+        # Configurado pelo executor dos testes (executor_testes.py) para todos os módulos
+        localizacao = str(settings.CACHES['respostas']['LOCATION'])
+        self.assertTrue(localizacao.startswith(tempfile.gettempdir()))
+        self.assertFalse(localizacao.startswith(str(settings.BASE_DIR)))
+
+    def test_etag_retorna_304(self):
+        response = self.client.get('/api/contratos/resumo/')
+        response = self.client.get('/api/contratos/resumo/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_escrita_invalida_apenas_o_contrato_alterado(self):
+        """
+        Testa que a escrita em um contrato invalida as listagens, o resumo e o seu
+        detalhe, mas não o detalhe dos demais contratos.
+        """
+        alterado, outro = self.contratos
+        for url in ('/api/contratos/', '/api/contratos/resumo/', f'/api/contratos/{alterado.id}/',
+                    f'/api/contratos/{outro.id}/'):
+            self.client.get(url)
+
+        Parcela.objects.create(contrato=alterado, numero_parcela=4, valor_parcela=10, data_vencimento=date(2025, 9, 1))
+
+        self.assertEqual(self.client.get('/api/contratos/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(f'/api/contratos/{alterado.id}/')['X-Cache'], 'MISS')
+        self.assertEqual(len(json.loads(self.client.get(f'/api/contratos/{alterado.id}/').content)['parcelas']), 4)
+        self.assertEqual(self.client.get(f'/api/contratos/{outro.id}/')['X-Cache'], 'HIT')
+        response = self.client.get('/api/contratos/resumo/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(Decimal(response.data['valor_total_a_receber']), Decimal('1510.00'))
+
+    def test_invalidacao_vale_para_os_demais_workers(self):
+        self.assertEqual(self.client.get('/api/contratos/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/contratos/')['X-Cache'], 'HIT')
+
+        # Outro worker: instância própria do backend, no mesmo diretório
+        configuracao = settings.CACHES['respostas']
+        outro_worker = cache_respostas.FileBasedCacheComMetricas(configuracao['LOCATION'], configuracao)
+        with mock.patch.object(cache_respostas, '_cache', return_value=outro_worker):
+            cache_respostas.invalidar([self.contratos[0].id])
+
+        self.assertEqual(self.client.get('/api/contratos/')['X-Cache'], 'MISS')
+
+    def test_cache_por_usuario(self):
+        self.client.get('/api/contratos/')
+        outro = User.objects.create_user(username='cache2', password='testpassword')
+        self.client.force_authenticate(user=outro)
+        self.assertEqual(self.client.get('/api/contratos/')['X-Cache'], 'MISS')
+
+    def test_metricas(self):
+        self.client.get('/api/contratos/')
+        self.client.get('/api/contratos/')
+        response = self.client.get('/api/cache/metricas/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for metrica in ('acertos', 'falhas', 'taxa_de_acerto', 'remocoes', 'invalidacoes'):
+            self.assertIn(metrica, response.data)
+        self.assertGreaterEqual(response.data['acertos'], 1)
+
+
+@override_settings(PERFILAMENTO={'ATIVO': True, 'AMOSTRAGEM_CPROFILE': 1.0, 'LIMITE_LENTO_MS': 0, 'MAXIMO_PERFIS': 2})
+class PerfilamentoTest(APITestCase):
+    """
+    Testa o PerfilamentoMiddleware: Server-Timing, métricas por endpoint e perfis cProfile.
+    """
+    def setUp(self):
+        limpar_caches()
+        perfilamento.limpar_metricas()
+        self.user = User.objects.create_user(username='perfil', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        criar_contratos(5)
+
+    def test_server_timing(self):
+        response = self.client.get('/api/contratos/?page_size=10')
+
+        metricas = response['Server-Timing']
+        for metrica in ('total;dur=', 'db;dur=', 'serializacao;dur=', 'renderizacao;dur='):
+            self.assertIn(metrica, metricas)
+        self.assertIn('2 consultas, 0 repetidas', metricas)
+
+    def test_metricas_por_endpoint(self):
+        self.client.get('/api/contratos/')
+        self.client.get('/api/contratos/')
+        response = self.client.get('/api/perfilamento/metricas/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        listagem = response.data['endpoints']['GET contrato-list']
+        self.assertEqual(listagem['requisicoes'], 2)
+        self.assertEqual(listagem['requisicoes_com_repeticao'], 0)
+        self.assertGreater(listagem['bytes_medio'], 0)
+        self.assertEqual(sum(listagem['histograma_ms'].values()), 2)
+
+    def test_perfis_das_requisicoes_lentas(self):
+        for _ in range(3):
+            self.client.get('/api/contratos/resumo/')
+
+        perfis = perfilamento.obter_metricas()['perfis']
+        self.assertEqual(len(perfis), 2)
+        self.assertEqual(perfis[0]['endpoint'], 'GET contrato-resumo')
+        self.assertIn('cumulative', perfis[0]['estatisticas'])
+
+    @override_settings(PERFILAMENTO={'ATIVO': False})
+    def test_desativado_por_padrao(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/contratos/'))
+
+
+class ContratoAssincronoTest(APITestCase):
+    """
+    Testa os endpoints assíncronos de leitura (/api/async/contratos/).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='assincrono', password='testpassword')
+        self.token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.contratos = criar_contratos(3) + criar_contratos(2, estado='RJ')
+
+    def test_respostas_iguais_aos_endpoints_sincronos(self):
+        contrato_id = self.contratos[0].id
+        for parametros in ('', '?estado=RJ', '?page_size=2', f'?page_size=2&cursor={contrato_id}'):
+            sincrona = self.client.get(f'/api/contratos/{parametros}')
+            assincrona = self.client.get(f'/api/async/contratos/{parametros}')
+            self.assertEqual(assincrona.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                json.loads(assincrona.content.replace(b'/api/async/', b'/api/')), json.loads(sincrona.content)
+            )
+
+        for url in (f'contratos/{contrato_id}/', 'contratos/resumo/', 'contratos/resumo/?group_by=estado',
+                    'contratos/resumo/?cpf=nao_existe'):
+            self.assertEqual(self.client.get(f'/api/async/{url}').content, self.client.get(f'/api/{url}').content)
+
+    def test_mesmos_parametros_dos_endpoints_sincronos(self):
+        arquivado = self.contratos[-1]
+        arquivamento.arquivar(Contrato.objects.filter(id=arquivado.id))
+        for parametros in ('?q=sp', '?q=rj&limite=1', '?fields=id,numero_documento',
+                           '?exclude=parcelas&include=parcelas_summary&page_size=2',
+                           '?include_archived=true', '?include_archived=true&estado=RJ&page_size=1'):
+            sincrona = self.client.get(f'/api/contratos/{parametros}')
+            assincrona = self.client.get(f'/api/async/contratos/{parametros}')
+            self.assertEqual(assincrona.status_code, status.HTTP_200_OK, parametros)
+            self.assertTrue(json.loads(sincrona.content), parametros)
+            self.assertEqual(json.loads(assincrona.content.replace(b'/api/async/', b'/api/')),
+                             json.loads(sincrona.content), parametros)
+
+        for url in (f'contratos/{arquivado.id}/?include_archived=true', 'contratos/resumo/?include_archived=true',
+                    'contratos/resumo/?include_archived=true&group_by=estado'):
+            self.assertEqual(self.client.get(f'/api/async/{url}').content, self.client.get(f'/api/{url}').content)
+        self.assertEqual(self.client.get(f'/api/async/contratos/{arquivado.id}/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_parametros_nao_suportados(self):
+        for parametros in ('?stream=ndjson', '?fields=cidade', '?q=sp&limite=x'):
+            response = self.client.get(f'/api/async/contratos/{parametros}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, parametros)
+
+    async def test_cliente_assincrono(self):
+        response = await AsyncClient().get(
+            '/api/async/contratos/resumo/', headers={'Authorization': f'Bearer {self.token}'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['numero_total_de_contratos'], 5)
+
+    def test_erros(self):
+        self.assertEqual(self.client.get('/api/async/contratos/999999/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/async/contratos/?cursor=abc').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get('/api/async/contratos/resumo/?group_by=cidade')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('group_by', json.loads(response.content))
+        self.assertEqual(self.client.post('/api/async/contratos/').status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+        self.client.credentials()
+        response = self.client.get('/api/async/contratos/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response['WWW-Authenticate'], 'Bearer realm="api"')
+
+
+class RoteamentoTest(SimpleTestCase):
+    """
+    Testa o router que envia as leituras da API para a conexão somente leitura.
+    """
+    def setUp(self):
+        self.router = RoteadorLeituraEscrita()
+
+    def test_leituras_e_escritas(self):
+        self.assertIsNone(self.router.db_for_read(Contrato))
+        with usar_leitura():
+            self.assertEqual(self.router.db_for_read(Contrato), 'leitura')
+            self.assertEqual(self.router.db_for_write(Contrato), 'default')
+        self.assertIsNone(self.router.db_for_read(Contrato))
+
+    def test_leitura_dentro_de_transacao_usa_conexao_principal(self):
+        with usar_leitura(), mock.patch.object(connection, 'in_atomic_block', True):
+            self.assertIsNone(self.router.db_for_read(Contrato))
+
+    def test_sem_migracoes_na_conexao_de_leitura(self):
+        self.assertFalse(self.router.allow_migrate('leitura', 'gerenciamento_credito_app'))
+        self.assertTrue(self.router.allow_migrate('default', 'gerenciamento_credito_app'))
+
+
+class LeituraStreamingTest(TransactionTestCase):
+    """
+    Testa que os corpos em streaming (stream e exportar), consumidos depois da view,
+    também são lidos pela conexão somente leitura. Fora de uma transação (TestCase),
+    para que o router use a conexão `leitura`.
+    """
+    databases = {'default', 'leitura'}
+
+    def setUp(self):
+        limpar_caches()
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='streaming', password='testpassword'))
+        criar_contratos(3)
+
+    def test_streaming_nao_usa_a_conexao_principal(self):
+        for url in ('/api/contratos/?stream=ndjson&chunk_size=2', '/api/contratos/exportar/?chunk_size=2',
+                    '/api/contratos/exportar/?tabela=parcelas&formato=arrow'):
+            with CaptureQueriesContext(connections['default']) as principal, \
+                    CaptureQueriesContext(connections['leitura']) as leitura:
+                response = self.client.get(url)
+                corpo = b''.join(response.streaming_content)
+            self.assertTrue(corpo, url)
+            self.assertEqual([consulta['sql'] for consulta in principal.captured_queries], [], url)
+            self.assertTrue(leitura.captured_queries, url)
+
+
+class TarefasTest(APITestCase):
+    """
+    Testa a fila de tarefas em segundo plano: criação, status e download do resultado.
+    """
+    def setUp(self):
+        limpar_caches()
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        configuracao = override_settings(TAREFAS_DIRETORIO=diretorio.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.user = User.objects.create_user(username='tarefas', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        criar_contratos(3)
+        criar_contratos(2, estado='RJ')
+
+    def test_exportacao(self):
+        response = self.client.post('/api/tarefas/', {'tipo': 'exportar_contratos', 'parametros': {'estado': 'RJ'}},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Tarefa.PENDENTE)
+        self.assertEqual(response.data['parametros'], {'estado': 'RJ', 'formato': 'ndjson', 'tabela': 'contratos'})
+        url = response['Location']
+
+        self.assertEqual(self.client.get(f'{url}resultado/').status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(tarefas.processar_pendentes(), 1)
+
+        tarefa = self.client.get(url).data
+        self.assertEqual(tarefa['status'], Tarefa.CONCLUIDA)
+        response = self.client.get(tarefa['resultado'])
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        linhas = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(linha)['endereco_tomador']['estado'] for linha in linhas], ['RJ', 'RJ'])
+
+    def test_resumo_igual_ao_endpoint(self):
+        self.client.post('/api/tarefas/', {'tipo': 'resumo', 'parametros': {'group_by': 'estado'}}, format='json')
+        tarefas.processar_pendentes()
+
+        tarefa = Tarefa.objects.get()
+        with open(tarefas.caminho_resultado(tarefa), 'rb') as arquivo:
+            resultado = json.loads(arquivo.read())
+        self.assertEqual(resultado, json.loads(self.client.get('/api/contratos/resumo/?group_by=estado').content))
+
+    def test_parametros_invalidos(self):
+        response = self.client.post('/api/tarefas/', {'tipo': 'resumo', 'parametros': {'group_by': 'cidade'}},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('group_by', response.data['parametros'])
+        response = self.client.post('/api/tarefas/', {'tipo': 'desconhecido'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_falha_e_isolamento_por_usuario(self):
+        tarefa = Tarefa.objects.create(tipo='exportar_contratos', parametros={'formato': 'xml'}, usuario=self.user)
+        with self.assertLogs(tarefas.logger, 'ERROR'):
+            tarefas.processar_pendentes()
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, Tarefa.FALHOU)
+        self.assertIn('KeyError', tarefa.erro)
+
+        outro = User.objects.create_user(username='tarefas2', password='testpassword')
+        self.client.force_authenticate(user=outro)
+        self.assertEqual(self.client.get(f'/api/tarefas/{tarefa.id}/').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProcessarTarefasCommandTest(TransactionTestCase):
+    """
+    Testa o comando processar_tarefas com o pool de threads.
+    """
+    def test_executa_pendentes(self):
+        criar_contratos(2)
+        with tempfile.TemporaryDirectory() as diretorio, override_settings(TAREFAS_DIRETORIO=diretorio):
+            for _ in range(3):
+                Tarefa.objects.create(tipo='resumo')
+            Tarefa.objects.create(tipo='resumo', status=Tarefa.EXECUTANDO,
+                                  iniciada_em=timezone.now() - timedelta(hours=1))
+
+            saida = StringIO()
+            call_command('processar_tarefas', '--uma-vez', '--workers', '2', stdout=saida)
+
+        self.assertIn('4 tarefa(s) executada(s)', saida.getvalue())
+        self.assertEqual(Tarefa.objects.filter(status=Tarefa.CONCLUIDA).count(), 4)
+
+
+class ExportacaoColunarTest(APITestCase):
+    """
+    Testa a exportação colunar de contratos e parcelas (CSV e Arrow).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='exportacao', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contratos = criar_contratos(3) + criar_contratos(2, estado='RJ')
+
+    def ler_csv(self, response):
+        return list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_csv_contratos(self):
+        response = self.client.get('/api/contratos/exportar/?estado=RJ&chunk_size=1')
+
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('contratos.csv', response['Content-Disposition'])
+        linhas = self.ler_csv(response)
+        self.assertEqual([int(linha['id']) for linha in linhas], [contrato.id for contrato in self.contratos[3:]])
+        self.assertEqual(linhas[0]['estado'], 'RJ')
+        self.assertEqual(linhas[0]['cidade'], 'São Paulo')
+        self.assertEqual(linhas[0]['valor_desembolsado'], '1000.00')
+        self.assertEqual(linhas[0]['data_emissao'], self.contratos[3].data_emissao.isoformat())
+
+    def test_csv_parcelas_filtradas_pelo_contrato(self):
+        contrato = self.contratos[0]
+        response = self.client.get(f'/api/contratos/exportar/?tabela=parcelas&id={contrato.id}')
+
+        linhas = self.ler_csv(response)
+        self.assertEqual(list(linhas[0]), [nome for nome, _ in exportacao.COLUNAS['parcelas']])
+        self.assertEqual({int(linha['contrato_id']) for linha in linhas}, {contrato.id})
+        self.assertEqual(len(self.ler_csv(self.client.get('/api/contratos/exportar/?tabela=parcelas'))), 15)
+
+    def test_parametros_invalidos(self):
+        for parametros in ('tabela=enderecos', 'formato=xlsx', 'chunk_size=abc'):
+            response = self.client.get(f'/api/contratos/exportar/?{parametros}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comando(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as arquivo:
+            call_command('exportar_contratos', arquivo.name, '--tabela', 'parcelas', '--estado', 'SP',
+                         '--chunk-size', '2', stdout=StringIO())
+            with open(arquivo.name) as conteudo:
+                linhas = list(csv.DictReader(conteudo))
+        self.assertEqual(len(linhas), 9)
+
+    def test_arrow(self):
+        response = self.client.get('/api/contratos/exportar/?formato=arrow&chunk_size=2')
+
+        tabela = exportacao.pyarrow.ipc.open_stream(b''.join(response.streaming_content)).read_all()
+        self.assertEqual(tabela.num_rows, 5)
+        self.assertEqual(tabela.column_names, [nome for nome, _ in exportacao.COLUNAS['contratos']])
+
+
+class AnaliseCarteiraTest(APITestCase):
+    """
+    Testa os indicadores da carteira (atraso, fluxo projetado, taxa ponderada e prazos).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='carteira', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        # Vencimentos em 16/02, 18/03 e 17/04/2025
+        criar_contratos(3)
+        criar_contratos(2, estado='RJ')
+
+    def test_indicadores(self):
+        response = self.client.get('/api/contratos/carteira/?estado=SP&data_referencia=2025-04-01')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dados = response.json()
+        self.assertEqual(dados['numero_contratos'], 3)
+        self.assertEqual(dados['taxa_media_ponderada'], 5.0)
+        self.assertEqual(dados['valor_em_atraso'], 1500.0)
+        self.assertEqual(dados['valor_a_vencer'], 750.0)
+        self.assertEqual(
+            {faixa['faixa']: (faixa['valor'], faixa['quantidade']) for faixa in dados['atraso']},
+            {'1-30': (750.0, 3), '31-60': (750.0, 3), '61-90': (0, 0), '91-180': (0, 0), '181+': (0, 0)},
+        )
+        self.assertEqual(dados['fluxo_projetado'], [{'mes': '2025-04-01', 'valor': 750.0, 'quantidade': 3}])
+        # 16 dias até o vencimento
+        self.assertEqual(dados['prazo_medio_meses'], 0.53)
+        self.assertEqual(dados['duration_meses'], 0.53)
+
+    def test_sem_atraso_e_taxa_ponderada(self):
+        Contrato.objects.filter(endereco_tomador__estado='RJ').update(taxa_contrato=2.00, valor_desembolsado=3000)
+
+        dados = self.client.get('/api/contratos/carteira/?data_referencia=2025-01-17').json()
+
+        self.assertEqual(dados['numero_contratos'], 5)
+        # (3 * 1000 * 5 + 2 * 3000 * 2) / 9000
+        self.assertEqual(dados['taxa_media_ponderada'], 3.0)
+        self.assertEqual(dados['valor_em_atraso'], 0)
+        self.assertEqual([mes['mes'] for mes in dados['fluxo_projetado']], ['2025-02-01', '2025-03-01', '2025-04-01'])
+        self.assertLess(dados['duration_meses'], dados['prazo_medio_meses'])
+
+    def test_data_referencia_invalida(self):
+        response = self.client.get('/api/contratos/carteira/?data_referencia=01/04/2025')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@mock.patch.object(limite_taxa.LimiteTaxaThrottle, 'THROTTLE_RATES',
+                   {'user': '3/minute', 'anon': '3/minute', 'resumo': '2/minute', 'bulk': '1/minute'})
+class LimiteTaxaTest(APITestCase):
+    """
+    Testa o rate limiting por janela deslizante e os escopos por endpoint.
+    """
+    def setUp(self):
+        # Cada teste com o seu próprio arquivo de contadores
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        configuracao = override_settings(LIMITE_TAXA=configuracao_limite_taxa(diretorio.name))
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        limpar_caches()
+        self.user = User.objects.create_user(username='limite', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def requisitar(self, quantidade, url='/api/contratos/'):
+        return [self.client.get(url).status_code for _ in range(quantidade)]
+
+    def test_limite_por_usuario(self):
+        self.assertEqual(self.requisitar(4), [200, 200, 200, 429])
+
+        response = self.client.get('/api/contratos/')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        # Outro usuário tem o seu próprio contador
+        self.client.force_authenticate(user=User.objects.create_user(username='outro', password='testpassword'))
+        self.assertEqual(self.requisitar(1), [200])
+
+    def test_escopos_com_orcamento_proprio(self):
+        self.assertEqual(self.requisitar(3, '/api/contratos/resumo/'), [200, 200, 429])
+        # O resumo não consome o orçamento geral do usuário
+        self.assertEqual(self.requisitar(4), [200, 200, 200, 429])
+
+        response = self.client.post('/api/contratos/bulk/', [], format='json')
+        self.assertNotEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        response = self.client.post('/api/contratos/bulk/', [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_contadores_fora_do_projeto(self):
+        self.requisitar(1)
+        caminho = limite_taxa.armazenamento().caminho
+        self.assertTrue(caminho.startswith(tempfile.gettempdir()))
+        self.assertFalse(caminho.startswith(str(settings.BASE_DIR)))
+
+    def test_janela_deslizante(self):
+        relogio = mock.Mock(return_value=60 * 1000)
+        with mock.patch.object(limite_taxa.LimiteTaxaThrottle, 'timer', relogio):
+            self.assertEqual(self.requisitar(4), [200, 200, 200, 429])
+
+            # Na metade da janela seguinte, as 3 requisições da anterior contam como 1,5
+            relogio.return_value = 60 * 1001 + 30
+            self.assertEqual(self.requisitar(2), [200, 429])
+
+            # Uma janela inteira depois, a janela anterior não conta mais
+            relogio.return_value = 60 * 1003
+            self.assertEqual(self.requisitar(4), [200, 200, 200, 429])
+
+    @override_settings(LIMITE_TAXA={'ARMAZENAMENTO': 'gerenciamento_credito_app.app.limite_taxa.ArmazenamentoCache',
+                                    'OPCOES': {}})
+    def test_armazenamento_em_cache(self):
+        self.assertIsInstance(limite_taxa.armazenamento(), limite_taxa.ArmazenamentoCache)
+        with mock.patch.object(limite_taxa.LimiteTaxaThrottle, 'timer', mock.Mock(return_value=60 * 1000)):
+            self.assertEqual(self.requisitar(4), [200, 200, 200, 429])
+        # Requisições recusadas não são contabilizadas: o contador da janela ficou em 3
+        contador, _ = limite_taxa.armazenamento().registrar(f'limite:user:{self.user.pk}', 1000, 60 * 1002, 60 * 1000)
+        self.assertEqual(contador, 4)
+
+
+class AutenticacaoJWTTest(APITestCase):
+    """
+    Testa o cache de tokens JWT verificados e a revogação de tokens.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='jwt', password='testpassword')
+        self.token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def consultas_autenticacao(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/contratos/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [consulta['sql'] for consulta in consultas if 'auth_user' in consulta['sql'] or 'tokenrevogado' in consulta['sql']]
+
+    def test_caminho_rapido_sem_criptografia_e_sem_consultas(self):
+        self.assertEqual(len(self.consultas_autenticacao()), 2)
+
+        with mock.patch.object(autenticacao.JWTAuthenticationComCache, 'get_validated_token') as validar:
+            self.assertEqual(self.consultas_autenticacao(), [])
+        validar.assert_not_called()
+
+    @override_settings(AUTENTICACAO_JWT={'REVALIDAR_APOS': 0})
+    def test_revalidacao_periodica(self):
+        self.consultas_autenticacao()
+        # Revogação feita em outro processo (sem o signal deste processo)
+        TokenRevogado.objects.bulk_create([TokenRevogado(jti=self.token['jti'], expira_em=timezone.now() + timedelta(days=1))])
+
+        self.assertEqual(self.client.get('/api/contratos/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revogar_proprio_token(self):
+        self.consultas_autenticacao()
+
+        self.assertEqual(self.client.post('/api/token/revogar/').status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.get('/api/contratos/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'token_revoked')
+
+    def test_revogar_outro_token(self):
+        outro = AccessToken.for_user(self.user)
+        response = self.client.post('/api/token/revogar/', {'token': str(outro)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertEqual(self.client.get('/api/contratos/').status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {outro}')
+        self.assertEqual(self.client.get('/api/contratos/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        token_alheio = AccessToken.for_user(User.objects.create_user(username='alheio', password='testpassword'))
+        response = self.client.post('/api/token/revogar/', {'token': str(token_alheio)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_usuario_desativado(self):
+        self.consultas_autenticacao()
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get('/api/contratos/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_lru_limitado(self):
+        cache = autenticacao.CacheTokens(2)
+        cache.guardar('a', {})
+        cache.guardar('b', {})
+        cache.obter('a')
+        cache.guardar('c', {})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.obter('b'))
+        self.assertIsNotNone(cache.obter('a'))
+
+
+class BuscaContratosTest(APITestCase):
+    """
+    Testa a busca por CPF parcial, telefone, cidade e estado (?q=) e a manutenção do índice.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='busca', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.ribeirao = self.criar('12345678901', '16991234567', 'Ribeirão Preto', 'SP')
+        self.niteroi = self.criar('98765432100', '21912345123', 'Niterói', 'RJ')
+        self.santos = self.criar('55544433322', '13988887777', 'Santos', 'SP')
+
+    def criar(self, numero_documento, telefone, cidade, estado):
+        return Contrato.objects.create(
+            data_emissao=date(2025, 1, 17), data_nascimento_tomador=date(1990, 5, 10), valor_desembolsado=1000,
+            numero_documento=numero_documento, telefone_tomador=telefone, taxa_contrato=5,
+            endereco_tomador={"estado": estado, "cidade": cidade, "pais": "Brasil"},
+        )
+
+    def buscar(self, parametros):
+        response = self.client.get(f'/api/contratos/?{parametros}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [contrato['id'] for contrato in response.json()]
+
+    def test_cpf_telefone_cidade_e_estado(self):
+        self.assertEqual(self.buscar('q=45678'), [self.ribeirao.id])
+        self.assertEqual(self.buscar('q=123.456'), [self.ribeirao.id])
+        self.assertEqual(self.buscar('q=88887'), [self.santos.id])
+        self.assertEqual(self.buscar('q=ribeirao'), [self.ribeirao.id])
+        self.assertEqual(self.buscar('q=NITERÓI'), [self.niteroi.id])
+        self.assertEqual(self.buscar('q=RJ'), [self.niteroi.id])
+        self.assertEqual(self.buscar('q=preto 991'), [self.ribeirao.id])
+        self.assertEqual(self.buscar('q=preto 555'), [])
+        self.assertEqual(self.buscar('q='), [])
+
+    def test_ordem_por_relevancia_e_filtros(self):
+        # '12345' está no CPF do primeiro contrato e no telefone do segundo
+        self.assertEqual(self.buscar('q=12345'), [self.ribeirao.id, self.niteroi.id])
+        self.assertEqual(self.buscar('q=12345&estado=RJ'), [self.niteroi.id])
+        self.assertEqual(self.buscar('q=12345&limite=1'), [self.ribeirao.id])
+
+    def test_indice_atualizado_nas_escritas(self):
+        response = self.client.patch(f'/api/contratos/{self.santos.id}/', {
+            'endereco_tomador': {'estado': 'SP', 'cidade': 'Guarujá', 'pais': 'Brasil'}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.buscar('q=guaruja'), [self.santos.id])
+        self.assertEqual(self.buscar('q=santos'), [])
+
+        self.client.delete(f'/api/contratos/{self.niteroi.id}/')
+        self.assertEqual(self.buscar('q=niteroi'), [])
+
+    def test_reconstruir_busca(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM contrato_busca')
+        self.assertEqual(self.buscar('q=santos'), [])
+
+        call_command('reconstruir_busca', stdout=StringIO())
+        limpar_caches()
+        self.assertEqual(self.buscar('q=santos'), [self.santos.id])
+
+
+class CamposSelecionadosTest(APITestCase):
+    """
+    Testa a escolha de campos da listagem (fields, include, exclude e parcelas_summary).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='campos', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contratos = criar_contratos(2, parcelas_por_contrato=3)
+        self.sem_parcelas = criar_contratos(1, parcelas_por_contrato=0)[0]
+        self.sem_parcelas.numero_documento = '99999999999'
+        self.sem_parcelas.save()
+
+    def listar(self, parametros):
+        response = self.client.get(f'/api/contratos/?{parametros}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_fields(self):
+        with self.assertNumQueries(1):
+            dados = self.listar('fields=numero_documento,valor_desembolsado')
+        self.assertEqual(dados[0], {'id': self.contratos[0].id, 'numero_documento': self.contratos[0].numero_documento,
+                                    'valor_desembolsado': f'{self.contratos[0].valor_desembolsado:.2f}'})
+
+        dados = self.listar('fields=id&include=parcelas')
+        self.assertEqual(set(dados[0]), {'id', 'parcelas'})
+        self.assertEqual(len(dados[0]['parcelas']), 3)
+
+    def test_exclude_e_padrao(self):
+        completo = self.listar('')
+        dados = self.listar('exclude=parcelas,endereco_tomador')
+        esperado = [{campo: valor for campo, valor in contrato.items() if campo not in ('parcelas', 'endereco_tomador')}
+                    for contrato in completo]
+        self.assertEqual(dados, esperado)
+        self.assertEqual(self.listar('fields=&include=&exclude='), completo)
+
+    def test_parcelas_summary(self):
+        # Uma parcela vencida e duas a vencer: o próximo vencimento é o mais próximo de hoje
+        for parcela in Parcela.objects.filter(contrato=self.contratos[0]):
+            parcela.data_vencimento = date.today() + timedelta(days=30 * (parcela.numero_parcela - 1) - 1)
+            parcela.save()
+        esperado = {
+            'quantidade': 3,
+            'valor_total': '750.00',
+            'proximo_vencimento': (date.today() + timedelta(days=29)).isoformat(),
+        }
+
+        with self.assertNumQueries(2):
+            dados = self.listar('fields=numero_documento&include=parcelas_summary')
+        self.assertEqual(dados[0]['parcelas_summary'], esperado)
+        self.assertNotIn('parcelas', dados[0])
+        self.assertEqual(dados[2]['parcelas_summary'],
+                         {'quantidade': 0, 'valor_total': '0.00', 'proximo_vencimento': None})
+
+        # Com as parcelas completas, o resumo é calculado a partir delas
+        dados = self.listar('include=parcelas_summary')
+        self.assertEqual(dados[0]['parcelas_summary'], esperado)
+        self.assertEqual(len(dados[0]['parcelas']), 3)
+
+    def test_paginacao_streaming_e_busca(self):
+        dados = self.listar('fields=numero_documento&page_size=2')
+        self.assertEqual(dados['results'], [{'id': contrato.id, 'numero_documento': contrato.numero_documento}
+                                            for contrato in self.contratos])
+        self.assertEqual(dados['next_cursor'], self.contratos[1].id)
+
+        response = self.client.get('/api/contratos/?stream=ndjson&fields=id&include=parcelas_summary&chunk_size=2')
+        linhas = [json.loads(linha) for linha in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([linha['parcelas_summary']['quantidade'] for linha in linhas], [3, 3, 0])
+
+        cpf = self.contratos[0].numero_documento
+        self.assertEqual(self.listar(f'q={cpf}&fields=numero_documento'),
+                         [{'id': self.contratos[0].id, 'numero_documento': cpf}])
+
+    def test_campo_invalido(self):
+        response = self.client.get('/api/contratos/?fields=id,senha')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', response.json())
+
+
+class AlteracoesContratoTest(APITestCase):
+    """
+    Testa o feed de alterações (GET /api/contratos/changes/?since=).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='alteracoes', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contratos = criar_contratos(3, parcelas_por_contrato=2)
+
+    def alteracoes(self, parametros=''):
+        response = self.client.get(f'/api/contratos/changes/?{parametros}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_carga_inicial_paginada(self):
+        dados = self.alteracoes('since=0&page_size=2')
+        self.assertEqual([alteracao['id'] for alteracao in dados['results']],
+                         [contrato.id for contrato in self.contratos[:2]])
+        self.assertTrue(dados['has_more'])
+        self.assertEqual(dados['results'][0]['contrato'], self.client.get(
+            f'/api/contratos/{self.contratos[0].id}/').json())
+
+        dados = self.alteracoes(f"since={dados['next_since']}&page_size=2")
+        self.assertEqual([alteracao['id'] for alteracao in dados['results']], [self.contratos[2].id])
+        self.assertFalse(dados['has_more'])
+
+        vazio = self.alteracoes(f"since={dados['next_since']}")
+        self.assertEqual(vazio, {'results': [], 'next_since': dados['next_since'], 'has_more': False})
+
+    def test_alteracao_remocao_e_parcelas(self):
+        since = self.alteracoes()['next_since']
+
+        self.client.patch(f'/api/contratos/{self.contratos[1].id}/', {'telefone_tomador': '11900000000'}, format='json')
+        self.client.delete(f'/api/contratos/{self.contratos[0].id}/')
+        Parcela.objects.filter(contrato=self.contratos[2]).first().delete()
+        self.client.patch(f'/api/contratos/{self.contratos[1].id}/', {'taxa_contrato': '6.00'}, format='json')
+
+        dados = self.alteracoes(f'since={since}&fields=telefone_tomador,taxa_contrato')
+        resultados = dados['results']
+        # Cada contrato aparece uma vez, na posição da sua última alteração
+        self.assertEqual([alteracao['id'] for alteracao in resultados],
+                         [self.contratos[0].id, self.contratos[2].id, self.contratos[1].id])
+        self.assertEqual(resultados[0], {'seq': resultados[0]['seq'], 'id': self.contratos[0].id,
+                                         'removido': True, 'contrato': None})
+        self.assertEqual(resultados[2]['contrato'], {'id': self.contratos[1].id, 'telefone_tomador': '11900000000',
+                                                     'taxa_contrato': '6.00'})
+        self.assertEqual(dados['next_since'], resultados[-1]['seq'])
+        self.assertEqual(AlteracaoContrato.objects.count(), 3)
+
+    def test_bulk_registra_alteracoes(self):
+        since = self.alteracoes()['next_since']
+        contrato = self.client.get(f'/api/contratos/{self.contratos[0].id}/').json()
+        del contrato['id']
+        response = self.client.post('/api/contratos/bulk/', [contrato, contrato], format='json')
+        criados = [resultado['id'] for resultado in response.json()['resultados']]
+        self.assertEqual([alteracao['id'] for alteracao in self.alteracoes(f'since={since}')['results']], criados)
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/api/contratos/changes/?since=abc').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get('/api/contratos/changes/?page_size=x').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+
+class CompressaoCodificacaoTest(APITestCase):
+    """
+    Testa a negociação do MessagePack e a compressão das respostas (inclusive em streaming).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='compressao', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.contratos = criar_contratos(20, parcelas_por_contrato=3)
+
+    def test_msgpack(self):
+        dados = self.client.get('/api/contratos/').json()
+        for response in (self.client.get('/api/contratos/', HTTP_ACCEPT='application/msgpack'),
+                         self.client.get('/api/contratos/?format=msgpack')):
+            self.assertEqual(response['Content-Type'], 'application/msgpack')
+            self.assertEqual(response.content, codificacao_msgpack.codificar(dados))
+            self.assertLess(len(response.content), len(json.dumps(dados, separators=(',', ':')).encode()))
+
+        response = self.client.get('/api/contratos/?stream=msgpack&chunk_size=7')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(b''.join(response.streaming_content),
+                         b''.join(codificacao_msgpack.codificar(contrato) for contrato in dados))
+
+    def test_codificacao_msgpack(self):
+        with mock.patch.object(codificacao_msgpack, 'msgpack', None):
+            self.assertEqual(codificacao_msgpack.codificar(
+                {'a': [1, -1, 300, -300, 1.5, None, True, False], 'b': 'é', 'c': Decimal('2.50'), 'd': b'\x00'}),
+                b'\x84\xa1a\x98\x01\xff\xcd\x01\x2c\xd1\xfe\xd4\xcb\x3f\xf8\x00\x00\x00\x00\x00\x00\xc0\xc3\xc2'
+                b'\xa1b\xa2\xc3\xa9\xa1c\xcb\x40\x04\x00\x00\x00\x00\x00\x00\xa1d\xc4\x01\x00')
+            self.assertEqual(codificacao_msgpack.codificar('x' * 40)[:2], b'\xd9\x28')
+            self.assertEqual(codificacao_msgpack.codificar(list(range(20)))[:3], b'\xdc\x00\x14')
+            with self.assertRaises(OverflowError):
+                codificacao_msgpack.codificar(2 ** 64)
+
+    @skipUnless(codificacao_msgpack.msgpack, 'msgpack não instalado')
+    def test_msgpack_instalado_igual_ao_codificador_puro(self):
+        dados = self.client.get('/api/contratos/').json()
+        dados.append({'a': [1, -1, 300, -300, 1.5, None, True, False], 'b': 'é' * 40, 'c': Decimal('2.50'),
+                      'd': b'\x00', 'e': list(range(20)), 'f': 2 ** 40})
+        instalado = codificacao_msgpack.codificar(dados)
+        with mock.patch.object(codificacao_msgpack, 'msgpack', None):
+            self.assertEqual(codificacao_msgpack.codificar(dados), instalado)
+        self.assertEqual(codificacao_msgpack.msgpack.unpackb(instalado)[:-1], dados[:-1])
+
+    def test_msgpack_sem_a_biblioteca(self):
+        dados = self.client.get('/api/contratos/').json()
+        with mock.patch.object(codificacao_msgpack, 'msgpack', None):
+            response = self.client.get('/api/contratos/', HTTP_ACCEPT='application/msgpack')
+            self.assertEqual(response.content, codificacao_msgpack.codificar(dados))
+            response = self.client.get('/api/contratos/?stream=msgpack')
+            self.assertEqual(b''.join(response.streaming_content),
+                             b''.join(codificacao_msgpack.codificar(contrato) for contrato in dados))
+
+    def test_gzip_e_tamanho_minimo(self):
+        sem_compressao = self.client.get('/api/contratos/')
+        response = self.client.get('/api/contratos/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), sem_compressao.content)
+        self.assertLess(len(response.content), len(sem_compressao.content) / 5)
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+        # O ETag fraco continua válido para o If-None-Match
+        response = self.client.get('/api/contratos/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Respostas pequenas não são comprimidas
+        response = self.client.get(f'/api/contratos/{self.contratos[0].id}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(response.content), compressao.CONFIGURACAO_PADRAO['TAMANHO_MINIMO'])
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    @override_settings(COMPRESSAO={'TAMANHO_BLOCO': 1024})
+    def test_streaming_comprimido_em_blocos(self):
+        sem_compressao = b''.join(self.client.get('/api/contratos/?stream=ndjson').streaming_content)
+        response = self.client.get('/api/contratos/?stream=ndjson', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        partes = list(response.streaming_content)
+        self.assertGreater(len(partes), 2)
+        self.assertEqual(gzip.decompress(b''.join(partes)), sem_compressao)
+
+        # Cada bloco enviado já pode ser descomprimido (flush), sem esperar o fim da resposta
+        descompressor = zlib.decompressobj(31)
+        self.assertTrue(descompressor.decompress(partes[0] + partes[1]))
+
+    @skipUnless(compressao.brotli, 'Brotli não instalado')
+    def test_brotli_instalado(self):
+        sem_compressao = self.client.get('/api/contratos/')
+        response = self.client.get('/api/contratos/', HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compressao.brotli.decompress(response.content), sem_compressao.content)
+
+        sem_compressao = b''.join(self.client.get('/api/contratos/?stream=ndjson').streaming_content)
+        response = self.client.get('/api/contratos/?stream=ndjson', HTTP_ACCEPT_ENCODING='br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compressao.brotli.decompress(b''.join(response.streaming_content)), sem_compressao)
+
+    def test_sem_brotli_usa_gzip(self):
+        sem_compressao = self.client.get('/api/contratos/')
+        with mock.patch.object(compressao, 'brotli', None):
+            response = self.client.get('/api/contratos/', HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), sem_compressao.content)
+
+    def test_escolher_codificacao(self):
+        with mock.patch.object(compressao, 'brotli', None):
+            self.assertEqual(compressao.escolher_codificacao('gzip, deflate, br'), 'gzip')
+            self.assertEqual(compressao.escolher_codificacao('*'), 'gzip')
+            self.assertIsNone(compressao.escolher_codificacao('gzip;q=0, identity'))
+            self.assertIsNone(compressao.escolher_codificacao(''))
+        with mock.patch.object(compressao, 'brotli', object()):
+            self.assertEqual(compressao.escolher_codificacao('gzip, br'), 'br')
+            self.assertEqual(compressao.escolher_codificacao('gzip, br;q=0.5'), 'gzip')
+
+
+class RemocaoEmLoteTest(APITestCase):
+    """
+    Testa a remoção em lote (DELETE /api/contratos/bulk/ e o comando remover_contratos).
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='remocao', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.sp = criar_contratos(3, parcelas_por_contrato=2)
+        self.rj = criar_contratos(2, parcelas_por_contrato=4, estado='RJ')
+
+    def test_dry_run_nao_remove(self):
+        response = self.client.delete('/api/contratos/bulk/?estado=RJ&dry_run=true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'dry_run': True, 'contratos': 2, 'parcelas': 8})
+        self.assertEqual(Contrato.objects.count(), 5)
+
+    def test_remocao_por_filtro_em_lotes(self):
+        since = self.client.get('/api/contratos/changes/').json()['next_since']
+        response = self.client.delete('/api/contratos/bulk/?estado=SP&tamanho_lote=2')
+        self.assertEqual(response.json(), {'dry_run': False, 'contratos': 3, 'parcelas': 6})
+        self.assertEqual(set(Contrato.objects.values_list('id', flat=True)), {contrato.id for contrato in self.rj})
+        self.assertEqual(Parcela.objects.count(), 8)
+
+        # Tabela consolidada, feed de alterações e cache acompanham a remoção
+        self.assertEqual(consolidacao.verificar(), [])
+        self.assertFalse(ResumoConsolidado.objects.filter(estado='SP').exists())
+        alteracoes = self.client.get(f'/api/contratos/changes/?since={since}').json()['results']
+        self.assertEqual([(alteracao['id'], alteracao['removido']) for alteracao in alteracoes],
+                         [(contrato.id, True) for contrato in self.sp])
+        self.assertEqual(self.client.get('/api/contratos/?estado=SP').json(), [])
+
+    def test_remocao_por_ids(self):
+        response = self.client.delete('/api/contratos/bulk/', {'ids': [self.sp[0].id, self.rj[0].id]}, format='json')
+        self.assertEqual(response.json()['contratos'], 2)
+        response = self.client.delete(f'/api/contratos/bulk/?ids={self.sp[1].id},{self.rj[1].id}&estado=RJ')
+        self.assertEqual(response.json(), {'dry_run': False, 'contratos': 1, 'parcelas': 4})
+        self.assertEqual(set(Contrato.objects.values_list('id', flat=True)), {self.sp[1].id, self.sp[2].id})
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.delete('/api/contratos/bulk/').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.delete('/api/contratos/bulk/?ids=1,a').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.delete('/api/contratos/bulk/?estado=SP&tamanho_lote=x').status_code,
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Contrato.objects.count(), 5)
+
+    def test_ids_no_corpo_deve_ser_lista(self):
+        # Uma string não pode ser lida caractere a caractere ("12" -> contratos 1 e 2)
+        ids = f'{self.sp[0].id}{self.sp[1].id}'
+        for corpo in ({'ids': ids}, {'ids': {str(self.sp[0].id): True}}, {'ids': [True]}, {'ids': [[self.sp[0].id]]}):
+            response = self.client.delete('/api/contratos/bulk/', corpo, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, corpo)
+            self.assertIn('ids', response.json())
+        self.assertEqual(Contrato.objects.count(), 5)
+
+    def test_comando_remover_contratos(self):
+        saida = StringIO()
+        call_command('remover_contratos', '--estado', 'SP', '--dry-run', stdout=saida)
+        self.assertIn('3 contrato(s) e 6 parcela(s)', saida.getvalue())
+        self.assertEqual(Contrato.objects.count(), 5)
+
+        call_command('remover_contratos', '--ids', str(self.rj[0].id), str(self.sp[0].id), '--estado', 'RJ',
+                     stdout=StringIO())
+        self.assertFalse(Contrato.objects.filter(id=self.rj[0].id).exists())
+        self.assertEqual(Contrato.objects.count(), 4)
+
+        with self.assertRaises(CommandError):
+            call_command('remover_contratos', stdout=StringIO())
+
+    def test_consolidacao_com_muitas_chaves(self):
+        # Mais chaves que a profundidade máxima de expressão do SQLite (1000)
+        chaves = [('SP', date(2025, 1, 17), f'{i:011d}') for i in range(1500)]
+        ResumoConsolidado.objects.filter(estado='SP').delete()
+        consolidacao.atualizar_chaves(chaves)
+        self.assertEqual(consolidacao.verificar(), [])
+        self.assertEqual(ResumoConsolidado.objects.filter(estado='SP').count(), 3)
+
+
+class ArquivamentoTest(APITestCase):
+    """
+    Testa o arquivamento de contratos quitados, as leituras com include_archived e a restauração.
+    """
+    def setUp(self):
+        limpar_caches()
+        self.user = User.objects.create_user(username='arquivamento', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        # Parcelas vencidas em 2025: quitados para um horizonte de 30 dias
+        self.quitados = criar_contratos(2, parcelas_por_contrato=2) + criar_contratos(1, estado='RJ')
+        self.ativo = criar_contratos(1, parcelas_por_contrato=2, estado='RJ')[0]
+        Parcela.objects.filter(contrato=self.ativo, numero_parcela=2).update(
+            data_vencimento=date.today() + timedelta(days=10))
+        consolidacao.reconstruir()
+
+    def ids(self, parametros=''):
+        return [contrato['id'] for contrato in self.client.get(f'/api/contratos/?{parametros}').json()]
+
+    def test_arquivar_e_ler_com_include_archived(self):
+        completa = self.client.get('/api/contratos/').json()
+        resumo = self.client.get('/api/contratos/resumo/?group_by=estado').json()
+        detalhe = self.client.get(f'/api/contratos/{self.quitados[0].id}/').json()
+
+        with self.settings(ARQUIVAMENTO={'HORIZONTE_DIAS': 30}):
+            self.assertEqual(arquivamento.arquivar(tamanho_lote=2), {'contratos': 3, 'parcelas': 7})
+        self.assertEqual(list(Contrato.objects.values_list('id', flat=True)), [self.ativo.id])
+        self.assertEqual(ContratoArquivado.objects.count(), 3)
+        self.assertEqual(ParcelaArquivada.objects.count(), 7)
+        self.assertEqual(consolidacao.verificar(), [])
+
+        # Leituras padrão apenas com os contratos ativos
+        self.assertEqual(self.ids(), [self.ativo.id])
+        self.assertEqual(self.client.get(f'/api/contratos/{self.quitados[0].id}/').status_code,
+                         status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/contratos/resumo/?estado=SP').json(), [])
+
+        # Com include_archived, os mesmos dados de antes do arquivamento
+        self.assertEqual(self.client.get('/api/contratos/?include_archived=true').json(), completa)
+        self.assertEqual(self.client.get(f'/api/contratos/{self.quitados[0].id}/?include_archived=true').json(),
+                         detalhe)
+        self.assertEqual(self.client.get('/api/contratos/resumo/?group_by=estado&include_archived=true').json(),
+                         resumo)
+        self.assertEqual(self.ids('include_archived=true&estado=RJ'), [self.quitados[2].id, self.ativo.id])
+        pagina = self.client.get('/api/contratos/?include_archived=true&page_size=2&fields=id&include=parcelas_summary')
+        self.assertEqual([contrato['id'] for contrato in pagina.json()['results']],
+                         [self.quitados[0].id, self.quitados[1].id])
+        self.assertEqual(pagina.json()['results'][0]['parcelas_summary']['quantidade'], 2)
+        linhas = b''.join(self.client.get('/api/contratos/?include_archived=true&stream=ndjson').streaming_content)
+        self.assertEqual([json.loads(linha) for linha in linhas.splitlines()], completa)
+
+        # Escritas não alcançam os contratos arquivados
+        self.assertEqual(self.client.delete(f'/api/contratos/{self.quitados[0].id}/?include_archived=true').status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+    def test_restaurar(self):
+        completa = self.client.get('/api/contratos/').json()
+        arquivamento.arquivar(arquivamento.contratos_quitados(horizonte_dias=30))
+        since = self.client.get('/api/contratos/changes/').json()['next_since']
+
+        restaurados = arquivamento.restaurar(ContratoArquivado.objects.filter(estado='SP'))
+        self.assertEqual(restaurados, {'contratos': 2, 'parcelas': 4})
+        self.assertEqual(self.ids(), [self.quitados[0].id, self.quitados[1].id, self.ativo.id])
+        self.assertEqual(self.ids('include_archived=true'), [contrato['id'] for contrato in completa])
+        self.assertEqual(consolidacao.verificar(), [])
+        alteracoes = self.client.get(f'/api/contratos/changes/?since={since}').json()['results']
+        self.assertEqual([(alteracao['id'], alteracao['removido']) for alteracao in alteracoes],
+                         [(self.quitados[0].id, False), (self.quitados[1].id, False)])
+
+        arquivamento.restaurar(ContratoArquivado.objects.all())
+        self.assertEqual(self.client.get('/api/contratos/').json(), completa)
+        self.assertFalse(ParcelaArquivada.objects.exists())
+
+    def test_comando_arquivar_contratos(self):
+        saida = StringIO()
+        call_command('arquivar_contratos', '--horizonte-dias', '30', '--dry-run', stdout=saida)
+        self.assertIn('3 contrato(s) e 7 parcela(s)', saida.getvalue())
+        self.assertEqual(ContratoArquivado.objects.count(), 0)
+
+        call_command('arquivar_contratos', '--horizonte-dias', '30', stdout=StringIO())
+        self.assertEqual(Contrato.objects.count(), 1)
+
+        call_command('arquivar_contratos', '--restaurar', '--ids', str(self.quitados[2].id), stdout=StringIO())
+        self.assertEqual(set(Contrato.objects.values_list('id', flat=True)), {self.quitados[2].id, self.ativo.id})
+        with self.assertRaises(CommandError):
+            call_command('arquivar_contratos', '--restaurar', stdout=StringIO())
@@ -1,16 +1,39 @@
-from rest_framework import viewsets
+from rest_framework import mixins, serializers, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Contrato
-from rest_framework.permissions import IsAuthenticated
-from .serializers import ContratoSerializer
-from django.db.models import Sum, Avg
+from .models import Contrato, Tarefa
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from .serializers import MODOS_PARCELAS, ContratoSerializer, TarefaSerializer
+from .tarefas import caminho_resultado
+from django.http import FileResponse
+from rest_framework.reverse import reverse
+from .consultas import com_parcelas, filtrar_contratos
+from .agregacoes import AGRUPAMENTOS, calcular_resumo_com_arquivados, calcular_resumo_consolidado
+from .analise_carteira import calcular_analise_carteira
+from datetime import date
+from .remocao import TAMANHO_LOTE_REMOCAO, contar_remocao, remover_em_lote
+from .arquivamento import contratos_leitura, incluir_arquivados
+from .paginacao import ContratoKeysetPagination
+from .parsers import NDJSONParser
+from .cache_respostas import cache_resposta, obter_metricas
+from .ingestao import MAXIMO_ITENS, TAMANHO_LOTE_PADRAO, criar_em_lote, validar_em_lote
+from rest_framework.parsers import JSONParser
+from .serializacao_rapida import CAMPOS_PADRAO, campos_selecionados, linhas_contratos
+from .renderers import JSONRapidoRenderer, MessagePackRenderer
+from .roteamento import gerar_em_leitura, usar_leitura
+from .perfilamento import medir, obter_metricas as obter_metricas_perfilamento
+from rest_framework.renderers import BrowsableAPIRenderer
+from . import alteracoes, busca, exportacao
+from .streaming import FORMATOS_STREAMING, CHUNK_SIZE_PADRAO, CHUNK_SIZE_MAXIMO, stream_contratos
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
 from rest_framework import status
-from django.views.decorators.gzip import gzip_page
-from django.db.models import Q
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .autenticacao import revogar_token
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from datetime import timedelta
@@ -21,6 +44,10 @@ class ContratoViewSet(viewsets.ModelViewSet):
     
     queryset = Contrato.objects.all()
     serializer_class = ContratoSerializer
+    pagination_class = ContratoKeysetPagination
+    renderer_classes = [JSONRapidoRenderer, MessagePackRenderer, BrowsableAPIRenderer]
+    # Escopo do rate limiting; as actions bulk e resumo têm escopos próprios
+    throttle_scope = None
 
     # Filtros para consulta de contratos
     def get_queryset(self):
@@ -31,6 +58,8 @@ class ContratoViewSet(viewsets.ModelViewSet):
         - cpf: Filtra contratos pelo número do documento (CPF).
         - data_emissao: Filtra contratos pela data de emissão.
         - estado: Filtra contratos pelo estado do endereço do tomador.
+        - include_archived: Com `true`, as leituras incluem os contratos arquivados
+          (ver app/arquivamento.py), pela visão ContratoCompleto.
         Retorna:
             QuerySet: O queryset filtrado de acordo com os parâmetros fornecidos.
             
@@ -38,27 +67,246 @@ class ContratoViewSet(viewsets.ModelViewSet):
         posso implementar solucoes mais complexas
         """
         queryset = Contrato.objects.all()
+        if self.request.method in SAFE_METHODS:
+            queryset = contratos_leitura(self.request.query_params)
+        queryset = filtrar_contratos(queryset, self.request.query_params)
+
+        # As parcelas são carregadas em uma única consulta, independente do número de contratos
+        return com_parcelas(queryset)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Leituras usam a conexão somente leitura; as escritas, a conexão principal
+        if request.method not in SAFE_METHODS:
+            return super().dispatch(request, *args, **kwargs)
+        with usar_leitura():
+            response = super().dispatch(request, *args, **kwargs)
+        if response.streaming and not isinstance(response, FileResponse):
+            # O corpo (stream e exportar) é consumido depois do dispatch: também na conexão somente leitura
+            response.streaming_content = gerar_em_leitura(response.streaming_content)
+        return response
+
+    def get_serializer_context(self):
+        """
+        Inclui no contexto do serializer o modo de reconciliação das parcelas na
+        atualização (`?modo_parcelas=mesclar|substituir`, padrão mesclar).
+        """
+        context = super().get_serializer_context()
+        modo = self.request.query_params.get('modo_parcelas', 'mesclar')
+        if modo not in MODOS_PARCELAS:
+            raise ValidationError({'modo_parcelas': f"Modo inválido. Use: {', '.join(MODOS_PARCELAS)}."})
+        context['modo_parcelas'] = modo
+        return context
+
+    def perform_destroy(self, instance):
+        # Contrato e parcelas removidos com DELETEs em conjunto, sem carregar as parcelas
+        remover_em_lote(Contrato.objects.filter(pk=instance.pk))
+
+    @cache_resposta('detalhe')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @cache_resposta('lista')
+    def list(self, request, *args, **kwargs):
+        """
+        Lista os contratos filtrados.
+        Além da listagem completa padrão, aceita dois modos opcionais:
+        - Paginação por cursor: `?page_size=100` e `?cursor=<id>` (ver ContratoKeysetPagination).
+        - Streaming: `?stream=ndjson`, `?stream=json` ou `?stream=msgpack` envia os contratos em partes,
+          lendo o banco em lotes de `chunk_size` contratos, com uso de memória constante.
+        - Busca: `?q=<termos>` busca por CPF parcial, trecho do telefone, cidade ou estado
+          e retorna até `limite` contratos, ordenados por relevância (ver app/busca.py).
+        Em todos os modos, `fields`, `include` e `exclude` escolhem os campos retornados
+        (ex: `?fields=id,numero_documento,valor_desembolsado&include=parcelas_summary`);
+        apenas as colunas escolhidas são lidas e as parcelas só são consultadas quando
+        pedidas (ver campos_selecionados).
+        """
+        campos = campos_selecionados(request.query_params)
+        if 'q' in request.query_params:
+            queryset = busca.buscar(self.filter_queryset(self.get_queryset()), request.query_params['q'],
+                                    busca.limite_busca(request.query_params))
+            with medir('serializacao'):
+                return Response(linhas_contratos(queryset, campos))
+
+        formato = request.query_params.get('stream')
+        if not formato:
+            queryset = self.filter_queryset(self.get_queryset())
+            if campos == CAMPOS_PADRAO:
+                page = self.paginate_queryset(queryset)
+                if page is not None:
+                    serializer = self.get_serializer(page, many=True)
+                    return self.get_paginated_response(serializer.data)
+            else:
+                # A página é lida apenas com os IDs; os campos escolhidos vêm do caminho rápido
+                page = self.paginate_queryset(queryset.prefetch_related(None).only('id'))
+                if page is not None:
+                    with medir('serializacao'):
+                        dados = linhas_contratos(queryset.filter(id__in=[contrato.id for contrato in page])
+                                                 .order_by('id'), campos)
+                    return self.get_paginated_response(dados)
+
+            # Caminho rápido: mesmos dados do ContratoSerializer, montados a partir de tuplas
+            with medir('serializacao'):
+                return Response(linhas_contratos(queryset, campos))
 
-        contrato_id = self.request.query_params.get('id')
-        if contrato_id:
-            queryset = queryset.filter(id=contrato_id)
+        if formato not in FORMATOS_STREAMING:
+            raise ValidationError({'stream': f"Formato inválido. Use: {', '.join(FORMATOS_STREAMING)}."})
 
-        cpf = self.request.query_params.get('cpf')
-        if cpf:
-            queryset = queryset.filter(numero_documento=cpf)
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', CHUNK_SIZE_PADRAO))
+        except ValueError:
+            raise ValidationError({'chunk_size': 'Deve ser um número inteiro.'})
+        chunk_size = max(1, min(chunk_size, CHUNK_SIZE_MAXIMO))
 
-        data_emissao = self.request.query_params.get('data_emissao')
-        if data_emissao:
-            queryset = queryset.filter(data_emissao=data_emissao)
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        conteudo = stream_contratos(queryset, formato, chunk_size=chunk_size, campos=campos)
+        return StreamingHttpResponse(conteudo, content_type=FORMATOS_STREAMING[formato])
 
-        estado = self.request.query_params.get('estado')
-        if estado:
-            queryset = queryset.filter(Q(endereco_tomador__estado=estado))
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta contratos ou parcelas como um arquivo colunar plano, enviado em partes.
+        Parâmetros de consulta:
+        - tabela: 'contratos' (padrão) ou 'parcelas'.
+        - formato: 'csv' (padrão) ou 'arrow' (Arrow IPC stream).
+        - id, cpf, data_emissao, estado: Os mesmos filtros da listagem.
+        - chunk_size: Linhas lidas do banco por vez.
+        """
+        tabela = request.query_params.get('tabela', 'contratos')
+        if tabela not in exportacao.COLUNAS:
+            raise ValidationError({'tabela': f"Tabela inválida. Use: {', '.join(exportacao.COLUNAS)}."})
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportacao.FORMATOS_EXPORTACAO:
+            raise ValidationError({'formato': f"Formato inválido. Use: {', '.join(exportacao.FORMATOS_EXPORTACAO)}."})
+        try:
+            chunk_size = int(request.query_params.get('chunk_size', exportacao.CHUNK_SIZE_EXPORTACAO))
+        except ValueError:
+            raise ValidationError({'chunk_size': 'Deve ser um número inteiro.'})
+        chunk_size = max(1, min(chunk_size, exportacao.CHUNK_SIZE_EXPORTACAO_MAXIMO))
 
-        return queryset
+        conteudo = exportacao.exportar(tabela, formato, request.query_params, chunk_size)
+        response = StreamingHttpResponse(conteudo, content_type=exportacao.FORMATOS_EXPORTACAO[formato])
+        response['Content-Disposition'] = f'attachment; filename="{tabela}.{exportacao.EXTENSOES[formato]}"'
+        return response
 
-    @gzip_page
     @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Feed de alterações para sincronização incremental: retorna os contratos criados,
+        alterados ou removidos depois da sequência `since`, em ordem de sequência.
+        Parâmetros de consulta:
+        - since: Valor de `next_since` da chamada anterior (padrão 0: toda a carteira).
+        - page_size: Alterações por página (padrão 100, máximo 1000).
+        - fields, include, exclude: Campos de cada contrato, como na listagem.
+        Retorna:
+        - Response: `results` (seq, id, removido e os dados atuais do contrato, ou null
+          nas lápides de contratos removidos), `next_since` e `has_more`.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            raise ValidationError({'since': 'Deve ser um número inteiro.'})
+        try:
+            tamanho_pagina = int(request.query_params.get('page_size', alteracoes.TAMANHO_PAGINA_ALTERACOES))
+        except ValueError:
+            raise ValidationError({'page_size': 'Deve ser um número inteiro.'})
+        tamanho_pagina = max(1, min(tamanho_pagina, alteracoes.TAMANHO_PAGINA_ALTERACOES_MAXIMO))
+
+        campos = campos_selecionados(request.query_params)
+        with medir('serializacao'):
+            return Response(alteracoes.listar_alteracoes(since, tamanho_pagina, campos))
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, NDJSONParser], throttle_scope='bulk')
+    def bulk(self, request):
+        """
+        Cria vários contratos em uma única requisição.
+        Aceita um array JSON de contratos (application/json) ou um contrato por linha
+        (application/x-ndjson), no mesmo formato do POST /api/contratos/.
+        Todos os itens são validados e os válidos são gravados com bulk_create, em
+        transações de `tamanho_lote` contratos. Itens inválidos não impedem a gravação
+        dos demais.
+        Retorna:
+        - Response: 201 quando todos foram criados, 207 quando parte falhou e 400 quando
+          nenhum foi criado, com o resultado de cada item (`indice` e `id` ou `erros`).
+        """
+        itens = request.data
+        if not isinstance(itens, list):
+            raise ValidationError({'non_field_errors': ['Esperada uma lista de contratos.']})
+        if len(itens) > MAXIMO_ITENS:
+            raise ValidationError({'non_field_errors': [f'Máximo de {MAXIMO_ITENS} contratos por requisição.']})
+
+        try:
+            tamanho_lote = max(1, int(request.query_params.get('tamanho_lote', TAMANHO_LOTE_PADRAO)))
+        except ValueError:
+            raise ValidationError({'tamanho_lote': 'Deve ser um número inteiro.'})
+
+        validos, erros = validar_em_lote(self.get_serializer(), itens)
+        criados, erros_gravacao = criar_em_lote(validos, tamanho_lote)
+        erros += erros_gravacao
+
+        resultados = [{'indice': indice, 'id': contrato_id} for indice, contrato_id in criados]
+        resultados += [{'indice': indice, 'erros': detalhes} for indice, detalhes in erros]
+        resultados.sort(key=lambda resultado: resultado['indice'])
+
+        if not erros:
+            codigo = status.HTTP_201_CREATED
+        elif criados:
+            codigo = status.HTTP_207_MULTI_STATUS
+        else:
+            codigo = status.HTTP_400_BAD_REQUEST
+
+        return Response({
+            'criados': len(criados),
+            'erros': len(erros),
+            'resultados': resultados,
+        }, status=codigo)
+
+    @bulk.mapping.delete
+    def bulk_delete(self, request):
+        """
+        Remove vários contratos, e suas parcelas, em uma única requisição.
+        Os contratos são selecionados pelos mesmos filtros da listagem (id, cpf,
+        data_emissao, estado) e/ou por uma lista de IDs (`ids=1,2,3` na consulta ou
+        `{"ids": [1, 2, 3]}` no corpo); ao menos um dos dois é obrigatório.
+        A remoção usa DELETEs em conjunto, em transações de `tamanho_lote` contratos.
+        Parâmetros de consulta:
+        - dry_run: Com `true`, apenas conta o que seria removido.
+        - tamanho_lote: Contratos por transação (padrão 1000).
+        Retorna:
+        - Response: Quantidade de `contratos` e `parcelas` removidos (ou a remover, no
+          dry-run) e `dry_run`.
+        """
+        ids = request.query_params.get('ids')
+        if ids is not None:
+            ids = ids.split(',')
+        elif isinstance(request.data, dict):
+            ids = request.data.get('ids')
+        if ids is not None:
+            # ListField recusa strings e objetos; sem isso, {"ids": "12"} seria lido como [1, 2]
+            try:
+                ids = serializers.ListField(child=serializers.IntegerField()).run_validation(ids)
+            except ValidationError:
+                raise ValidationError({'ids': 'Deve ser uma lista de números inteiros.'})
+
+        filtros = ('id', 'cpf', 'data_emissao', 'estado')
+        if ids is None and not any(request.query_params.get(filtro) for filtro in filtros):
+            raise ValidationError({'non_field_errors': [
+                f"Informe ao menos um filtro ({', '.join(filtros)}) ou a lista de ids."]})
+
+        try:
+            tamanho_lote = max(1, int(request.query_params.get('tamanho_lote', TAMANHO_LOTE_REMOCAO)))
+        except ValueError:
+            raise ValidationError({'tamanho_lote': 'Deve ser um número inteiro.'})
+
+        queryset = filtrar_contratos(Contrato.objects.all(), request.query_params)
+        if ids is not None:
+            queryset = queryset.filter(id__in=ids)
+
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true')
+        removidos = contar_remocao(queryset) if dry_run else remover_em_lote(queryset, tamanho_lote)
+        return Response({'dry_run': dry_run, **removidos})
+
+    @action(detail=False, methods=['get'], throttle_scope='resumo')
+    @cache_resposta('lista')
     def resumo(self, request):
         """
         Retorna um resumo dos contratos filtrados por CPF, data de emissão e estado.
@@ -70,43 +318,92 @@ class ContratoViewSet(viewsets.ModelViewSet):
             - cpf: CPF do tomador do contrato.
             - data_emissao: Data de emissão do contrato.
             - estado: Estado do endereço do tomador do contrato.
+            - group_by: Opcional. Agrupa o resumo por 'estado', 'data_emissao' ou 'mes'.
+            - include_archived: Opcional. Com `true`, inclui os contratos arquivados.
         Retorna:
         - Response: Um objeto Response contendo um dicionário com os seguintes dados:
             - valor_total_a_receber: Soma total dos valores das parcelas dos contratos filtrados.
             - valor_total_desembolsado: Soma total dos valores desembolsados dos contratos filtrados.
             - numero_total_de_contratos: Número total de contratos filtrados.
             - taxa_media_dos_contratos: Taxa média dos contratos filtrados.
+            - grupos: Apenas com group_by. Lista com os mesmos totais para cada grupo.
     """
-        cpf = request.query_params.get('cpf')
-        data_emissao = request.query_params.get('data_emissao')
-        estado = request.query_params.get('estado')
-
-        queryset = Contrato.objects.all()
+        group_by = request.query_params.get('group_by')
+        if group_by and group_by not in AGRUPAMENTOS:
+            raise ValidationError({'group_by': f"Agrupamento inválido. Use: {', '.join(AGRUPAMENTOS)}."})
 
-        if cpf:
-            queryset = queryset.filter(numero_documento=cpf)
-        if data_emissao:
-            queryset = queryset.filter(data_emissao=data_emissao)
-        if estado:
-            queryset = queryset.filter(Q(endereco_tomador__estado=estado))
-
-        total_valor_parcelas = queryset.aggregate(Sum('parcelas__valor_parcela'))['parcelas__valor_parcela__sum'] or 0
-        total_valor_desembolsado = queryset.aggregate(Sum('valor_desembolsado'))['valor_desembolsado__sum'] or 0
-        num_contratos = queryset.count()
-        taxa_media = queryset.aggregate(Avg('taxa_contrato'))['taxa_contrato__avg'] or 0
+        # Os totais são lidos da tabela consolidada (ResumoConsolidado), em uma única consulta
+        if incluir_arquivados(request.query_params):
+            totais, grupos = calcular_resumo_com_arquivados(request.query_params, group_by)
+        else:
+            totais, grupos = calcular_resumo_consolidado(request.query_params, group_by)
 
-        if total_valor_parcelas == 0 and total_valor_desembolsado == 0 and num_contratos == 0 and taxa_media == 0:
+        if totais['numero_total_de_contratos'] == 0:
             resumo = []
         else:
-            resumo = {
-            "valor_total_a_receber": total_valor_parcelas,
-            "valor_total_desembolsado": total_valor_desembolsado,
-            "numero_total_de_contratos": num_contratos,
-            "taxa_media_dos_contratos": taxa_media,
-            }
+            resumo = totais
+            if grupos is not None:
+                resumo['grupos'] = grupos
 
         return Response(resumo, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['get'])
+    def carteira(self, request):
+        """
+        Retorna os indicadores da carteira dos contratos filtrados: parcelas em atraso
+        por faixa de dias, fluxo projetado de recebimentos por mês, taxa média ponderada
+        pelo valor desembolsado, prazo médio e duration do fluxo a vencer.
+        Parâmetros de consulta:
+        - cpf, data_emissao, estado: Os mesmos filtros do resumo.
+        - data_referencia: Opcional. Data da análise no formato AAAA-MM-DD (padrão: hoje).
+        """
+        data_referencia = request.query_params.get('data_referencia')
+        if data_referencia:
+            try:
+                data_referencia = date.fromisoformat(data_referencia)
+            except ValueError:
+                raise ValidationError({'data_referencia': 'Data inválida. Use o formato AAAA-MM-DD.'})
+
+        queryset = filtrar_contratos(Contrato.objects.all(), request.query_params, ('cpf', 'data_emissao', 'estado'))
+        return Response(calcular_analise_carteira(queryset, data_referencia), status=status.HTTP_200_OK)
+
+
+class TarefaViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                    viewsets.GenericViewSet):
+    """
+    Tarefas em segundo plano (exportações e resumos completos), executadas pelo
+    comando `python manage.py processar_tarefas`.
+    - POST /api/tarefas/: Enfileira uma tarefa ({"tipo": ..., "parametros": {...}}) e
+      responde 202 com o status, sem esperar a execução.
+    - GET /api/tarefas/{id}/: Consulta o status da tarefa.
+    - GET /api/tarefas/{id}/resultado/: Baixa o resultado de uma tarefa concluída.
+    Cada usuário só enxerga as próprias tarefas.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = TarefaSerializer
+    queryset = Tarefa.objects.all()
+
+    def get_queryset(self):
+        return Tarefa.objects.filter(usuario=self.request.user).order_by('-id')
+
+    def perform_create(self, serializer):
+        serializer.save(usuario=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        response['Location'] = reverse('tarefa-detail', args=[response.data['id']], request=request)
+        return response
+
+    @action(detail=True, methods=['get'])
+    def resultado(self, request, pk=None):
+        tarefa = self.get_object()
+        if tarefa.status != Tarefa.CONCLUIDA:
+            return Response({'detail': f'Tarefa com status {tarefa.status}, sem resultado disponível.'},
+                            status=status.HTTP_409_CONFLICT)
+        return FileResponse(open(caminho_resultado(tarefa), 'rb'), content_type=tarefa.content_type,
+                            as_attachment=True, filename=f'{tarefa.tipo}_{tarefa.id}')
+
 
 class TokenObtainFor30DaysView(APIView):
     """
@@ -133,3 +430,48 @@ class TokenObtainFor30DaysView(APIView):
         return Response({
             'access': str(access_token)
         }, status=status.HTTP_200_OK)
+
+
+class RevogarTokenView(APIView):
+    """
+    Revoga um token de acesso antes da expiração (ex: token de 30 dias vazado).
+    Sem corpo, revoga o próprio token usado na requisição; com {"token": "..."},
+    revoga outro token de acesso do mesmo usuário.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        token = request.auth
+        if request.data.get('token'):
+            try:
+                token = AccessToken(request.data['token'])
+            except TokenError as exc:
+                raise ValidationError({'token': str(exc)})
+            if str(token.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                raise ValidationError({'token': 'O token pertence a outro usuário.'})
+        revogar_token(token)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CacheMetricasView(APIView):
+    """
+    Retorna as métricas do cache de respostas deste processo: acertos, falhas,
+    taxa de acerto, entradas removidas por falta de espaço e invalidações.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(obter_metricas(), status=status.HTTP_200_OK)
+
+
+class PerfilamentoMetricasView(APIView):
+    """
+    Retorna as métricas do PerfilamentoMiddleware deste processo, agregadas por
+    endpoint (tempo total e de banco, consultas, consultas repetidas, tempo de
+    serialização e renderização, tamanho e histograma de duração), e os perfis
+    cProfile das requisições lentas amostradas.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(obter_metricas_perfilamento(), status=status.HTTP_200_OK)
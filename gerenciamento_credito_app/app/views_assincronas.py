@@ -0,0 +1,152 @@
+"""
+Versões assíncronas (ASGI) dos endpoints de leitura de contratos.
+
+Sob um servidor ASGI (ex: uvicorn gerenciamento_credito_app.asgi:application) as
+consultas usam o ORM assíncrono e cada worker atende várias requisições ao mesmo
+tempo, sem ocupar uma thread por consulta lenta. As respostas são idênticas às dos
+endpoints síncronos do ContratoViewSet, que continuam disponíveis via WSGI: os filtros,
+a busca, a paginação, a escolha de campos, a autenticação e o rate limiting usam os
+mesmos helpers e classes. O streaming (`stream`) não é suportado e responde 400.
+"""
+
+from functools import partial, wraps
+from types import SimpleNamespace
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import InvalidToken
+from . import busca
+from .agregacoes import AGRUPAMENTOS, acalcular_resumo_consolidado, calcular_resumo_com_arquivados
+from .arquivamento import contratos_leitura, incluir_arquivados
+from .consultas import filtrar_contratos
+from .roteamento import usar_leitura
+from .serializacao_rapida import alinhas_contratos, campos_selecionados, renderizar_json
+from .views import ContratoViewSet
+
+
+def _json(dados, status_code=status.HTTP_200_OK):
+    return HttpResponse(renderizar_json(dados), content_type='application/json', status=status_code)
+
+
+def _resposta_erro(exc):
+    """
+    Converte uma APIException do DRF na mesma resposta do exception_handler padrão.
+    """
+    dados = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    resposta = _json(dados, exc.status_code)
+    if isinstance(exc, exceptions.NotAuthenticated):
+        resposta['WWW-Authenticate'] = ContratoViewSet().get_authenticate_header(None)
+    if getattr(exc, 'wait', None):
+        resposta['Retry-After'] = '%d' % exc.wait
+    return resposta
+
+
+def _autenticar(request, throttle_scope=None):
+    """
+    Autentica a requisição e aplica o rate limiting com as classes do ContratoViewSet
+    (authentication_classes, IsAuthenticated e throttle_classes), com o mesmo escopo
+    (throttle_scope) do endpoint síncrono equivalente.
+    Executado em uma thread (sync_to_async), pois consulta o banco e o cache.
+    """
+    autenticado = None
+    for autenticacao in ContratoViewSet().get_authenticators():
+        try:
+            autenticado = autenticacao.authenticate(request)
+        except InvalidToken as exc:
+            raise exceptions.NotAuthenticated(exc.detail)
+        if autenticado is not None:
+            break
+    if autenticado is None:
+        raise exceptions.NotAuthenticated()
+    request.user, request.auth = autenticado
+
+    view = SimpleNamespace(throttle_scope=throttle_scope)
+    esperas = []
+    for throttle in ContratoViewSet().get_throttles():
+        if not throttle.allow_request(request, view):
+            esperas.append(throttle.wait())
+    if esperas:
+        raise exceptions.Throttled(max((espera for espera in esperas if espera is not None), default=None))
+
+
+def endpoint_assincrono(view=None, throttle_scope=None):
+    """
+    Decorator das views assíncronas: aceita apenas GET, autentica a requisição,
+    envia as consultas para a conexão somente leitura e converte as exceções do DRF
+    em respostas JSON. `throttle_scope` define o escopo do rate limiting.
+    """
+    if view is None:
+        return partial(endpoint_assincrono, throttle_scope=throttle_scope)
+
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            with usar_leitura():
+                await sync_to_async(_autenticar)(request, throttle_scope)
+                return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return _resposta_erro(exc)
+    return wrapper
+
+
+@endpoint_assincrono
+async def listar_contratos(request):
+    """
+    GET /api/async/contratos/: mesmos filtros (id, cpf, data_emissao, estado,
+    include_archived), a mesma busca (q, limite), a mesma paginação opcional por cursor
+    (page_size, cursor) e a mesma escolha de campos (fields, include, exclude) do
+    endpoint síncrono. O streaming (stream) existe apenas no endpoint síncrono.
+    """
+    params = request.GET
+    if 'stream' in params:
+        raise exceptions.ValidationError({'stream': 'O streaming não está disponível no endpoint assíncrono; '
+                                                    'use GET /api/contratos/?stream=.'})
+    campos = campos_selecionados(params)
+    queryset = filtrar_contratos(contratos_leitura(params), params)
+
+    if 'q' in params:
+        queryset = await sync_to_async(busca.buscar)(queryset, params['q'], busca.limite_busca(params))
+        return _json(await alinhas_contratos(queryset, campos))
+
+    paginacao = ContratoViewSet.pagination_class()
+    pagina = paginacao.queryset_pagina(queryset, Request(request))
+    if pagina is None:
+        return _json(await alinhas_contratos(queryset, campos))
+    return _json(paginacao.dados_paginados(paginacao.paginar(await alinhas_contratos(pagina, campos))))
+
+
+@endpoint_assincrono
+async def detalhar_contrato(request, pk):
+    """
+    GET /api/async/contratos/{id}/ (com include_archived, também os contratos arquivados)
+    """
+    contratos = await alinhas_contratos(contratos_leitura(request.GET).filter(id=pk))
+    if not contratos:
+        raise exceptions.NotFound('No Contrato matches the given query.')
+    return _json(contratos[0])
+
+
+@endpoint_assincrono(throttle_scope='resumo')
+async def resumo_contratos(request):
+    """
+    GET /api/async/contratos/resumo/: mesmos filtros, group_by e include_archived do
+    resumo síncrono, calculados a partir da tabela consolidada com aaggregate.
+    """
+    group_by = request.GET.get('group_by')
+    if group_by and group_by not in AGRUPAMENTOS:
+        raise exceptions.ValidationError({'group_by': f"Agrupamento inválido. Use: {', '.join(AGRUPAMENTOS)}."})
+
+    if incluir_arquivados(request.GET):
+        # Os arquivados não estão na tabela consolidada: mesmo cálculo do resumo síncrono
+        totais, grupos = await sync_to_async(calcular_resumo_com_arquivados)(request.GET, group_by)
+    else:
+        totais, grupos = await acalcular_resumo_consolidado(request.GET, group_by)
+
+    if totais['numero_total_de_contratos'] == 0:
+        return _json([])
+    if grupos is not None:
+        totais['grupos'] = grupos
+    return _json(totais)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class GerenciamentoCreditoAppConfig(AppConfig):
+    name = 'gerenciamento_credito_app'
+
+    def ready(self):
+        # Registra os modelos, os signals que mantêm a tabela consolidada do resumo, o
+        # índice de busca e o feed de alterações, a invalidação do cache de respostas e a
+        # do cache de tokens JWT
+        from .app import alteracoes, autenticacao, busca, cache_respostas, models, signals  # noqa: F401
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from gerenciamento_credito_app.app import arquivamento
+from gerenciamento_credito_app.app.consultas import filtrar_contratos
+from gerenciamento_credito_app.app.models import ContratoArquivado
+from gerenciamento_credito_app.app.remocao import contar_remocao
+
+
+FILTROS = ('id', 'cpf', 'data_emissao', 'estado')
+
+
+class Command(BaseCommand):
+    help = ('Move os contratos quitados (última parcela vencida há mais de HORIZONTE_DIAS dias) para as tabelas '
+            'de arquivo, em transações por lote. Com --restaurar, traz de volta os contratos arquivados escolhidos.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizonte-dias', type=int,
+                            help='Dias desde o último vencimento (padrão: ARQUIVAMENTO["HORIZONTE_DIAS"]).')
+        parser.add_argument('--tamanho-lote', type=int, help='Contratos movidos por transação.')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta o que seria movido.')
+        parser.add_argument('--restaurar', action='store_true',
+                            help='Restaura os contratos arquivados escolhidos pelos filtros ou por --ids.')
+        for filtro in FILTROS:
+            parser.add_argument(f'--{filtro}', help=f'Com --restaurar, filtra os contratos arquivados por {filtro}.')
+        parser.add_argument('--ids', type=int, nargs='+', help='Com --restaurar, IDs dos contratos a restaurar.')
+
+    def handle(self, *args, **options):
+        tamanho_lote = max(1, options['tamanho_lote']) if options['tamanho_lote'] else None
+        if options['restaurar']:
+            filtros = {filtro: options[filtro] for filtro in FILTROS if options[filtro]}
+            if not filtros and not options['ids']:
+                raise CommandError(
+                    f"Informe ao menos um filtro ({', '.join('--' + filtro for filtro in FILTROS)}) ou --ids.")
+            queryset = filtrar_contratos(ContratoArquivado.objects.all(), filtros)
+            if options['ids']:
+                queryset = queryset.filter(id__in=options['ids'])
+            acao, executar = 'restaurado', lambda: arquivamento.restaurar(queryset, tamanho_lote)
+        else:
+            queryset = arquivamento.contratos_quitados(options['horizonte_dias'])
+            acao, executar = 'arquivado', lambda: arquivamento.arquivar(queryset, tamanho_lote)
+
+        if options['dry_run']:
+            quantidades = contar_remocao(queryset)
+            self.stdout.write(f"Seriam {acao}s {quantidades['contratos']} contrato(s) e "
+                              f"{quantidades['parcelas']} parcela(s).")
+            return
+
+        quantidades = executar()
+        self.stdout.write(self.style.SUCCESS(
+            f"{acao.capitalize()}s {quantidades['contratos']} contrato(s) e {quantidades['parcelas']} parcela(s)."))
@@ -0,0 +1,31 @@
+import sys
+from django.core.management.base import BaseCommand
+from gerenciamento_credito_app.app import exportacao
+
+
+class Command(BaseCommand):
+    help = 'Exporta contratos ou parcelas em um arquivo colunar (CSV ou Arrow), com uso de memória constante.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('saida', help="Arquivo de saída ('-' para a saída padrão).")
+        parser.add_argument('--tabela', choices=list(exportacao.COLUNAS), default='contratos')
+        parser.add_argument('--formato', choices=list(exportacao.FORMATOS_EXPORTACAO), default='csv')
+        parser.add_argument('--chunk-size', type=int, default=exportacao.CHUNK_SIZE_EXPORTACAO,
+                            help='Linhas lidas do banco e escritas por vez.')
+        for filtro in ('id', 'cpf', 'data_emissao', 'estado'):
+            parser.add_argument(f'--{filtro}', help=f'Filtra os contratos por {filtro}.')
+
+    def handle(self, *args, **options):
+        filtros = {filtro: options[filtro] for filtro in ('id', 'cpf', 'data_emissao', 'estado') if options[filtro]}
+        partes = exportacao.exportar(options['tabela'], options['formato'], filtros, max(1, options['chunk_size']))
+
+        if options['saida'] == '-':
+            for parte in partes:
+                sys.stdout.buffer.write(parte)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(options['saida'], 'wb') as arquivo:
+            for parte in partes:
+                arquivo.write(parte)
+        self.stdout.write(self.style.SUCCESS(f"Exportação salva em {options['saida']}."))
@@ -0,0 +1,47 @@
+import os
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connections
+from gerenciamento_credito_app.app import tarefas
+
+
+class Command(BaseCommand):
+    help = 'Executa as tarefas em segundo plano (exportações e resumos) enfileiradas pela API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Quantidade de tarefas executadas ao mesmo tempo (padrão: núcleos disponíveis).',
+        )
+        parser.add_argument(
+            '--processos', action='store_true',
+            help='Executa as tarefas em processos ao invés de threads (tarefas que usam muita CPU).',
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=1.0,
+            help='Segundos entre as verificações da fila quando não há tarefas.',
+        )
+        parser.add_argument(
+            '--uma-vez', action='store_true',
+            help='Executa as tarefas pendentes e termina quando a fila estiver vazia.',
+        )
+        parser.add_argument(
+            '--expiracao', type=int, default=30,
+            help='Minutos após os quais uma tarefa em execução é considerada abandonada e volta para a fila.',
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        modo = 'processos' if options['processos'] else 'threads'
+        self.stdout.write(f'Processando tarefas com {workers} {modo}...')
+        connections.close_all()
+        with tarefas.criar_pool(workers, options['processos']) as pool:
+            try:
+                executadas = tarefas.executar_fila(
+                    pool, workers, intervalo=options['intervalo'], uma_vez=options['uma_vez'],
+                    expiracao=timedelta(minutes=options['expiracao']),
+                )
+            except KeyboardInterrupt:
+                self.stdout.write('Encerrando após as tarefas em execução...')
+                return
+        self.stdout.write(self.style.SUCCESS(f'{executadas} tarefa(s) executada(s).'))
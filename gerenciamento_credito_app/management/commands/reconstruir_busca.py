@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from gerenciamento_credito_app.app import busca
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca (FTS5) dos contratos usado pelo parâmetro q da listagem.'
+
+    def handle(self, *args, **options):
+        total = busca.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'Índice de busca reconstruído com {total} contrato(s).'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from gerenciamento_credito_app.app import consolidacao
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói a tabela consolidada do resumo (ResumoConsolidado) ou verifica divergências.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Apenas compara a tabela consolidada com os contratos, sem alterar nada.',
+        )
+
+    def handle(self, *args, **options):
+        if options['verificar']:
+            divergencias = consolidacao.verificar()
+            for chave, esperado, atual in divergencias:
+                self.stdout.write(f'{chave}: esperado={esperado} atual={atual}')
+            if divergencias:
+                raise CommandError(f'{len(divergencias)} chave(s) divergente(s). Execute sem --verificar para reconstruir.')
+            self.stdout.write(self.style.SUCCESS('Tabela consolidada sem divergências.'))
+            return
+
+        total = consolidacao.reconstruir()
+        self.stdout.write(self.style.SUCCESS(f'Tabela consolidada reconstruída com {total} linha(s).'))
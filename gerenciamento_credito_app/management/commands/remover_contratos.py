@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from gerenciamento_credito_app.app.consultas import filtrar_contratos
+from gerenciamento_credito_app.app.models import Contrato
+from gerenciamento_credito_app.app.remocao import TAMANHO_LOTE_REMOCAO, contar_remocao, remover_em_lote
+
+
+FILTROS = ('id', 'cpf', 'data_emissao', 'estado')
+
+
+class Command(BaseCommand):
+    help = ('Remove contratos e suas parcelas com DELETEs em conjunto, em transações por lote. '
+            'Exige ao menos um filtro ou --ids.')
+
+    def add_arguments(self, parser):
+        for filtro in FILTROS:
+            parser.add_argument(f'--{filtro}', help=f'Filtra os contratos por {filtro}.')
+        parser.add_argument('--ids', type=int, nargs='+', help='IDs dos contratos a remover.')
+        parser.add_argument('--tamanho-lote', type=int, default=TAMANHO_LOTE_REMOCAO,
+                            help='Contratos removidos por transação.')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta o que seria removido.')
+
+    def handle(self, *args, **options):
+        filtros = {filtro: options[filtro] for filtro in FILTROS if options[filtro]}
+        if not filtros and not options['ids']:
+            raise CommandError(f"Informe ao menos um filtro ({', '.join('--' + filtro for filtro in FILTROS)}) ou --ids.")
+
+        queryset = filtrar_contratos(Contrato.objects.all(), filtros)
+        if options['ids']:
+            queryset = queryset.filter(id__in=options['ids'])
+
+        if options['dry_run']:
+            removidos = contar_remocao(queryset)
+            self.stdout.write(f"Seriam removidos {removidos['contratos']} contrato(s) e {removidos['parcelas']} parcela(s).")
+            return
+
+        removidos = remover_em_lote(queryset, max(1, options['tamanho_lote']))
+        self.stdout.write(self.style.SUCCESS(
+            f"Removidos {removidos['contratos']} contrato(s) e {removidos['parcelas']} parcela(s)."))
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+def consolidar_contratos(apps, schema_editor):
+    # Popula a tabela consolidada com os contratos já existentes
+    Contrato = apps.get_model('gerenciamento_credito_app', 'Contrato')
+    ResumoConsolidado = apps.get_model('gerenciamento_credito_app', 'ResumoConsolidado')
+
+    linhas = {}
+    for contrato in Contrato.objects.prefetch_related('parcelas'):
+        estado = str((contrato.endereco_tomador or {}).get('estado') or '')
+        chave = (estado, contrato.data_emissao, contrato.numero_documento)
+        linha = linhas.setdefault(chave, ResumoConsolidado(
+            estado=estado, data_emissao=contrato.data_emissao, numero_documento=contrato.numero_documento,
+        ))
+        linha.valor_total_desembolsado += contrato.valor_desembolsado
+        linha.valor_total_parcelas += sum(parcela.valor_parcela for parcela in contrato.parcelas.all())
+        linha.soma_taxas += contrato.taxa_contrato
+        linha.numero_contratos += 1
+
+    ResumoConsolidado.objects.bulk_create(linhas.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerenciamento_credito_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoConsolidado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(blank=True, default='', max_length=50)),
+                ('data_emissao', models.DateField()),
+                ('numero_documento', models.CharField(max_length=14)),
+                ('valor_total_desembolsado', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('valor_total_parcelas', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('soma_taxas', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('numero_contratos', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('estado', 'data_emissao', 'numero_documento'), name='resumo_consolidado_chave_unica')],
+            },
+        ),
+        migrations.RunPython(consolidar_contratos, migrations.RunPython.noop),
+    ]
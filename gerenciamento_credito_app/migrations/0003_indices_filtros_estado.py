@@ -0,0 +1,43 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:43
+
+import django.db.models.fields.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerenciamento_credito_app', '0002_resumoconsolidado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contrato',
+            name='estado',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.fields.json.KeyTextTransform('estado', 'endereco_tomador'), output_field=models.CharField(max_length=50, null=True)),
+        ),
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['numero_documento', 'data_emissao'], name='contrato_cpf_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['estado', 'data_emissao'], name='contrato_estado_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contrato',
+            index=models.Index(fields=['data_emissao'], name='contrato_data_emissao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parcela',
+            index=models.Index(fields=['contrato', 'numero_parcela'], name='parcela_contrato_numero_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumoconsolidado',
+            index=models.Index(fields=['numero_documento'], name='resumo_cpf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumoconsolidado',
+            index=models.Index(fields=['data_emissao'], name='resumo_data_emissao_idx'),
+        ),
+    ]
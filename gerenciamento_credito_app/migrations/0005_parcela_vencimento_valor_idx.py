@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerenciamento_credito_app', '0004_tarefa'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='parcela',
+            index=models.Index(fields=['data_vencimento', 'valor_parcela'], name='parcela_vencimento_valor_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+import re
+import unicodedata
+
+from django.db import migrations
+from django.db.models.fields.json import KeyTextTransform
+
+
+# Cópias do estado de app/busca.py quando a migração foi criada: a migração não deve
+# depender do código atual do app, que pode mudar depois.
+TABELA_BUSCA = 'contrato_busca'
+
+
+def normalizar_texto(texto):
+    decomposto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere)).lower()
+
+
+def somente_digitos(texto):
+    return re.sub(r'\D', '', str(texto or ''))
+
+
+def linha_indice(contrato_id, numero_documento, telefone_tomador, cidade, estado):
+    return (contrato_id, somente_digitos(numero_documento), somente_digitos(telefone_tomador),
+            normalizar_texto(cidade), normalizar_texto(estado))
+
+
+def criar_indice_busca(apps, schema_editor):
+    """
+    Cria a tabela FTS5 da busca de contratos (ver app/busca.py) e indexa os contratos
+    existentes. Em outros bancos a busca usa LIKE e a tabela não é criada.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {TABELA_BUSCA} USING fts5("
+        f"numero_documento, telefone_tomador, cidade, estado, tokenize='trigram')"
+    )
+    Contrato = apps.get_model('gerenciamento_credito_app', 'Contrato')
+    linhas = [
+        linha_indice(*linha) for linha in Contrato.objects.using(schema_editor.connection.alias).annotate(
+            cidade_busca=KeyTextTransform('cidade', 'endereco_tomador'),
+        ).values_list('id', 'numero_documento', 'telefone_tomador', 'cidade_busca', 'estado')
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {TABELA_BUSCA} (rowid, numero_documento, telefone_tomador, cidade, estado) '
+            f'VALUES (%s, %s, %s, %s, %s)',
+            linhas,
+        )
+
+
+def remover_indice_busca(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABELA_BUSCA}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerenciamento_credito_app', '0006_tokenrevogado'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice_busca, remover_indice_busca),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:43
+
+from django.db import migrations, models
+
+
+def registrar_contratos_existentes(apps, schema_editor):
+    """
+    Registra uma alteração para cada contrato existente, para que a sincronização a
+    partir de since=0 receba toda a carteira.
+    """
+    Contrato = apps.get_model('gerenciamento_credito_app', 'Contrato')
+    AlteracaoContrato = apps.get_model('gerenciamento_credito_app', 'AlteracaoContrato')
+    alias = schema_editor.connection.alias
+    AlteracaoContrato.objects.using(alias).bulk_create(
+        [AlteracaoContrato(contrato_id=contrato_id)
+         for contrato_id in Contrato.objects.using(alias).order_by('id').values_list('id', flat=True)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerenciamento_credito_app', '0007_contrato_busca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlteracaoContrato',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contrato_id', models.BigIntegerField(unique=True)),
+                ('alterado_em', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(registrar_contratos_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.1.5 on 2026-10-18 10:10
+
+import django.db.models.deletion
+import django.db.models.fields.json
+from django.db import migrations, models
+
+COLUNAS_CONTRATO = ('id, data_emissao, data_nascimento_tomador, valor_desembolsado, numero_documento, '
+                    'endereco_tomador, telefone_tomador, taxa_contrato, estado')
+COLUNAS_PARCELA = 'id, contrato_id, numero_parcela, valor_parcela, data_vencimento'
+
+# Visões com os contratos e parcelas ativos e arquivados, lidas por ContratoCompleto e
+# ParcelaCompleta (include_archived=true). Os IDs não se repetem entre as tabelas: o
+# arquivamento move as linhas mantendo os IDs e o AUTOINCREMENT do SQLite não os reutiliza.
+CRIAR_VISOES = [
+    f"CREATE VIEW contrato_completo AS "
+    f"SELECT {COLUNAS_CONTRATO} FROM gerenciamento_credito_app_contrato "
+    f"UNION ALL SELECT {COLUNAS_CONTRATO} FROM gerenciamento_credito_app_contratoarquivado",
+    f"CREATE VIEW parcela_completa AS "
+    f"SELECT {COLUNAS_PARCELA} FROM gerenciamento_credito_app_parcela "
+    f"UNION ALL SELECT {COLUNAS_PARCELA} FROM gerenciamento_credito_app_parcelaarquivada",
+]
+REMOVER_VISOES = ['DROP VIEW IF EXISTS contrato_completo', 'DROP VIEW IF EXISTS parcela_completa']
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gerenciamento_credito_app', '0008_alteracaocontrato'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContratoArquivado',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('data_emissao', models.DateField()),
+                ('data_nascimento_tomador', models.DateField()),
+                ('valor_desembolsado', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('numero_documento', models.CharField(max_length=14)),
+                ('endereco_tomador', models.JSONField()),
+                ('telefone_tomador', models.CharField(max_length=15)),
+                ('taxa_contrato', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('estado', models.GeneratedField(db_persist=True, expression=django.db.models.fields.json.KeyTextTransform('estado', 'endereco_tomador'), output_field=models.CharField(max_length=50, null=True))),
+            ],
+            options={
+                'indexes': [models.Index(fields=['numero_documento', 'data_emissao'], name='contrato_arq_cpf_data_idx'), models.Index(fields=['estado', 'data_emissao'], name='contrato_arq_estado_data_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ParcelaArquivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero_parcela', models.IntegerField()),
+                ('valor_parcela', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('data_vencimento', models.DateField()),
+                ('contrato', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parcelas', to='gerenciamento_credito_app.contratoarquivado')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ContratoCompleto',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('data_emissao', models.DateField()),
+                ('data_nascimento_tomador', models.DateField()),
+                ('valor_desembolsado', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('numero_documento', models.CharField(max_length=14)),
+                ('endereco_tomador', models.JSONField()),
+                ('telefone_tomador', models.CharField(max_length=15)),
+                ('taxa_contrato', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('estado', models.GeneratedField(db_persist=True, expression=django.db.models.fields.json.KeyTextTransform('estado', 'endereco_tomador'), output_field=models.CharField(max_length=50, null=True))),
+            ],
+            options={
+                'db_table': 'contrato_completo',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParcelaCompleta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero_parcela', models.IntegerField()),
+                ('valor_parcela', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('data_vencimento', models.DateField()),
+            ],
+            options={
+                'db_table': 'parcela_completa',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(CRIAR_VISOES, REMOVER_VISOES),
+    ]
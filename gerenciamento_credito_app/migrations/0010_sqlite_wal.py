@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def ativar_wal(apps, schema_editor):
+    """
+    Coloca o banco SQLite em journal_mode=WAL. O modo fica gravado no arquivo, então
+    basta aplicá-lo uma vez (aqui, no migrate do deploy) em vez de a cada conexão.
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+
+
+def desativar_wal(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=DELETE')
+
+
+class Migration(migrations.Migration):
+
+    # O SQLite não troca o journal_mode dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('gerenciamento_credito_app', '0009_arquivamento'),
+    ]
+
+    operations = [
+        migrations.RunPython(ativar_wal, desativar_wal, elidable=True),
+    ]
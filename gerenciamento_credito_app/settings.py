@@ -31,17 +31,21 @@ ALLOWED_HOSTS = ['gerenciamento-credito-app.onrender.com']
 # Application definition
 
 REST_FRAMEWORK = {
+    # JWT com cache dos tokens já verificados (ver AUTENTICACAO_JWT)
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'gerenciamento_credito_app.app.autenticacao.JWTAuthenticationComCache',
     ],
+    # Rate limiting para evitar DDos e overload do servidor (janela deslizante, ver LIMITE_TAXA)
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'gerenciamento_credito_app.app.limite_taxa.LimiteTaxaThrottle',
     ],
-    # Rate limiting para evitar DDos e overload do servidor.
+    # 'user' e 'anon' valem para todos os endpoints, exceto os que têm escopo próprio
+    # (throttle_scope): criação em lote e resumo
     'DEFAULT_THROTTLE_RATES': {
         'user': '50/minute',
-        'anon': '50/minute'
+        'anon': '50/minute',
+        'bulk': '10/minute',
+        'resumo': '120/minute',
     },
 }
 
@@ -56,6 +60,13 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': False, 
 }
 
+# Cache de tokens JWT verificados (app/autenticacao.py), por processo
+AUTENTICACAO_JWT = {
+    'MAXIMO_TOKENS': 10000,
+    # Segundos até a revogação e o usuário de um token em cache serem verificados de novo
+    'REVALIDAR_APOS': 60,
+}
+
 INSTALLED_APPS = [
     'rest_framework',
     'django.contrib.admin',
@@ -68,6 +79,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Desativado por padrão; ver PERFILAMENTO abaixo
+    'gerenciamento_credito_app.app.perfilamento.PerfilamentoMiddleware',
+    # Compressão brotli/gzip das respostas, inclusive em streaming; ver COMPRESSAO abaixo
+    'gerenciamento_credito_app.app.compressao.CompressaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,6 +92,31 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Perfilamento por requisição (app/perfilamento.py): Server-Timing, métricas por endpoint
+# em /api/perfilamento/metricas/ e cProfile por amostragem das requisições lentas.
+PERFILAMENTO = {
+    'ATIVO': False,
+    'AMOSTRAGEM_CPROFILE': 0.0,
+    'LIMITE_LENTO_MS': 500,
+    'MAXIMO_PERFIS': 20,
+    'LIMITE_REPETICOES': 5,
+}
+
+# Compressão das respostas (app/compressao.py): brotli quando instalado, senão gzip.
+# Respostas menores que TAMANHO_MINIMO bytes não são comprimidas.
+COMPRESSAO = {
+    'TAMANHO_MINIMO': 1024,
+    'NIVEL_GZIP': 6,
+    'QUALIDADE_BROTLI': 4,
+}
+
+# Arquivamento de contratos quitados (app/arquivamento.py, comando arquivar_contratos):
+# contratos cuja última parcela venceu há mais de HORIZONTE_DIAS dias saem das tabelas ativas.
+ARQUIVAMENTO = {
+    'HORIZONTE_DIAS': 365,
+    'TAMANHO_LOTE': 1000,
+}
+
 ROOT_URLCONF = 'gerenciamento_credito_app.urls'
 
 TEMPLATES = [
@@ -101,13 +141,91 @@ WSGI_APPLICATION = 'gerenciamento_credito_app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Pragmas aplicados a cada nova conexão SQLite. O journal_mode=WAL (leitores não
+# bloqueiam o escritor, e vice-versa) fica gravado no arquivo e é aplicado uma única vez
+# pela migração 0010_sqlite_wal, não aqui.
+# - synchronous=NORMAL: seguro com WAL, sem fsync a cada commit.
+# - cache_size/mmap_size: 64 MB de cache de páginas e 256 MB de leitura por mmap por conexão.
+SQLITE_PRAGMAS = [
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-64000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+]
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Conexões persistentes: reaproveitadas entre requisições do mesmo worker
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            # Escritas pegam o lock no BEGIN, evitando "database is locked" ao promover a transação
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    },
+    # Conexão somente leitura usada pelas leituras da API (ver app/roteamento.py).
+    # Aponta para o mesmo arquivo; para uma réplica (ex: Litestream/LiteFS) troque o NAME.
+    'leitura': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': (BASE_DIR / 'db.sqlite3').as_uri() + '?mode=ro',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join([*SQLITE_PRAGMAS, 'PRAGMA query_only=ON']),
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['gerenciamento_credito_app.app.roteamento.RoteadorLeituraEscrita']
+
+
+# Cache
+# O alias 'respostas' guarda as respostas de leitura do ContratoViewSet (ver app/cache_respostas.py).
+# O backend em arquivos é compartilhado entre os workers da máquina, então a invalidação feita
+# por uma escrita vale para todos; para vários servidores use um backend compatível com Redis.
+# LocMemCacheComMetricas (LRU em memória) é mais rápido, mas é por processo: os demais workers
+# continuam servindo respostas e ETags antigos até o TIMEOUT. Use-o apenas com um único worker:
+#   'BACKEND': 'gerenciamento_credito_app.app.cache_respostas.LocMemCacheComMetricas',
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'respostas': {
+        'BACKEND': 'gerenciamento_credito_app.app.cache_respostas.FileBasedCacheComMetricas',
+        'LOCATION': BASE_DIR / 'cache_respostas',
+        'TIMEOUT': 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+
+# Contadores do rate limiting (app/limite_taxa.py), compartilhados entre os workers.
+# Para vários servidores, use um cache compartilhado, ex:
+# {'ARMAZENAMENTO': 'gerenciamento_credito_app.app.limite_taxa.ArmazenamentoCache', 'OPCOES': {'alias': 'limites'}}
+LIMITE_TAXA = {
+    'ARMAZENAMENTO': 'gerenciamento_credito_app.app.limite_taxa.ArmazenamentoSQLite',
+    'OPCOES': {'caminho': BASE_DIR / 'limite_taxa.sqlite3'},
+}
+
+
+# Tarefas em segundo plano (app/tarefas.py): diretório dos arquivos de resultado
+TAREFAS_DIRETORIO = BASE_DIR / 'resultados_tarefas'
+
+
+# Os testes gravam o cache de respostas, os contadores e os resultados em um diretório temporário
+TEST_RUNNER = 'gerenciamento_credito_app.app.executor_testes.ExecutorTestes'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -2,16 +2,26 @@ from django.urls import path, include
 from django.contrib import admin
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .app.views import ContratoViewSet, TokenObtainFor30DaysView
+from .app import views_assincronas
+from .app.views import (CacheMetricasView, ContratoViewSet, PerfilamentoMetricasView, RevogarTokenView,
+                        TarefaViewSet, TokenObtainFor30DaysView)
 
 
 router = DefaultRouter()
 router.register(r'contratos', ContratoViewSet)
+router.register(r'tarefas', TarefaViewSet)
 
 
 urlpatterns = [
     path('api/', include(router.urls)),
+    # Leitura assíncrona (ASGI) dos contratos; mesmas respostas de /api/contratos/
+    path('api/async/contratos/', views_assincronas.listar_contratos, name='contrato-list-async'),
+    path('api/async/contratos/resumo/', views_assincronas.resumo_contratos, name='contrato-resumo-async'),
+    path('api/async/contratos/<int:pk>/', views_assincronas.detalhar_contrato, name='contrato-detail-async'),
     path('admin/', admin.site.urls),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/30days/', TokenObtainFor30DaysView.as_view(), name='token_obtain_30days'),
+    path('api/token/revogar/', RevogarTokenView.as_view(), name='token_revogar'),
+    path('api/cache/metricas/', CacheMetricasView.as_view(), name='cache_metricas'),
+    path('api/perfilamento/metricas/', PerfilamentoMetricasView.as_view(), name='perfilamento_metricas'),
 ]
\ No newline at end of file